@@ -0,0 +1,116 @@
+"""
+Compare result download paths: rows/s and peak RSS.
+
+Reports rows/s, peak RSS growth and the in-memory size of the result.
+Paths (each measured in its own process so peak RSS is not shared):
+    dataframe      QueryJob.to_dataframe() over the REST API (the previous path)
+    arrow          Storage Read API to_arrow() + arrow_to_dataframe() with
+                   country/region/sector dictionary-encoded
+    arrow-table    Storage Read API to_arrow() only, kept as pyarrow.Table
+
+The query is get_facility_data's column list over a whole table, repeated
+--copies times to reach a realistic row count. Runs against the local replica
+by default; --bigquery uses Application Default Credentials against the real
+project (the Storage Read API only takes effect there).
+
+Usage:
+    python -m benchmarks.arrow_download --replica-dir data/replica [--copies 200] [--bigquery]
+"""
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import time
+import warnings
+
+import config
+
+
+PATHS = ["dataframe", "arrow", "arrow-table"]
+
+
+def _client(args):
+    if args.bigquery:
+        from google.cloud import bigquery
+        return bigquery.Client(project=config.GCP_PROJECT_ID)
+
+    from database.local_replica import LocalReplicaClient
+    return LocalReplicaClient(args.replica_dir)
+
+
+def _measure(args):
+    """Run the query once along args.child and print rows, seconds and peak RSS growth as JSON."""
+    from database.query_runner import arrow_to_dataframe, submit_query
+
+    client = _client(args)
+    query = f"""
+        SELECT
+            form_case__case_id,
+            sector,
+            level_of_care,
+            country,
+            region,
+            data_collection_period
+        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{args.table}`
+        CROSS JOIN UNNEST(GENERATE_ARRAY(1, @copies)) AS copy
+    """
+    config.BQ_STORAGE_API_ENABLED = args.child != "dataframe"
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    handle = submit_query(client, query, {"copies": args.copies})
+    if args.child == "dataframe":
+        result = handle.result()
+    elif args.child == "arrow":
+        result = arrow_to_dataframe(handle.arrow())
+    else:
+        result = handle.arrow()
+    seconds = time.perf_counter() - started
+
+    # ru_maxrss is in KiB on Linux
+    peak_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    if args.child == "arrow-table":
+        rows, result_bytes = result.num_rows, result.nbytes
+    else:
+        rows, result_bytes = len(result), result.memory_usage(deep=True).sum()
+    print(json.dumps({
+        "rows": rows,
+        "seconds": seconds,
+        "peak_rss_mb": peak_growth / 1024,
+        "result_mb": int(result_bytes) / 2 ** 20,
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare REST/pandas and Storage API/Arrow result downloads.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--table", default=config.TABLES["surveys"])
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--bigquery", action="store_true", help="Query BigQuery instead of the local replica")
+    parser.add_argument("--child", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+
+    if args.child:
+        _measure(args)
+        return 0
+
+    print(f"{'Path':<14}{'Rows':>12}{'Seconds':>10}{'Rows/s':>14}{'Peak RSS +MB':>15}{'Result MB':>12}")
+    for path in PATHS:
+        command = [sys.executable, "-m", "benchmarks.arrow_download", "--child", path,
+                   "--replica-dir", args.replica_dir, "--table", args.table, "--copies", str(args.copies)]
+        if args.bigquery:
+            command.append("--bigquery")
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rate = result["rows"] / result["seconds"] if result["seconds"] else float("inf")
+        print(f"{path:<14}{result['rows']:>12,}{result['seconds']:>10.2f}{rate:>14,.0f}{result['peak_rss_mb']:>15.1f}{result['result_mb']:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
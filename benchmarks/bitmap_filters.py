@@ -0,0 +1,120 @@
+"""
+Compare checkbox filter evaluation with pandas isin and with the bitmap index.
+
+Builds a synthetic frame (--rows, 10M by default) with the filter columns of
+utils/bitmap_index.py at survey-like cardinalities (a few periods, a dozen
+countries, ~80 regions, ...; some NULLs), then evaluates a series of random
+checkbox selections, each a "col IN (...)" predicate on a random subset of
+the columns, two ways:
+
+    isin    one Series.isin scan per filtered column, ANDed (what the
+            derivation layers did before)
+    bitmap  ORs and ANDs of BitmapIndex bitmaps
+
+Reports the index build time and memory, the mean and median time per
+selection, and checks that both give the same rows.
+
+Usage:
+    python -m benchmarks.bitmap_filters [--rows 10000000] [--selections 50] [--dtype object|category]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.bitmap_index import BITMAP_COLUMNS, BitmapIndex
+
+
+# Distinct values per column, and the share of NULLs
+CARDINALITIES = {
+    "data_collection_period": (4, 0.0),
+    "country": (12, 0.0),
+    "region": (80, 0.01),
+    "sector": (5, 0.01),
+    "level_of_care": (3, 0.05),
+    "insulin_type": (6, 0.02),
+    "insulin_inn": (20, 0.02),
+}
+
+
+def _synthetic_frame(rows, dtype, rng):
+    columns = {}
+    for column in BITMAP_COLUMNS:
+        cardinality, null_share = CARDINALITIES[column]
+        vocabulary = np.array([f"{column} {value}" for value in range(cardinality)] + [None], dtype=object)
+        # Skewed like real surveys: a few values hold most rows
+        weights = 1.0 / np.arange(1, cardinality + 1)
+        weights = np.append(weights / weights.sum() * (1 - null_share), null_share)
+        columns[column] = pd.Series(vocabulary[rng.choice(cardinality + 1, size=rows, p=weights)], dtype=dtype)
+    return pd.DataFrame(columns)
+
+
+def _selections(df, count, rng):
+    vocabularies = {column: df[column].dropna().unique().tolist() for column in BITMAP_COLUMNS}
+    selections = []
+    for _ in range(count):
+        filters = {}
+        for column, values in vocabularies.items():
+            if rng.random() < 0.5:
+                size = int(rng.integers(1, len(values) + 1))
+                filters[column] = [values[i] for i in rng.choice(len(values), size=size, replace=False)]
+        selections.append(filters)
+    return selections
+
+
+def _isin_mask(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in filters.items():
+        mask &= df[column].isin(values).to_numpy(dtype=bool)
+    return mask
+
+
+def _timed(function, selections):
+    seconds, masks = [], []
+    for filters in selections:
+        started = time.perf_counter()
+        masks.append(function(filters))
+        seconds.append(time.perf_counter() - started)
+    return seconds, masks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare isin and bitmap index filter evaluation.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--selections", type=int, default=50, help="Random checkbox selections")
+    parser.add_argument("--dtype", choices=["object", "category"], default="object",
+                        help="Column dtype of the synthetic frame")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    print(f"Generating {args.rows:,} rows...", flush=True)
+    df = _synthetic_frame(args.rows, args.dtype, rng)
+    selections = _selections(df, args.selections, rng)
+
+    started = time.perf_counter()
+    index = BitmapIndex(df)
+    build_seconds = time.perf_counter() - started
+    print(f"Bitmap index: built in {build_seconds:.2f}s, {index.nbytes() / 1024 ** 2:.1f} MB", flush=True)
+
+    isin_seconds, isin_masks = _timed(lambda filters: _isin_mask(df, filters), selections)
+    bitmap_seconds, bitmap_masks = _timed(index.mask, selections)
+
+    mismatches = sum(not np.array_equal(a, b) for a, b in zip(isin_masks, bitmap_masks))
+
+    print(f"{'method':<8} {'mean ms':>9} {'median ms':>10} {'total s':>8}")
+    for method, seconds in (("isin", isin_seconds), ("bitmap", bitmap_seconds)):
+        print(
+            f"{method:<8} {statistics.mean(seconds) * 1000:>9.1f} "
+            f"{statistics.median(seconds) * 1000:>10.1f} {sum(seconds):>8.2f}"
+        )
+    print(f"Speedup (mean): {statistics.mean(isin_seconds) / statistics.mean(bitmap_seconds):.1f}x")
+    print(f"{mismatches} mismatching selection(s)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
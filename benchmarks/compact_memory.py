@@ -0,0 +1,84 @@
+"""
+Measure the cache memory of query function results with and without compaction.
+
+Runs every query function (the local replica's verification cases) against
+the local replica, never BigQuery, once per data collection period and once
+for all periods, with config.COMPACT_RESULTS_ENABLED off and on. For each
+filter combination it reports the bytes st.cache_data holds for the results
+(their pickled size) and their in-memory size (DataFrame.memory_usage(deep=True)),
+split into bulk row results (get_facility_data) and the aggregated section
+results.
+
+Usage:
+    python -m benchmarks.compact_memory --replica-dir data/replica [--periods 3]
+"""
+import argparse
+import logging
+import pickle
+import sys
+import warnings
+from collections import defaultdict
+
+import pandas as pd
+
+import config
+
+
+# Functions returning survey rows rather than aggregates
+ROW_FUNCTIONS = {"get_facility_data"}
+
+
+def _sizes(result):
+    if not isinstance(result, pd.DataFrame):
+        return 0, 0
+    return len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)), int(result.memory_usage(deep=True).sum())
+
+
+def _measure(cases, compact):
+    """Bytes per (filter combination, result kind): [pickled, in memory]."""
+    config.COMPACT_RESULTS_ENABLED = compact
+    totals = defaultdict(lambda: [0, 0])
+    for case_id, function, kwargs in cases:
+        function.clear()
+        function_name, period_label = case_id.split("__", 1)
+        kind = "rows" if function_name in ROW_FUNCTIONS else "aggregates"
+        pickled, in_memory = _sizes(function(**kwargs))
+        totals[(period_label, kind)][0] += pickled
+        totals[(period_label, kind)][1] += in_memory
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cache memory of compacted query results.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--periods", type=int, default=3, help="Most recent periods measured on their own")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    # Every result must really be computed
+    config.RESULT_CACHE_ENABLED = False
+
+    from database.local_replica import LocalReplicaClient, _verification_cases
+
+    client = LocalReplicaClient(args.replica_dir)
+    cases = _verification_cases(client, max_periods=args.periods)
+
+    plain = _measure(cases, compact=False)
+    compact = _measure(cases, compact=True)
+
+    print(f"{'filters':<16} {'results':<11} {'pickled KB':>11} {'compact KB':>11} {'ratio':>6} "
+          f"{'memory KB':>10} {'compact KB':>11} {'ratio':>6}")
+    for key in sorted(plain):
+        period_label, kind = key
+        (plain_pickled, plain_memory), (compact_pickled, compact_memory) = plain[key], compact[key]
+        print(
+            f"{period_label:<16} {kind:<11} {plain_pickled / 1024:>11.1f} {compact_pickled / 1024:>11.1f} "
+            f"{plain_pickled / max(compact_pickled, 1):>5.1f}x {plain_memory / 1024:>10.1f} "
+            f"{compact_memory / 1024:>11.1f} {plain_memory / max(compact_memory, 1):>5.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Measure cold page query time with and without the concurrent section prefetch.
+
+Runs every section query of both tabs (database/prefetch.py) against the local
+replica, never BigQuery, once on a single worker (what rendering the sections
+one by one costs) and once on the bounded prefetch pool. Each query gets a
+fixed added latency to stand in for the BigQuery round trip, which dominates
+in production and which the local replica does not have.
+
+Usage:
+    python -m benchmarks.prefetch_wall_time --replica-dir data/replica [--latency 0.5] [--workers 8]
+"""
+import argparse
+import logging
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+class _LatencyClient:
+    """Wraps a client and delays every query like a BigQuery round trip."""
+
+    def __init__(self, client, latency):
+        self._client = client
+        self._latency = latency
+        self.project = client.project
+
+    def query(self, query, job_config=None, **kwargs):
+        time.sleep(self._latency)
+        return self._client.query(query, job_config=job_config, **kwargs)
+
+    def get_table(self, table_ref):
+        return self._client.get_table(table_ref)
+
+
+def _cold_run(prefetch, client, checkbox_states, workers):
+    import streamlit as st
+    from database.query_runner import get_query_stats, reset_query_stats
+
+    st.cache_data.clear()
+    reset_query_stats()
+    prefetch._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    started = time.perf_counter()
+    batches = [
+        prefetch.prefetch_availability_sections(client, checkbox_states),
+        prefetch.prefetch_price_sections(client, checkbox_states),
+    ]
+    for batch in batches:
+        if batch is not None:
+            batch.wait()
+    elapsed = time.perf_counter() - started
+
+    prefetch._executor.shutdown()
+    return elapsed, get_query_stats()["executions"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sequential and prefetched section query wall time.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds added to every query")
+    parser.add_argument("--workers", type=int, default=config.PREFETCH_MAX_WORKERS)
+    parser.add_argument("--cube", action="store_true", help="Keep the availability cube enabled")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    config.AVAILABILITY_CUBE_ENABLED = args.cube
+    # Every run must be cold
+    config.RESULT_CACHE_ENABLED = False
+
+    from database import bigquery_client as bq
+    from database import prefetch
+    from database.local_replica import LocalReplicaClient
+    from database.query_builder import canonical_values
+
+    client = _LatencyClient(LocalReplicaClient(args.replica_dir), args.latency)
+    periods = canonical_values(bq.get_data_collection_periods(client, config.TABLES["surveys"])["data_collection_period"].tolist())[:2]
+
+    # Default view of both tabs: periods selected, every checkbox ticked
+    checkbox_states = {"selected_periods": periods, "selected_periods_price": periods}
+
+    sequential, executions = _cold_run(prefetch, client, checkbox_states, 1)
+    concurrent, _ = _cold_run(prefetch, client, checkbox_states, args.workers)
+
+    print(f"Queries per cold page:       {executions}")
+    print(f"Added latency per query:     {args.latency:.2f}s")
+    print(f"Sequential (1 worker):       {sequential:.2f}s")
+    print(f"Prefetch ({args.workers} workers):        {concurrent:.2f}s")
+    print(f"Speedup:                     {sequential / concurrent:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
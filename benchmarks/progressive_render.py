@@ -0,0 +1,92 @@
+"""
+Measure time to first meaningful content and to the full Availability page.
+
+Drives app.py with Streamlit's AppTest against the local replica, never
+BigQuery: a cold page load, then selecting data collection periods, with
+config.PROGRESSIVE_RENDERING off and on. Each query gets a fixed added
+latency to stand in for the BigQuery round trip. For the period selection it
+reports, from st.session_state.page_timings (components/sections.render_page),
+
+    first content   script start until the first page block (the period
+                    summary) was filled
+    full page       script start until the last section was filled
+
+Every run starts with empty caches.
+
+Usage:
+    python -m benchmarks.progressive_render --replica-dir data/replica [--latency 0.2] [--periods 2]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import warnings
+
+import config
+
+
+def _add_latency(latency):
+    """Delay every local replica query like a BigQuery round trip."""
+    from database.local_replica import LocalReplicaClient
+
+    query = LocalReplicaClient.query
+
+    def slow_query(self, *args, **kwargs):
+        time.sleep(latency)
+        return query(self, *args, **kwargs)
+
+    LocalReplicaClient.query = slow_query
+
+
+def _cold_page(app_file, progressive, periods, timeout):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    config.PROGRESSIVE_RENDERING = progressive
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(app_file, default_timeout=timeout)
+    at.run()
+    selector = at.multiselect(key="availability_period_filter")
+    selector.set_value(selector.options[:periods])
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at.session_state["page_timings"]["availability"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to first meaningful content and to the full page.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--app-file", default="app.py")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every query")
+    parser.add_argument("--periods", type=int, default=2, help="Data collection periods selected")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per script run")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    # Never BigQuery; every run must be cold
+    config.LOCAL_REPLICA_ENABLED = True
+    config.LOCAL_REPLICA_DIR = args.replica_dir
+    config.WARMUP_ON_STARTUP = False
+    config.RESULT_CACHE_ENABLED = False
+    _add_latency(args.latency)
+
+    app_file = os.path.abspath(args.app_file)
+    results = [
+        (label, _cold_page(app_file, progressive, args.periods, args.timeout))
+        for label, progressive in (("in page order", False), ("progressive", True))
+    ]
+
+    print(f"Added latency per query: {args.latency:.2f}s")
+    print(f"{'rendering':<16} {'first content s':>16} {'full page s':>12}")
+    for label, timings in results:
+        print(f"{label:<16} {timings['first_content']:>16.2f} {timings['full_page']:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
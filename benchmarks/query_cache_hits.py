@@ -0,0 +1,118 @@
+"""
+Replay a scripted filter session and report cache hit rates.
+
+Simulates a user ticking Region/Sector checkboxes in random order (with the
+default "everything ticked" state in between) and calls the query functions
+the way app.py does. Runs against the local replica only, never BigQuery.
+
+Reports:
+    - st.cache_data hit rate: function calls answered without running SQL
+    - BigQuery result cache hit rate: executions whose SQL + parameters had
+      already been executed (what BigQuery's 24h result cache would answer)
+
+Usage:
+    python -m benchmarks.query_cache_hits --replica-dir data/replica [--steps 60] [--raw-selections]
+
+--raw-selections passes the checkbox lists in click order without
+canonical_values, to show what app-level normalization contributes.
+"""
+import argparse
+import logging
+import random
+import sys
+import warnings
+
+import config
+
+
+def _distinct_values(client, table_name, column):
+    df = client.query(
+        f"SELECT DISTINCT {column} FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}` "
+        f"WHERE {column} IS NOT NULL"
+    ).to_dataframe()
+    return sorted(df[column].tolist())
+
+
+def _random_selection(rng, options):
+    """Either everything ticked (default view) or a random subset in click order."""
+    if rng.random() < 0.3:
+        return list(options)
+    selection = rng.sample(options, rng.randint(1, len(options)))
+    rng.shuffle(selection)
+    return selection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure query cache hit rates on a replayed filter session.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--raw-selections", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+
+    # Measure the per-section SQL path, not the availability cube or the disk cache
+    config.AVAILABILITY_CUBE_ENABLED = False
+    config.RESULT_CACHE_ENABLED = False
+
+    from database import bigquery_client as bq
+    from database.local_replica import LocalReplicaClient
+    from database.query_builder import canonical_values
+    from database.query_runner import get_query_stats, reset_query_stats
+
+    client = LocalReplicaClient(args.replica_dir)
+    surveys = config.TABLES["surveys"]
+    repivot = config.TABLES["repeat_repivot"]
+    surveys_repeat = config.TABLES["surveys_repeat"]
+
+    periods = canonical_values(bq.get_data_collection_periods(client, surveys)["data_collection_period"].tolist())[:2]
+    regions = _distinct_values(client, surveys, "region")
+    sectors = _distinct_values(client, surveys, "sector")
+    global_filters = {"data_collection_period": periods, "country": None, "region": None}
+
+    functions = [
+        bq.get_insulin_availability_metrics,
+        bq.get_insulin_by_sector_chart_data,
+        bq.get_insulin_by_inn_chart_data,
+        bq.get_price_by_inn,
+    ]
+    for function in functions:
+        function.clear()
+    reset_query_stats()
+
+    rng = random.Random(args.seed)
+    calls = 0
+    for _ in range(args.steps):
+        local_regions = _random_selection(rng, regions)
+        local_sectors = _random_selection(rng, sectors)
+        if not args.raw_selections:
+            local_regions = canonical_values(local_regions)
+            local_sectors = canonical_values(local_sectors)
+
+        bq.get_insulin_availability_metrics(client, surveys, global_filters, local_regions, local_sectors)
+        bq.get_insulin_by_sector_chart_data(client, surveys, global_filters, local_regions)
+        bq.get_insulin_by_inn_chart_data(client, repivot, global_filters, local_regions, local_sectors)
+        price_filters = {
+            "data_collection_period": periods,
+            "country": None,
+            "region": local_regions if local_regions else None,
+            "sector": local_sectors if local_sectors else None,
+        }
+        bq.get_price_by_inn(client, surveys_repeat, price_filters)
+        calls += len(functions)
+
+    stats = get_query_stats()
+    executions = stats["executions"]
+    print(f"Function calls:              {calls}")
+    print(f"Query executions:            {executions}")
+    print(f"st.cache_data hit rate:      {(calls - executions) / calls:.1%}")
+    print(f"Distinct SQL + parameters:   {stats['distinct_queries']}")
+    if executions:
+        print(f"BigQuery result cache hits:  {stats['repeated_executions'] / executions:.1%} of executions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Compare latency and bytes of the fast and exact statistics modes on the price functions.
+
+Runs every Price tab median function (database/statistics_mode.py) against the
+local replica, never BigQuery, once per mode:
+
+    cold    all caches cleared, default view (no local Region/Sector filter)
+    narrow  a series of random local Region/Sector selections on the warm cache
+
+and reports wall time, queries executed, the bytes BigQuery would bill for
+them (on-demand pricing scans every referenced column of the table in full,
+estimated from the replica's Parquet column sizes) and the bytes downloaded
+as results. Each query can get a fixed added latency to stand in for the
+BigQuery round trip, which the local replica does not have.
+
+Usage:
+    python -m benchmarks.statistics_modes --replica-dir data/replica [--latency 0.5] [--selections 20]
+"""
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+import warnings
+
+import pyarrow.parquet as pq
+
+import config
+
+
+FUNCTIONS = [
+    "get_median_price_by_type",
+    "get_median_price_by_type_levelcare",
+    "get_price_by_inn",
+    "get_price_by_brand_human",
+    "get_price_by_brand_analogue",
+    "get_median_price_by_presentation",
+    "get_median_price_by_originator_human",
+    "get_median_price_by_originator_analogue",
+]
+
+
+class _MeasuringClient:
+    """Wraps a LocalReplicaClient, adds latency and tallies billed and downloaded bytes."""
+
+    def __init__(self, client, latency):
+        self._client = client
+        self._latency = latency
+        self.project = client.project
+        self._column_bytes = {}
+        for table_name, path in client._tables.items():
+            metadata = pq.ParquetFile(path).metadata
+            sizes = {}
+            for group in range(metadata.num_row_groups):
+                row_group = metadata.row_group(group)
+                for index in range(row_group.num_columns):
+                    column = row_group.column(index)
+                    sizes[column.path_in_schema] = sizes.get(column.path_in_schema, 0) + column.total_uncompressed_size
+            self._column_bytes[table_name] = sizes
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.billed_bytes = 0
+        self.result_bytes = 0
+
+    def _billed(self, query):
+        billed = 0
+        for table_name in re.findall(r"`[\w-]+\.[\w-]+\.(\w+)`", query):
+            for column, size in self._column_bytes.get(table_name, {}).items():
+                if re.search(rf"\b{re.escape(column)}\b", query):
+                    billed += size
+        return billed
+
+    def query(self, query, job_config=None, **kwargs):
+        time.sleep(self._latency)
+        job = self._client.query(query, job_config=job_config, **kwargs)
+        self.queries += 1
+        self.billed_bytes += self._billed(query)
+        self.result_bytes += job.to_arrow().nbytes
+        return job
+
+    def get_table(self, table_ref):
+        return self._client.get_table(table_ref)
+
+
+def _run(bq, client, filters_list, mode):
+    started = time.perf_counter()
+    for filters in filters_list:
+        filters = dict(filters, statistics_mode=mode)
+        for name in FUNCTIONS:
+            getattr(bq, name)(client, config.TABLES["surveys_repeat"], filters)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fast and exact median statistics on the price functions.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every query")
+    parser.add_argument("--selections", type=int, default=20, help="Random local Region/Sector selections")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    # Every cold run must really be cold
+    config.RESULT_CACHE_ENABLED = False
+
+    import streamlit as st
+    from database import bigquery_client as bq
+    from database.local_replica import LocalReplicaClient
+    from database.query_builder import canonical_values
+
+    client = _MeasuringClient(LocalReplicaClient(args.replica_dir), args.latency)
+    surveys_repeat = config.TABLES["surveys_repeat"]
+    periods = canonical_values(bq.get_data_collection_periods(client, config.TABLES["surveys"])["data_collection_period"].tolist())
+
+    def distinct(column):
+        df = client.query(
+            f"SELECT DISTINCT {column} FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{surveys_repeat}` "
+            f"WHERE {column} IS NOT NULL"
+        ).to_dataframe()
+        return sorted(df[column].tolist())
+
+    regions, sectors = distinct("region"), distinct("sector")
+    rng = random.Random(args.seed)
+    default_view = {'data_collection_period': periods, 'country': None, 'region': None, 'sector': None}
+    narrowed = [
+        dict(
+            default_view,
+            region=sorted(rng.sample(regions, rng.randint(1, len(regions)))),
+            sector=sorted(rng.sample(sectors, rng.randint(1, len(sectors)))) if rng.random() < 0.5 else None,
+        )
+        for _ in range(args.selections)
+    ]
+
+    print(f"{'mode':<6} {'phase':<7} {'seconds':>8} {'queries':>8} {'billed MB':>10} {'result KB':>10}")
+    for mode in ("fast", "exact"):
+        st.cache_data.clear()
+        for phase, filters_list in (("cold", [default_view]), ("narrow", narrowed)):
+            client.reset()
+            seconds = _run(bq, client, filters_list, mode)
+            print(
+                f"{mode:<6} {phase:<7} {seconds:>8.2f} {client.queries:>8} "
+                f"{client.billed_bytes / 1024 ** 2:>10.2f} {client.result_bytes / 1024:>10.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Count the query work of each interaction with the dashboard.
+
+Drives app.py with Streamlit's AppTest against the local replica, never
+BigQuery, through a fixed sequence of interactions (select a period, untick
+checkboxes, switch views), and reports per interaction
+
+    calls       query function calls the script made (st.cache_data lookups,
+                hits included): how much section code ran
+    outside     calls made outside the section whose checkbox was ticked
+                (section interactions only)
+    executions  queries sent to the replica (cache misses)
+    seconds     script run time
+
+AppTest always reruns the whole script. A widget inside an st.fragment is
+rerun the way the browser does instead: as a rerun of its fragment only.
+Calls are attributed to the section (components/sections.py) whose runtime
+made them, and a section interaction fails the run if any call came from
+outside its section.
+
+Each step's widgets must be on the page when it runs; steps of a view that is
+not shown are skipped.
+
+tests/test_section_isolation.py asserts the isolation itself with the same
+fragment reruns; this script measures their query work.
+
+Usage:
+    python -m benchmarks.view_reruns --replica-dir data/replica [--app-file app.py]
+"""
+import argparse
+import dataclasses
+import logging
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+
+import config
+
+
+def _caller(sections_file):
+    """Name of the section running a query function call ("page" for code outside the sections)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_filename == sections_file and frame.f_code.co_name == "run_section":
+            return frame.f_locals["name"]
+        frame = frame.f_back
+    return "page"
+
+
+def _count_calls(calls, sections_file):
+    """Wrap cached_query so every decorated query function counts its calls per caller."""
+    import functools
+
+    from database import freshness
+
+    cached_query = freshness.cached_query
+
+    def counting_cached_query(function=None, **cache_kwargs):
+        if function is None:
+            return functools.partial(counting_cached_query, **cache_kwargs)
+        cached = cached_query(function, **cache_kwargs)
+
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            calls[(_caller(sections_file), function.__name__)] += 1
+            return cached(*args, **kwargs)
+        call.clear = cached.clear
+        return call
+
+    freshness.cached_query = counting_cached_query
+
+
+def _run_fragments_like_the_browser(widget_fragments, fragment_queue):
+    """
+    Patch AppTest's script runner to record the fragment of every widget, and
+    to run the fragments in fragment_queue instead of the whole script.
+    """
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    run, request_rerun = LocalScriptRunner.run, LocalScriptRunner.request_rerun
+
+    def fragment_request_rerun(self, rerun_data):
+        if fragment_queue:
+            # Drop the full rerun every new runner starts with, which would absorb this one
+            self._requests = ScriptRequests()
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=list(fragment_queue))
+        return request_rerun(self, rerun_data)
+
+    def recording_run(self, *args, **kwargs):
+        tree = run(self, *args, **kwargs)
+        for msg in self.forward_msgs():
+            if not (msg.HasField("delta") and msg.delta.HasField("new_element") and msg.delta.fragment_id):
+                continue
+            element = msg.delta.new_element
+            widget_id = getattr(getattr(element, element.WhichOneof("type")), "id", "")
+            # Widget ids with a user key end in "-<key>"
+            parts = widget_id.split("-", 2)
+            if len(parts) == 3 and parts[2]:
+                widget_fragments[parts[2]] = msg.delta.fragment_id
+        return tree
+
+    LocalScriptRunner.request_rerun = fragment_request_rerun
+    LocalScriptRunner.run = recording_run
+
+
+def _checkbox(at, prefix):
+    return next((checkbox for checkbox in at.checkbox if checkbox.key and checkbox.key.startswith(prefix)), None)
+
+
+def _select_first_period(key):
+    def step(at):
+        periods = at.multiselect(key=key)
+        periods.set_value([periods.options[0]])
+    return step
+
+
+def _untick(prefix):
+    def step(at):
+        checkbox = _checkbox(at, prefix)
+        checkbox.uncheck()
+        return checkbox.key
+    return step
+
+
+def _switch_view(view):
+    def step(at):
+        at.radio(key="active_view").set_value(view)
+    return step
+
+
+def _has_key(key):
+    return lambda at: key in at.session_state
+
+
+def _has_checkbox(prefix):
+    return lambda at: _checkbox(at, prefix) is not None
+
+
+# (label, precondition, interaction, section of the interaction's widget or None)
+INTERACTIONS = [
+    ("availability: select a period", _has_key("availability_period_filter"),
+     _select_first_period("availability_period_filter"), None),
+    ("availability: untick a global region", _has_checkbox("global_region_"), _untick("global_region_"), None),
+    ("switch to price", _has_key("active_view"), _switch_view("price"), None),
+    ("price: select a period", _has_key("price_period_filter"), _select_first_period("price_period_filter"), None),
+    ("price: untick a section region", _has_checkbox("price_region_"), _untick("price_region_"),
+     "price_overview"),
+    ("price: untick a By INN region", _has_checkbox("price_inn_region_"), _untick("price_inn_region_"),
+     "price_by_inn"),
+    ("switch to availability", _has_key("active_view"), _switch_view("availability"), None),
+    ("availability: untick a section region", _has_checkbox("insulin_region_"), _untick("insulin_region_"),
+     "insulin_overall"),
+    ("availability: untick a By Type region", _has_checkbox("insulin_by_type_region_"),
+     _untick("insulin_by_type_region_"), "insulin_by_type"),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count query work per dashboard interaction.")
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    parser.add_argument("--app-file", default="app.py")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed per script run")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    # Never BigQuery; every query is counted as it runs (no background warm-up)
+    config.LOCAL_REPLICA_ENABLED = True
+    config.LOCAL_REPLICA_DIR = args.replica_dir
+    config.WARMUP_ON_STARTUP = False
+    config.RESULT_CACHE_ENABLED = False
+
+    # Before the app imports the query functions
+    app_file = os.path.abspath(args.app_file)
+    calls = Counter()
+    _count_calls(calls, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "components", "sections.py")))
+
+    widget_fragments, fragment_queue = {}, []
+    _run_fragments_like_the_browser(widget_fragments, fragment_queue)
+
+    from streamlit.testing.v1 import AppTest
+
+    from database.query_runner import get_query_stats
+
+    at = AppTest.from_file(app_file, default_timeout=args.timeout)
+
+    def run(label, interaction, section):
+        calls.clear()
+        executions = get_query_stats()["executions"]
+        started = time.perf_counter()
+        widget_key = interaction(at) if interaction is not None else None
+        fragment_id = widget_fragments.get(widget_key)
+        if fragment_id:
+            fragment_queue.append(fragment_id)
+        page = at._tree
+        try:
+            at.run()
+        finally:
+            fragment_queue.clear()
+        seconds = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{label}: {at.exception[0].value}")
+
+        outside = sum(count for (caller, _), count in calls.items() if caller != section) if section else None
+        print(
+            f"{label:<40} {sum(calls.values()):>6} {'' if outside is None else outside:>8} "
+            f"{get_query_stats()['executions'] - executions:>11} {seconds:>8.2f}"
+            f"{'  (fragment rerun)' if fragment_id else ''}",
+            flush=True
+        )
+        if fragment_id:
+            # The fragment rerun only rendered the fragment: bring the rest of the
+            # page back, with every widget's state as the browser would send it
+            page.run()
+        return sum(calls.values()), outside or 0
+
+    print(f"{'interaction':<40} {'calls':>6} {'outside':>8} {'executions':>11} {'seconds':>8}")
+    total, total_outside = run("initial load", None, None)
+    for label, precondition, interaction, section in INTERACTIONS:
+        if not precondition(at):
+            print(f"{label:<40} {'(skipped)':>6}")
+            continue
+        step_calls, step_outside = run(label, interaction, section)
+        total += step_calls
+        total_outside += step_outside
+    print(f"Total query function calls: {total}")
+    print(f"Calls outside the section of a section interaction: {total_outside}")
+    return 1 if total_outside else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Diagnostics Panel
+Admin-only reports on the survey tables and the query layer, computed on demand
+
+Shown only with config.DIAGNOSTICS_ENABLED. Opening the page scans no table:
+
+    Tables      row counts, sizes and modification times from table metadata
+                (get_table(), no query), cached for FRESHNESS_POLL_INTERVAL
+    Queries     the query runner's counters and the section and page timings
+                of this session, all held in memory
+    Reports     country survey records and the level of care distribution.
+                Each runs only when its button is pressed, as a cached query
+                function on a background thread; the panel shows it once done
+                (Refresh). Only running calls are kept: each later request
+                calls the cached function again, so results are shared by
+                every admin session until a table they read changes
+                (database/freshness.py).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+import config
+from database.bigquery_client import (
+    debug_level_of_care_values,
+    get_country_survey_records,
+    get_country_survey_summary,
+)
+from database.query_builder import cutoff_date
+from database.query_runner import get_query_stats
+
+
+# Reports are rare: one background query at a time, shared by all sessions
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diagnostics")
+# Calls still running (or finished and not yet read), by function and arguments
+_reports = {}
+_reports_lock = threading.Lock()
+# Seconds a rerun waits for a report before showing it as running
+_REPORT_WAIT = 0.5
+
+
+@st.cache_data(ttl=config.FRESHNESS_POLL_INTERVAL, show_spinner=False)
+def _table_metadata(_client):
+    rows = []
+    for name, table_name in config.TABLES.items():
+        table_ref = f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}"
+        try:
+            table = _client.get_table(table_ref)
+        except Exception as e:
+            print(f"⚠ Could not read metadata of {table_name}: {str(e)}", flush=True)
+            continue
+        rows.append({
+            "name": name,
+            "table": table_name,
+            "rows": table.num_rows,
+            "size_mb": round((table.num_bytes or 0) / 1024 ** 2, 1),
+            "modified": table.modified.isoformat() if table.modified else None
+        })
+    return pd.DataFrame(rows)
+
+
+def _report(function, client, *args):
+    """
+    Run a report query function call on the background thread.
+
+    A call is kept only while it runs: once its result has been read it is
+    dropped, so the next request calls the cached function again (a cache
+    hit until a table it reads changes). Waits briefly, so cache hits are
+    shown at once.
+
+    Args:
+        function: Cached query function
+        client: BigQuery client
+        *args: The function's arguments after the client
+
+    Returns:
+        tuple: (done, result); raises the call's exception once done
+    """
+    key = f"{function.__name__}:{args!r}"
+    with _reports_lock:
+        future = _reports.get(key)
+        if future is None:
+            # Finished calls whose result nobody came back for
+            for stale_key in [stale_key for stale_key, stale in _reports.items() if stale.done()]:
+                del _reports[stale_key]
+            future = _reports[key] = _executor.submit(function, client, *args)
+
+    wait([future], timeout=_REPORT_WAIT)
+    if not future.done():
+        return False, None
+    with _reports_lock:
+        if _reports.get(key) is future:
+            del _reports[key]
+    return True, future.result()
+
+
+def _report_result(label, key, function, client, *args):
+    """
+    Run button, background progress or result of a report.
+
+    Args:
+        label (str): Report name shown on its button
+        key (str): Widget key prefix of the report
+        function: Cached query function
+        client: BigQuery client
+        *args: The function's arguments after the client
+
+    Returns:
+        The function's result, or None while not requested or still running
+    """
+    requested = st.session_state.setdefault("diagnostics_requested", set())
+    if key not in requested:
+        if not st.button(f"Run {label}", key=f"diagnostics_run_{key}"):
+            return None
+        requested.add(key)
+
+    try:
+        done, result = _report(function, client, *args)
+    except Exception as e:
+        # Not kept: the next request runs the report again
+        st.error(f"{label} failed: {str(e)}")
+        return None
+    if not done:
+        st.info(f"⏳ {label} is running in the background.")
+        st.button("Refresh", key=f"diagnostics_refresh_{key}")
+        return None
+    return result
+
+
+def _render_tables(client):
+    st.markdown("**Tables**")
+    metadata_df = _table_metadata(client)
+    if metadata_df is not None and not metadata_df.empty:
+        st.dataframe(
+            metadata_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "name": "Name",
+                "table": "Table",
+                "rows": st.column_config.NumberColumn("Rows", format="%d"),
+                "size_mb": "Size (MB)",
+                "modified": "Last Modified"
+            }
+        )
+    else:
+        st.info("No table metadata available")
+
+
+def _render_queries():
+    st.markdown("**Queries**")
+    query_stats = get_query_stats()
+    st.caption(
+        f"**Queries executed:** {query_stats['executions']:,} | "
+        f"**BigQuery cache hits:** {query_stats['bigquery_cache_hits']:,} "
+        f"({query_stats['bigquery_cache_hit_rate']:.0%}) | "
+        f"**Not cache eligible:** {query_stats['cache_ineligible_executions']:,} | "
+        f"**Disk cache hits:** {query_stats['disk_cache_hits']:,}"
+    )
+
+    page_timings = st.session_state.get("page_timings", {})
+    for view, timings in page_timings.items():
+        st.caption(
+            f"**{view.capitalize()} page:** first content {timings['first_content']:.2f}s | "
+            f"full page {timings['full_page']:.2f}s"
+        )
+
+    section_timings = st.session_state.get("section_timings", {})
+    if section_timings:
+        timings_df = pd.DataFrame(
+            sorted(section_timings.items(), key=lambda item: item[1], reverse=True),
+            columns=["Section", "Seconds"]
+        )
+        st.dataframe(timings_df, use_container_width=True, hide_index=True,
+                     column_config={"Seconds": st.column_config.NumberColumn("Seconds", format="%.3f")})
+
+
+def _render_country_records(client):
+    st.markdown("**Debug Information: All survey records grouped by country**")
+    cutoff = cutoff_date()
+    summary_df = _report_result("country survey report", "country_summary",
+                                get_country_survey_summary, client, config.TABLES["surveys"], cutoff)
+    if summary_df is None:
+        return
+    if summary_df.empty:
+        st.info("No debug data available")
+        return
+
+    st.dataframe(
+        summary_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "country": "Country",
+            "total_surveys": "Total Surveys",
+            "surveys_before_today": "Surveys < Today",
+            "surveys_today_or_future": "Surveys >= Today",
+            "first_survey_date": "First Survey",
+            "last_survey_date": "Last Survey",
+            "surveys_in_2025_plus": "2025+ Surveys"
+        }
+    )
+    st.caption(f"**Total countries:** {len(summary_df)} | **Today's date:** {cutoff}")
+
+    # Individual records of a country, fetched once one is selected
+    st.markdown("---")
+    st.markdown("**📋 View Individual Survey Records for a Country:**")
+
+    selected_country = st.selectbox(
+        "Select a country to view all surveys:",
+        options=[""] + summary_df['country'].tolist(),
+        format_func=lambda x: "Select a country..." if x == "" else x,
+        key="diagnostics_country"
+    )
+    if not selected_country:
+        return
+
+    st.markdown(f"### Distinct Survey Records for: **{selected_country}**")
+    try:
+        done, detail_df = _report(get_country_survey_records, client, config.TABLES["surveys"], cutoff, selected_country)
+    except Exception as e:
+        st.error(f"Debug query error: {str(e)}")
+        return
+    if not done:
+        st.info(f"⏳ Loading the survey records of {selected_country} in the background.")
+        st.button("Refresh", key="diagnostics_refresh_country_records")
+        return
+
+    if detail_df.empty:
+        st.info(f"No survey records found for {selected_country}")
+        return
+
+    st.dataframe(
+        detail_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "form_case__case_id": "Survey ID",
+            "survey_date": "Survey Date",
+            "region": "Region",
+            "sector": "Sector",
+            "level_of_care": "Level of Care",
+            "data_collection_period": "Period",
+            "survey_year": "Year",
+            "date_status": "Date Status"
+        }
+    )
+
+    # Summary stats for selected country
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Records", len(detail_df))
+    with col2:
+        valid_count = len(detail_df[detail_df['date_status'] == 'Valid (< Today)'])
+        st.metric("Valid Records", valid_count)
+    with col3:
+        invalid_count = len(detail_df[detail_df['date_status'] == 'Invalid (>= Today)'])
+        st.metric("Invalid Records", invalid_count, delta=f"-{invalid_count}" if invalid_count > 0 else None, delta_color="inverse")
+    with col4:
+        future_years = detail_df[detail_df['survey_year'] >= 2025]
+        st.metric("2025+ Records", len(future_years))
+
+
+def _render_level_of_care(client):
+    st.markdown("**Level of care values (Availability Data Selectors)**")
+    periods = st.session_state.get("selected_periods")
+    if not periods:
+        st.caption("Select one or more data collection periods to run this report.")
+        return
+
+    countries = st.session_state.get("selected_countries")
+    regions = st.session_state.get("selected_regions")
+    filters = {
+        'data_collection_period': periods,
+        'country': countries if countries else None,
+        'region': regions if regions else None
+    }
+    levels_df = _report_result("level of care report", "level_of_care",
+                               debug_level_of_care_values, client, config.TABLES["surveys_repeat"], filters)
+    if levels_df is None:
+        return
+    if levels_df.empty:
+        st.info("No level of care data available for the selected filters")
+        return
+    st.dataframe(levels_df, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def render_diagnostics(client):
+    """
+    Render the admin diagnostics panel (app.py calls it only with config.DIAGNOSTICS_ENABLED).
+
+    A fragment: its buttons rerun the panel only, never the dashboard.
+
+    Args:
+        client: BigQuery client
+    """
+    with st.expander("🔍 Diagnostics", expanded=False):
+        _render_tables(client)
+        _render_queries()
+        st.markdown("---")
+        _render_country_records(client)
+        st.markdown("---")
+        _render_level_of_care(client)
@@ -0,0 +1,1381 @@
+"""
+Dashboard Sections
+Declarative registry of the Availability and Price Analysis sections, and the
+runtime that renders them
+
+Every section below the Data Selectors follows the same pattern: a header,
+local Region/Sector checkbox filters, the section's query functions and the
+charts built from their results, or a fallback when there is no data. Each
+section is declared once in SECTIONS:
+
+    view          "availability" or "price"
+    header        Markdown shown above the section
+    tip           Shown instead of the section while no data collection period
+                  is selected (None: the section is not shown at all)
+    requires_periods
+                  Only shown with a data collection period selected
+    options_table Table (key of config.TABLES) of the Region/Sector options
+    dimensions    Local checkbox filters, in order: column ('region' or
+                  'sector'), options query function, checkbox key prefix and
+                  whether the options depend on the local Region selection
+    data_table    Table (key of config.TABLES) the data functions read
+    data          Query functions, called with the section's filters
+    spinner       Shown while the data functions run
+    render        Called with the data functions' results; draws the charts
+    priority      Fill order in progressive rendering (lower first, then page order)
+
+run_section() executes a spec inside its own st.fragment, so a checkbox only
+reruns its section, and records how long each section took in
+st.session_state.section_timings. render_page() renders a view: with
+config.PROGRESSIVE_RENDERING it first lays out a placeholder for every page
+block and section, then fills them highest priority first. The prefetch
+(database/prefetch.py) submits the same option and data calls from
+section_option_call / section_data_calls, so the rendering calls are cache hits. Charts are built by the figure builders
+below, which keep their figures for identical data (cached_figure).
+"""
+
+import functools
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import config
+from database.bigquery_client import (
+    get_insulin_regions,
+    get_insulin_sectors,
+    get_insulin_availability_metrics,
+    get_insulin_by_sector_regions,
+    get_insulin_by_sector_chart_data,
+    get_insulin_by_type_regions,
+    get_insulin_by_type_sectors,
+    get_insulin_by_type_human_chart_data,
+    get_insulin_by_type_analogue_chart_data,
+    get_insulin_by_region_sectors,
+    get_insulin_by_region_human_chart_data,
+    get_insulin_by_region_analogue_chart_data,
+    get_insulin_public_levelcare_regions,
+    get_insulin_public_levelcare_human_chart_data,
+    get_insulin_public_levelcare_analogue_chart_data,
+    get_insulin_by_inn_regions,
+    get_insulin_by_inn_sectors,
+    get_insulin_by_inn_chart_data,
+    get_insulin_top_brands_sectors,
+    get_insulin_top_brands_chart_data,
+    get_insulin_by_presentation_regions,
+    get_insulin_by_presentation_sectors,
+    get_insulin_by_presentation_chart_data,
+    get_insulin_originator_biosimilar_regions,
+    get_insulin_originator_biosimilar_sectors,
+    get_insulin_human_originator_metric,
+    get_insulin_human_biosimilar_metric,
+    get_insulin_analogue_originator_metric,
+    get_insulin_analogue_biosimilar_metric,
+    get_comparator_medicine_regions,
+    get_comparator_medicine_sectors,
+    get_comparator_medicine_table_data,
+    get_price_regions,
+    get_price_sectors,
+    get_median_price_by_type,
+    get_median_price_by_type_levelcare,
+    get_price_by_inn,
+    get_price_by_brand_human,
+    get_price_by_brand_analogue,
+    get_median_price_by_presentation,
+    get_median_price_by_originator_human,
+    get_median_price_by_originator_analogue,
+    get_free_insulin_regions,
+    get_free_insulin_sectors,
+    get_facilities_providing_free,
+    get_reasons_insulin_free,
+    get_facilities_not_full_price,
+    get_reasons_not_full_price,
+)
+from database.query_builder import canonical_values
+from database.statistics_mode import statistics_caption, statistics_mode
+
+
+# Session state keys of each view's Data Selectors
+PERIODS_KEYS = {"availability": "selected_periods", "price": "selected_periods_price"}
+COUNTRIES_KEYS = {"availability": "selected_countries", "price": "selected_countries_price"}
+
+DIMENSION_LABELS = {"region": "Region", "sector": "Sector"}
+
+ROWS_PER_PAGE = 10
+
+
+# ====================================
+# Figure builders
+# ====================================
+
+def cached_figure(builder):
+    """
+    Keep the figures a builder made, per identical arguments (data included).
+
+    The figure of an unchanged query result is reused across reruns and
+    sessions instead of being rebuilt (config.FIGURE_CACHE_ENABLED). Plotly
+    figures are not modified by st.plotly_chart, so they can be shared.
+    """
+    cached = st.cache_resource(show_spinner=False, max_entries=config.FIGURE_CACHE_MAX_ENTRIES)(builder)
+
+    @functools.wraps(builder)
+    def build(*args, **kwargs):
+        if config.FIGURE_CACHE_ENABLED:
+            return cached(*args, **kwargs)
+        return builder(*args, **kwargs)
+    return build
+
+
+@cached_figure
+def availability_bar_figure(chart_df, x_column, x_title, color='#1f77b4',
+                            y_title='Facilities with Availability (%)',
+                            hover_label='Available Facilities', rotate_labels_above=3):
+    """
+    Bar chart of facilities with availability (%) per category.
+
+    Args:
+        chart_df: Result with availability_percentage, total_facilities and facilities_with_insulin
+        x_column (str): Category column
+        x_title (str): X axis title
+        color (str): Bar color
+        y_title (str): Y axis title
+        hover_label (str): Hover label of the available facilities count
+        rotate_labels_above (int): Angle the X axis labels beyond this many bars
+
+    Returns:
+        go.Figure
+    """
+    # Ensure data types are correct
+    chart_df['availability_percentage'] = pd.to_numeric(chart_df['availability_percentage'], errors='coerce')
+    chart_df['total_facilities'] = pd.to_numeric(chart_df['total_facilities'], errors='coerce')
+    chart_df['facilities_with_insulin'] = pd.to_numeric(chart_df['facilities_with_insulin'], errors='coerce')
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=chart_df[x_column].tolist(),
+        y=chart_df['availability_percentage'].tolist(),
+        text=[f'{val:.1f}%' for val in chart_df['availability_percentage'].tolist()],
+        textposition='outside',
+        marker_color=color,
+        hovertemplate='<b>%{x}</b><br>' +
+                      'Availability: %{y:.1f}%<br>' +
+                      f'{hover_label}: %{{customdata[0]:,}}<br>' +
+                      'Total Facilities: %{customdata[1]:,}<extra></extra>',
+        customdata=chart_df[['facilities_with_insulin', 'total_facilities']].values
+    ))
+
+    fig.update_layout(
+        title='Facilities with Availability (%)',
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=450,
+        yaxis=dict(
+            range=[0, 110],  # Slightly higher to accommodate text labels
+            ticksuffix='%'
+        ),
+        xaxis_tickangle=-45 if len(chart_df) > rotate_labels_above else 0,
+        showlegend=False,
+        margin=dict(t=50, b=100, l=50, r=50)
+    )
+    return fig
+
+
+@cached_figure
+def top_brands_figure(chart_df):
+    """Donut chart of the top 10 insulin brands by % of all stock."""
+    # Ensure data types are correct
+    chart_df['record_count'] = pd.to_numeric(chart_df['record_count'], errors='coerce')
+    chart_df['percentage'] = pd.to_numeric(chart_df['percentage'], errors='coerce')
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Pie(
+        labels=chart_df['insulin_brand'].tolist(),
+        values=chart_df['record_count'].tolist(),
+        hole=0.4,  # Donut style
+        textposition='auto',
+        textinfo='percent',
+        hovertemplate='<b>%{label}</b><br>' +
+                      'Record Count: %{value:,}<br>' +
+                      'Percentage: %{percent}<extra></extra>',
+        marker=dict(
+            line=dict(color='white', width=2)
+        )
+    ))
+
+    fig.update_layout(
+        title='Top 10 Insulin Brands by % of all stock',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.05
+        ),
+        margin=dict(t=50, b=50, l=50, r=150)
+    )
+    return fig
+
+
+# Color mapping for insulin types
+INSULIN_TYPE_COLORS = {
+    'Intermediate-Acting Human': '#1f5c5c',  # Teal/Dark Blue
+    'Short-Acting Human': '#5dade2',  # Light Blue/Cyan
+    'Mixed Human': '#9b59b6',  # Purple
+    'Long-Acting Analogue': '#dda0dd',  # Light Pink/Lavender
+    'Rapid-Acting Analogue': '#800000',  # Maroon/Dark Red
+    'Mixed Analogue': '#ff69b4',  # Pink
+    'Intermediate-Acting Animal': '#4b0082'  # Dark Purple/Indigo
+}
+
+
+@cached_figure
+def presentation_availability_figure(chart_df):
+    """Clustered bar chart of availability (%) per presentation, one bar per insulin type."""
+    # Ensure data types are correct
+    chart_df['availability_percentage'] = pd.to_numeric(chart_df['availability_percentage'], errors='coerce')
+    chart_df['total_facilities'] = pd.to_numeric(chart_df['total_facilities'], errors='coerce')
+    chart_df['facilities_with_insulin'] = pd.to_numeric(chart_df['facilities_with_insulin'], errors='coerce')
+
+    fig = go.Figure()
+
+    # Add trace for each insulin type (in order of appearance, for the legend)
+    for insulin_type in chart_df['insulin_type'].unique():
+        type_data = chart_df[chart_df['insulin_type'] == insulin_type]
+
+        fig.add_trace(go.Bar(
+            x=type_data['insulin_presentation'].tolist(),
+            y=type_data['availability_percentage'].tolist(),
+            name=insulin_type,
+            text=[f'{val:.1f}%' for val in type_data['availability_percentage'].tolist()],
+            textposition='outside',
+            marker_color=INSULIN_TYPE_COLORS.get(insulin_type, '#808080'),  # Default gray if type not in mapping
+            hovertemplate='<b>%{x}</b><br>' +
+                          f'<b>{insulin_type}</b><br>' +
+                          'Availability: %{y:.1f}%<br>' +
+                          'Available Facilities: %{customdata[0]:,}<br>' +
+                          'Total Facilities: %{customdata[1]:,}<extra></extra>',
+            customdata=type_data[['facilities_with_insulin', 'total_facilities']].values
+        ))
+
+    fig.update_layout(
+        title='Facilities with Availability (%)',
+        xaxis_title='Presentation',
+        yaxis_title='Facilities with Availability (%)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        barmode='group',  # Clustered bars
+        yaxis=dict(
+            range=[0, 110],
+            ticksuffix='%'
+        ),
+        xaxis_tickangle=-45,
+        showlegend=True,
+        legend=dict(
+            title='Insulin Type',
+            orientation='v',
+            yanchor='top',
+            y=1,
+            xanchor='left',
+            x=1.02
+        ),
+        margin=dict(t=50, b=100, l=50, r=150)  # Extra right margin for legend
+    )
+    return fig
+
+
+# Legend above the price charts
+PRICE_LEGEND = dict(
+    orientation="h",
+    yanchor="bottom",
+    y=1.02,
+    xanchor="right",
+    x=1
+)
+
+
+@cached_figure
+def median_price_by_type_figure(chart_df):
+    """Bar chart of the median price per insulin type."""
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=chart_df['insulin_type'].tolist(),
+        y=chart_df['median_price_local'].tolist(),
+        name='Median Price - Local',
+        marker_color='#17becf',
+        text=[f'{val:,.0f}' for val in chart_df['median_price_local'].tolist()],
+        textposition='outside',
+        hovertemplate='<b>%{x}</b><br>' +
+                      'Median Price: %{y:,.2f}<br>' +
+                      'Products: %{customdata}<extra></extra>',
+        customdata=chart_df['product_count'].tolist()
+    ))
+
+    # Add 15% padding above the highest bar for its text label
+    y_axis_max = chart_df['median_price_local'].max() * 1.15
+
+    fig.update_layout(
+        title='Median Price by Insulin Type',
+        xaxis_title='Insulin Type',
+        yaxis_title='Median Price - Local',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        yaxis=dict(
+            range=[0, y_axis_max],
+            tickformat=',.0f'
+        ),
+        xaxis_tickangle=-45,
+        showlegend=True,
+        legend=PRICE_LEGEND,
+        margin=dict(t=80, b=120, l=60, r=40)
+    )
+    return fig
+
+
+# Bar colors per level of care
+LEVEL_OF_CARE_COLORS = {
+    'Primary': '#2ca02c',
+    'Secondary': '#1f77b4',
+    'Tertiary': '#ff7f0e'
+}
+
+
+@cached_figure
+def median_price_by_levelcare_figure(chart_df):
+    """Grouped bar chart of the median price per insulin type, one bar per level of care."""
+    fig = go.Figure()
+
+    # Add bar traces dynamically for each level of care in the data
+    for level in sorted(chart_df['level_of_care'].unique()):
+        level_df = chart_df[chart_df['level_of_care'] == level]
+
+        if not level_df.empty:
+            fig.add_trace(go.Bar(
+                x=level_df['insulin_type'].tolist(),
+                y=level_df['median_price_local'].tolist(),
+                name=level,
+                marker_color=LEVEL_OF_CARE_COLORS.get(level, '#d62728'),
+                text=[f'{val:,.0f}' for val in level_df['median_price_local'].tolist()],
+                textposition='outside',
+                hovertemplate='<b>%{x}</b><br>' +
+                              f'Level: {level}<br>' +
+                              'Median Price: %{y:,.2f}<br>' +
+                              'Products: %{customdata}<extra></extra>',
+                customdata=level_df['product_count'].tolist()
+            ))
+
+    # Add 15% padding above the highest bar for its text label
+    y_axis_max = chart_df['median_price_local'].max() * 1.15
+
+    fig.update_layout(
+        title='Median Price by Insulin Type and Level of Care (Public Sector)',
+        xaxis_title='Insulin Type',
+        yaxis_title='Median Price - Local',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        yaxis=dict(
+            range=[0, y_axis_max],
+            tickformat=',.0f'
+        ),
+        xaxis_tickangle=-45,
+        barmode='group',  # Grouped bars side-by-side
+        showlegend=True,
+        legend=PRICE_LEGEND,
+        margin=dict(t=80, b=120, l=60, r=40)
+    )
+    return fig
+
+
+@cached_figure
+def price_by_inn_figure(chart_df):
+    """Dot chart of the min, median and max price per INN category."""
+    fig = go.Figure()
+
+    # Add 15% padding above the highest dot
+    y_axis_max = chart_df['max_price_local'].max() * 1.15
+
+    for column, name, color in (
+        ('min_price_local', 'Min Price-Local', '#2ca02c'),
+        ('median_price_local', 'Median Price-Local', '#1f77b4'),
+        ('max_price_local', 'Max Price-Local', '#d62728'),
+    ):
+        # Only the median dots are labelled
+        labelled = column == 'median_price_local'
+        fig.add_trace(go.Scatter(
+            x=chart_df['insulin_inn'].tolist(),
+            y=chart_df[column].tolist(),
+            name=name,
+            mode='markers+text' if labelled else 'markers',
+            marker=dict(size=10, symbol='circle', color=color),
+            text=[f'{val:,.0f}' for val in chart_df[column].tolist()] if labelled else None,
+            textposition='top center' if labelled else None,
+            hovertemplate='<b>%{x}</b><br>' +
+                          f'{name.split("-")[0]}: %{{y:,.2f}}<br>' +
+                          '<extra></extra>'
+        ))
+
+    fig.update_layout(
+        title='Price by INN Category',
+        xaxis_title='INN Category',
+        yaxis_title='Price - Local',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=500,
+        yaxis=dict(
+            range=[0, y_axis_max],
+            tickformat=',.0f'
+        ),
+        showlegend=True,
+        legend=PRICE_LEGEND,
+        margin=dict(t=80, b=80, l=60, r=40),
+        hovermode='closest'
+    )
+    return fig
+
+
+@cached_figure
+def median_price_bar_figure(chart_df, x_column, x_title, title=None, height=450,
+                            margin=(40, 60, 60, 20), angle_labels=False):
+    """
+    Teal bar chart of the median price per category.
+
+    Args:
+        chart_df: Result with median_price_local
+        x_column (str): Category column
+        x_title (str): X axis title
+        title (str): Chart title (None for no title)
+        height (int): Chart height in pixels
+        margin (tuple): Top, bottom, left and right margins
+        angle_labels (bool): Angle the X axis labels
+
+    Returns:
+        go.Figure
+    """
+    fig = go.Figure()
+
+    # Add 15% padding above the highest bar for its text label
+    y_axis_max = chart_df['median_price_local'].max() * 1.15
+
+    fig.add_trace(go.Bar(
+        x=chart_df[x_column].tolist(),
+        y=chart_df['median_price_local'].tolist(),
+        name='Median Price-Local',
+        marker=dict(
+            color='#17becf',  # Teal color
+            line=dict(color='#0e7c8f', width=1)
+        ),
+        text=[f'{val:,.0f}' for val in chart_df['median_price_local'].tolist()],
+        textposition='outside',
+        textfont=dict(size=11),
+        hovertemplate='<b>%{x}</b><br>' +
+                      'Median Price: %{y:,.2f}<br>' +
+                      '<extra></extra>'
+    ))
+
+    top, bottom, left, right = margin
+    fig.update_layout(
+        xaxis_title=x_title,
+        yaxis_title='Median price - Local',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=height,
+        yaxis=dict(
+            range=[0, y_axis_max],
+            tickformat=',.0f'
+        ),
+        showlegend=True,
+        legend=PRICE_LEGEND,
+        margin=dict(t=top, b=bottom, l=left, r=right),
+        hovermode='closest'
+    )
+    if title:
+        fig.update_layout(title=title)
+    if angle_labels:
+        fig.update_layout(xaxis=dict(tickangle=-45, tickfont=dict(size=11)))
+    return fig
+
+
+@cached_figure
+def reasons_pie_figure(reasons_df, reason_column, palette):
+    """
+    Pie chart of reported products per reason.
+
+    Args:
+        reasons_df: Result with product_count per reason
+        reason_column (str): Reason column
+        palette (str): Name of a plotly.express qualitative color sequence
+
+    Returns:
+        go.Figure
+    """
+    # Ensure product_count is numeric (convert Int64 to int)
+    reasons_df['product_count'] = reasons_df['product_count'].astype(int)
+
+    fig = go.Figure(data=[go.Pie(
+        labels=reasons_df[reason_column].tolist(),
+        values=reasons_df['product_count'].tolist(),
+        textposition='inside',
+        textinfo='percent',
+        hovertemplate='<b>%{label}</b><br>' +
+                      'Percentage: %{percent}<br>' +
+                      'Reported Products(n): %{value:,}<br>' +
+                      '<extra></extra>',
+        marker=dict(colors=getattr(px.colors.qualitative, palette))
+    )])
+
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.05
+        ),
+        height=400,
+        margin=dict(t=20, b=20, l=20, r=120)
+    )
+    return fig
+
+
+# ====================================
+# Section renderers (called with the results of the section's data functions)
+# ====================================
+
+AVAILABILITY_NOTE = """
+    <div class="info-box">
+        <strong>📝 Note:</strong> Only insulins found to be available are shown.
+    </div>
+"""
+
+
+def _render_overall(metrics):
+    if metrics and metrics['total_facilities'] > 0:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.metric(
+                label="Facilities with Availability (n)",
+                value=f"{metrics['facilities_with_availability']:,}",
+                help="Number of facilities with insulin available"
+            )
+
+        with col2:
+            st.metric(
+                label="Facilities with Unavailability (%)",
+                value=f"{metrics['unavailability_percentage']:.1f}%",
+                help="Percentage of facilities without insulin available"
+            )
+    else:
+        st.info("No data available for the selected filters")
+
+
+def _render_by_sector(chart_df):
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(
+            availability_bar_figure(
+                chart_df, 'sector', 'Sector', y_title='Availability (%)',
+                hover_label='Facilities with Insulin', rotate_labels_above=5
+            ),
+            use_container_width=True
+        )
+    else:
+        st.info("No data available for the selected filters")
+
+
+def _render_human_analogue(human_df, analogue_df, x_column, x_title, no_data_suffix=""):
+    # Human and Analogue charts side by side
+    chart_col1, chart_col2 = st.columns(2)
+
+    for column, label, color, chart_df in (
+        (chart_col1, "Human", '#1f77b4', human_df),
+        (chart_col2, "Analogue", '#ff7f0e', analogue_df),
+    ):
+        with column:
+            st.markdown(f"**{label}**")
+            if chart_df is not None and not chart_df.empty:
+                st.plotly_chart(availability_bar_figure(chart_df, x_column, x_title, color=color),
+                                use_container_width=True)
+            else:
+                st.info(f"No data available for {label} insulin types{no_data_suffix}")
+
+
+def _render_by_inn(chart_df):
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(availability_bar_figure(chart_df, 'insulin_inn', 'Insulin INN', rotate_labels_above=-1),
+                        use_container_width=True)
+        st.markdown(AVAILABILITY_NOTE, unsafe_allow_html=True)
+    else:
+        st.info("No data available for the selected filters")
+
+
+def _render_top_brands(chart_df):
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(top_brands_figure(chart_df), use_container_width=True)
+        st.markdown("""
+            <div class="info-box">
+                <strong>📝 Note:</strong> Pie chart shows the top 10 Insulin Brands by % of all stock. Other indicates brands outside of the top 10.
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.info("No data available for the selected filters")
+
+
+def _render_by_presentation(chart_df):
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(presentation_availability_figure(chart_df), use_container_width=True)
+        st.markdown(AVAILABILITY_NOTE, unsafe_allow_html=True)
+    else:
+        st.info("No data available for the selected filters")
+
+
+def _scorecard(label, value, color, last=False):
+    margin = "" if last else " margin-bottom: 1rem;"
+    st.markdown(f"""
+        <div style="background: white; padding: 1.5rem; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);{margin} border-left: 4px solid {color};">
+            <div style="color: #666; font-size: 0.9rem; margin-bottom: 0.5rem;">{label}</div>
+            <div style="color: {color}; font-size: 2rem; font-weight: bold;">{value:.1f}%</div>
+        </div>
+    """, unsafe_allow_html=True)
+
+
+def _render_originator_biosimilar(human_originator, human_biosimilar, analogue_originator, analogue_biosimilar):
+    scorecard_col1, scorecard_col2 = st.columns(2)
+
+    for column, label, background, color, originator, biosimilar in (
+        (scorecard_col1, "Human", "#e3f2fd", "#1f77b4", human_originator, human_biosimilar),
+        (scorecard_col2, "Analogue", "#fff3e0", "#ff7f0e", analogue_originator, analogue_biosimilar),
+    ):
+        with column:
+            st.markdown(f'<div style="text-align: center; padding: 0.5rem; background: {background}; border-radius: 5px; margin-bottom: 1rem;"><strong>Insulin Type - {label}</strong></div>', unsafe_allow_html=True)
+
+            if originator is not None:
+                _scorecard("Facilities with Originator Brands (%)", originator, color)
+            else:
+                st.info("No data available")
+
+            if biosimilar is not None:
+                _scorecard("Facilities with Biosimilars (%)", biosimilar, color, last=True)
+            else:
+                st.info("No data available")
+
+
+def _turn_page(key, step):
+    # Button callback: runs before the rerun, which then shows the new page
+    st.session_state[key] += step
+
+
+def _render_comparator_medicine(table_df):
+    if table_df is None or table_df.empty:
+        st.info("No comparator medicine data available for the selected filters")
+        return
+
+    # Only show name, strength and availability_percentage
+    display_df = table_df[['name', 'strength', 'availability_percentage']].copy()
+    display_df.columns = ['Name', 'Strength (mg)', 'Facilities with Availability (%)']
+    display_df['Facilities with Availability (%)'] = display_df['Facilities with Availability (%)'].apply(
+        lambda x: f"{x:.1f}"
+    )
+
+    total_rows = len(display_df)
+    total_pages = (total_rows + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE  # Ceiling division
+
+    if 'comparator_medicine_page' not in st.session_state:
+        st.session_state.comparator_medicine_page = 1
+
+    # Ensure page number is within bounds
+    if st.session_state.comparator_medicine_page > total_pages:
+        st.session_state.comparator_medicine_page = total_pages if total_pages > 0 else 1
+
+    start_idx = (st.session_state.comparator_medicine_page - 1) * ROWS_PER_PAGE
+    end_idx = min(start_idx + ROWS_PER_PAGE, total_rows)
+
+    st.dataframe(
+        display_df.iloc[start_idx:end_idx],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            column: st.column_config.TextColumn(column, width="medium")
+            for column in display_df.columns
+        }
+    )
+
+    if total_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+
+        with col1:
+            st.button("◀ Previous", disabled=(st.session_state.comparator_medicine_page == 1),
+                      on_click=_turn_page, args=("comparator_medicine_page", -1))
+
+        with col2:
+            st.markdown(
+                f"<div style='text-align: center; padding-top: 0.3rem;'>Page {st.session_state.comparator_medicine_page} of {total_pages}</div>",
+                unsafe_allow_html=True
+            )
+
+        with col3:
+            st.button("Next ▶", disabled=(st.session_state.comparator_medicine_page == total_pages),
+                      on_click=_turn_page, args=("comparator_medicine_page", 1))
+
+    st.caption(f"Showing {start_idx + 1}-{end_idx} of {total_rows} medicine(s)")
+
+
+def _render_price_overview(type_df, levelcare_df):
+    st.markdown("#### Median price - By insulin type")
+
+    if type_df is not None and not type_df.empty:
+        st.plotly_chart(median_price_by_type_figure(type_df), use_container_width=True)
+        st.caption(statistics_caption(type_df))
+    else:
+        st.info("No median price data available for the selected filters")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("#### Median price - By insulin type and level of care (public sector only)")
+
+    if levelcare_df is not None and not levelcare_df.empty:
+        with st.expander("📊 Debug: View final median calculations", expanded=False):
+            st.write("**Final chart data with median calculations:**")
+            st.dataframe(levelcare_df, use_container_width=True)
+
+            st.write("**Unique levels of care in final data:**")
+            st.write(levelcare_df['level_of_care'].unique().tolist())
+
+            st.write("**Data grouped by level_of_care:**")
+            for level in sorted(levelcare_df['level_of_care'].unique()):
+                level_data = levelcare_df[levelcare_df['level_of_care'] == level]
+                st.write(f"**{level}:** {len(level_data)} insulin types")
+                st.dataframe(level_data[['insulin_type', 'median_price_local', 'product_count']])
+
+        st.plotly_chart(median_price_by_levelcare_figure(levelcare_df), use_container_width=True)
+        st.caption(statistics_caption(levelcare_df))
+    else:
+        st.info("No median price data available for public sector level of care")
+
+
+def _render_price_by_inn(chart_df):
+    st.markdown("#### Price - By INN")
+
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(price_by_inn_figure(chart_df), use_container_width=True)
+        st.caption(statistics_caption(chart_df))
+        st.markdown("""
+        <div style="text-align: left;" align="left">
+            <strong>NOTE:</strong> Label shown for median price only. Hover over points on the chart to see all values.
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.info("No price by INN data available for the selected filters")
+
+
+def _brand_table(brands_df, kind):
+    page_key = f"price_brand_{kind}_page"
+    total_rows = len(brands_df)
+    total_pages = (total_rows + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE
+
+    if page_key not in st.session_state:
+        st.session_state[page_key] = 1
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+
+    with col_prev:
+        st.button("← Previous", key=f"{kind}_prev", disabled=(st.session_state[page_key] == 1),
+                  on_click=_turn_page, args=(page_key, -1))
+
+    with col_info:
+        st.markdown(f"<div style='text-align: center;'>Page {st.session_state[page_key]} of {total_pages}</div>", unsafe_allow_html=True)
+
+    with col_next:
+        st.button("Next →", key=f"{kind}_next", disabled=(st.session_state[page_key] == total_pages),
+                  on_click=_turn_page, args=(page_key, 1))
+
+    start_idx = (st.session_state[page_key] - 1) * ROWS_PER_PAGE
+    end_idx = min(start_idx + ROWS_PER_PAGE, total_rows)
+
+    display_df = brands_df.iloc[start_idx:end_idx].copy()
+    display_df.columns = ['Insulin Brand', 'Facilities (n)', 'Min Price-Local', 'Median Price-Local', 'Max Price-Local']
+    display_df['Facilities (n)'] = display_df['Facilities (n)'].apply(lambda x: f"{int(x):,}")
+    for column in ('Min Price-Local', 'Median Price-Local', 'Max Price-Local'):
+        display_df[column] = display_df[column].apply(lambda x: f"{x:,.2f}")
+
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
+
+    st.caption(f"Showing {start_idx + 1}-{end_idx} of {total_rows} brands")
+    st.caption(statistics_caption(brands_df))
+
+
+def _render_price_by_brand(human_brands_df, analogue_brands_df):
+    col_human, col_analogue = st.columns(2)
+
+    for column, label, kind, brands_df in (
+        (col_human, "Human", "human", human_brands_df),
+        (col_analogue, "Analogue", "analogue", analogue_brands_df),
+    ):
+        with column:
+            st.markdown(f"#### {label} Insulin Brands")
+            if brands_df is not None and not brands_df.empty:
+                _brand_table(brands_df, kind)
+            else:
+                st.info(f"No {kind} insulin brand data available for the selected filters")
+
+
+def _render_price_by_presentation(chart_df):
+    st.markdown("#### Median price - By presentation")
+
+    if chart_df is not None and not chart_df.empty:
+        st.plotly_chart(
+            median_price_bar_figure(
+                chart_df, 'insulin_presentation', 'Insulin Presentation',
+                title='Median Price by Insulin Presentation', height=500,
+                margin=(80, 120, 60, 40), angle_labels=True
+            ),
+            use_container_width=True
+        )
+        st.caption(statistics_caption(chart_df))
+    else:
+        st.info("No median price by presentation data available for the selected filters")
+
+
+def _render_price_originator_biosimilar(human_df, analogue_df):
+    col_human, col_analogue = st.columns(2)
+
+    for column, label, chart_df in ((col_human, "Human", human_df), (col_analogue, "Analogue", analogue_df)):
+        with column:
+            st.markdown(f"#### {label} Insulin - Originator vs Biosimilar")
+            if chart_df is not None and not chart_df.empty:
+                st.plotly_chart(median_price_bar_figure(chart_df, 'insulin_originator_biosimilar', 'Type'),
+                                use_container_width=True)
+                st.caption(statistics_caption(chart_df))
+            else:
+                st.info(f"No {label.lower()} insulin originator/biosimilar data available for the selected filters")
+
+
+def _facility_scorecard(count):
+    st.markdown(f"""
+    <div class="metric-card" style="padding: 20px; background: white; border-radius: 8px;
+         border-left: 4px solid #667eea; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+        <div style="color: #666; font-size: 14px; margin-bottom: 8px;">Facilities(n)</div>
+        <div style="color: #1f77b4; font-size: 32px; font-weight: bold;">{count:,}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def _render_price_free(free_count, reasons_free_df, subsidised_count, reasons_subsidised_df):
+    rows = (
+        ("Facilities providing for free", "facilities providing free", free_count,
+         "Reasons insulin provided for free", "reasons insulin provided for free",
+         reasons_free_df, 'insulin_free_reason', 'Set3'),
+        ("Facilities not charging full price", "facilities not charging full price", subsidised_count,
+         "Reasons for not charging full price", "reasons not charging full price",
+         reasons_subsidised_df, 'insulin_subsidised_reason', 'Pastel'),
+    )
+    for index, (count_title, count_label, count, reasons_title, reasons_label,
+                reasons_df, reason_column, palette) in enumerate(rows):
+        if index:
+            st.markdown("<br>", unsafe_allow_html=True)
+        col_scorecard, col_pie = st.columns(2)
+
+        with col_scorecard:
+            st.markdown(f"#### {count_title}")
+            if count is not None:
+                _facility_scorecard(count)
+            else:
+                st.info(f"No data available for {count_label}")
+
+        with col_pie:
+            st.markdown(f"#### {reasons_title}")
+            st.markdown('<p style="font-size: 12px; color: #666;">Hover over a slice to see the Reported Products(n) making up the percentage</p>',
+                        unsafe_allow_html=True)
+            if reasons_df is not None and not reasons_df.empty:
+                st.plotly_chart(reasons_pie_figure(reasons_df, reason_column, palette), use_container_width=True)
+            else:
+                st.info(f"No data available for {reasons_label}")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("""
+    <div class="info-box" style="padding: 15px; background: #e3f2fd; border-left: 4px solid #2196f3;
+         border-radius: 4px; margin-top: 15px;">
+        <p style="margin: 0; color: #1565c0; font-size: 14px;">
+            <strong>Note:</strong> This includes facilities that report providing insulin for free at least
+            some people, depending on the national policies, for example insurance or donation schemes.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# ====================================
+# Section registry
+# ====================================
+
+def _region(options, key_prefix, by_region=False):
+    return {'column': 'region', 'options': options, 'key_prefix': key_prefix, 'by_region': by_region}
+
+
+def _sector(options, key_prefix, by_region=False):
+    return {'column': 'sector', 'options': options, 'key_prefix': key_prefix, 'by_region': by_region}
+
+
+def _availability_header(title, first=False):
+    header = ["<br><br>"]
+    if first:
+        header.append('<div class="section-header"><h3>Insulin availability</h3></div>')
+    return header + [f"#### {title}"]
+
+
+def _price_header(title, intro=None):
+    header = ["<br><br>", f'<div class="section-header"><h3>{title}</h3></div>']
+    if intro:
+        header.append(intro)
+    return header + ["<br>"]
+
+
+def _availability_section(title, tip, options_table, dimensions, data_table, data, spinner, render, first=False,
+                          priority=1):
+    return {
+        'view': "availability",
+        'header': _availability_header(title, first),
+        'tip': tip,
+        'requires_periods': True,
+        'options_table': options_table,
+        'dimensions': dimensions,
+        'data_table': data_table,
+        'data': data,
+        'spinner': spinner,
+        'render': render,
+        'priority': priority,
+    }
+
+
+def _price_section(title, options_table, prefix, data, spinner, render, intro=None,
+                   requires_periods=False, medians=True, regions=get_price_regions, sectors=get_price_sectors,
+                   priority=1):
+    return {
+        'view': "price",
+        'header': _price_header(title, intro),
+        'tip': None,
+        'requires_periods': requires_periods,
+        'options_table': options_table,
+        # Sector options depend on the Region selection; local filters replace the global ones
+        'dimensions': [_region(regions, f"{prefix}region_"), _sector(sectors, f"{prefix}sector_", by_region=True)],
+        'data_table': "surveys_repeat",
+        'data': data,
+        # The median charts also pass the Median statistics selection
+        'medians': medians,
+        'spinner': spinner,
+        'render': render,
+        'priority': priority,
+    }
+
+
+SECTIONS = {
+    # Availability Analysis
+    "insulin_overall": _availability_section(
+        "Insulin availability - Overall", "view insulin availability metrics.", "surveys",
+        [_region(get_insulin_regions, "insulin_region_"),
+         _sector(get_insulin_sectors, "insulin_sector_", by_region=True)],
+        "surveys", [get_insulin_availability_metrics],
+        "Loading insulin availability metrics...", _render_overall, first=True, priority=0
+    ),
+    "insulin_by_sector": _availability_section(
+        "Insulin availability - By sector", "view insulin availability by sector.", "surveys",
+        [_region(get_insulin_by_sector_regions, "insulin_by_sector_region_")],
+        "surveys", [get_insulin_by_sector_chart_data],
+        "Loading availability by sector data...", _render_by_sector
+    ),
+    "insulin_by_type": _availability_section(
+        "Insulin availability - By insulin type", "view insulin availability by insulin type.", "repeat_repivot",
+        [_region(get_insulin_by_type_regions, "insulin_by_type_region_"),
+         _sector(get_insulin_by_type_sectors, "insulin_by_type_sector_")],
+        "repeat_repivot", [get_insulin_by_type_human_chart_data, get_insulin_by_type_analogue_chart_data],
+        "Loading insulin data by type...",
+        functools.partial(_render_human_analogue, x_column='insulin_type', x_title='Insulin Type')
+    ),
+    "insulin_by_region": _availability_section(
+        "Insulin availability - By region", "view insulin availability by region.", "surveys",
+        [_sector(get_insulin_by_region_sectors, "insulin_by_region_sector_")],
+        "repeat_repivot", [get_insulin_by_region_human_chart_data, get_insulin_by_region_analogue_chart_data],
+        "Loading insulin data by region...",
+        functools.partial(_render_human_analogue, x_column='region', x_title='Region')
+    ),
+    "insulin_public_levelcare": _availability_section(
+        "Insulin availability - Public sector - By level of care",
+        "view insulin availability by level of care in the public sector.", "repeat_repivot",
+        [_region(get_insulin_public_levelcare_regions, "insulin_public_levelcare_region_")],
+        "repeat_repivot",
+        [get_insulin_public_levelcare_human_chart_data, get_insulin_public_levelcare_analogue_chart_data],
+        "Loading insulin data by level of care...",
+        functools.partial(_render_human_analogue, x_column='level_of_care', x_title='Level of Care',
+                          no_data_suffix=" in Public sector")
+    ),
+    "insulin_by_inn": _availability_section(
+        "Insulin availability - By INN", "view insulin availability by INN.", "surveys",
+        [_region(get_insulin_by_inn_regions, "insulin_by_inn_region_"),
+         _sector(get_insulin_by_inn_sectors, "insulin_by_inn_sector_")],
+        "repeat_repivot", [get_insulin_by_inn_chart_data],
+        "Loading insulin availability by INN...", _render_by_inn
+    ),
+    "insulin_top_brands": _availability_section(
+        "Insulin - Top 10 brands", "view top 10 insulin brands.", "surveys",
+        [_sector(get_insulin_top_brands_sectors, "insulin_top_brands_sector_")],
+        "surveys_repeat", [get_insulin_top_brands_chart_data],
+        "Loading top 10 insulin brands...", _render_top_brands
+    ),
+    "insulin_by_presentation": _availability_section(
+        "Insulin availability - By presentation and insulin type",
+        "view insulin availability by presentation and type.", "surveys",
+        [_region(get_insulin_by_presentation_regions, "insulin_by_presentation_region_"),
+         _sector(get_insulin_by_presentation_sectors, "insulin_by_presentation_sector_")],
+        "repeat_repivot", [get_insulin_by_presentation_chart_data],
+        "Loading insulin availability by presentation and type...", _render_by_presentation
+    ),
+    "insulin_originator_biosimilar": _availability_section(
+        "Insulin availability - By originator brands VS biosimilars",
+        "view insulin availability by originator brands and biosimilars.", "surveys",
+        [_region(get_insulin_originator_biosimilar_regions, "insulin_originator_biosimilar_region_"),
+         _sector(get_insulin_originator_biosimilar_sectors, "insulin_originator_biosimilar_sector_")],
+        "repeat_repivot",
+        [get_insulin_human_originator_metric, get_insulin_human_biosimilar_metric,
+         get_insulin_analogue_originator_metric, get_insulin_analogue_biosimilar_metric],
+        "Loading originator and biosimilar data...", _render_originator_biosimilar
+    ),
+    "comparator_medicine": _availability_section(
+        "Insulin availability - Availability of comparator medicine",
+        "view comparator medicine availability.", "surveys",
+        [_region(get_comparator_medicine_regions, "comparator_medicine_region_"),
+         _sector(get_comparator_medicine_sectors, "comparator_medicine_sector_")],
+        "comparators", [get_comparator_medicine_table_data],
+        "Loading comparator medicine data...", _render_comparator_medicine
+    ),
+
+    # Price Analysis
+    "price_overview": _price_section(
+        "Where patients were charged the full price", "surveys", "price_",
+        [get_median_price_by_type, get_median_price_by_type_levelcare],
+        "Loading median price data...", _render_price_overview,
+        intro="""
+        Insulin price is standardised in all cases to 1000IU. Click on the optional metrics button
+        to see the number of products that make up the median price.
+        """,
+        requires_periods=True, priority=0
+    ),
+    "price_by_inn": _price_section(
+        "Price - By INN", "surveys_repeat", "price_inn_", [get_price_by_inn],
+        "Loading price by INN data...", _render_price_by_inn
+    ),
+    "price_by_brand": _price_section(
+        "Price - By Brand", "surveys_repeat", "price_brand_", [get_price_by_brand_human, get_price_by_brand_analogue],
+        "Loading insulin brands...", _render_price_by_brand
+    ),
+    "price_by_presentation": _price_section(
+        "Median price - By presentation", "surveys_repeat", "price_pres_", [get_median_price_by_presentation],
+        "Loading median price by presentation data...", _render_price_by_presentation
+    ),
+    "price_originator_biosimilar": _price_section(
+        "Median price - By originator brands and biosimilars", "surveys_repeat", "price_orig_",
+        [get_median_price_by_originator_human, get_median_price_by_originator_analogue],
+        "Loading originator/biosimilar price data...", _render_price_originator_biosimilar
+    ),
+    "price_free": _price_section(
+        "Where insulin is free", "surveys", "price_free_",
+        [get_facilities_providing_free, get_reasons_insulin_free,
+         get_facilities_not_full_price, get_reasons_not_full_price],
+        "Loading free insulin data...", _render_price_free,
+        requires_periods=True, medians=False, regions=get_free_insulin_regions, sectors=get_free_insulin_sectors
+    ),
+}
+
+
+def view_sections(view):
+    """Names of a view's sections, in page order."""
+    return [name for name, spec in SECTIONS.items() if spec['view'] == view]
+
+
+# ====================================
+# Section calls (shared with the prefetch)
+# ====================================
+
+def section_global_filters(spec, state):
+    """
+    Global filters of a section's view.
+
+    Args:
+        spec (dict): Section spec
+        state: st.session_state or a snapshot of it
+
+    Returns:
+        dict: Data collection period and country (and the global Region
+        selection on the Availability view)
+    """
+    view = spec['view']
+    countries = state.get(COUNTRIES_KEYS[view])
+    global_filters = {
+        'data_collection_period': state.get(PERIODS_KEYS[view]),
+        'country': countries if countries else None
+    }
+    if view == "availability":
+        regions = state.get("selected_regions")
+        global_filters['region'] = regions if regions else None
+    return global_filters
+
+
+def section_option_call(spec, dimension, client, global_filters, local_regions):
+    """
+    (function, args) call of a local filter's options query.
+
+    Args:
+        spec (dict): Section spec
+        dimension (dict): One of the spec's dimensions
+        client: BigQuery client
+        global_filters (dict): From section_global_filters
+        local_regions (list): Local Region selection (used by options that depend on it)
+
+    Returns:
+        tuple
+    """
+    args = (client, config.TABLES[spec['options_table']], global_filters)
+    if dimension['by_region']:
+        args += (local_regions,)
+    return dimension['options'], args
+
+
+def section_data_calls(spec, client, state, selections):
+    """
+    (function, args) calls of a section's data functions.
+
+    Args:
+        spec (dict): Section spec
+        client: BigQuery client
+        state: st.session_state or a snapshot of it
+        selections (list): Local selection per dimension, in spec order
+
+    Returns:
+        list
+    """
+    global_filters = section_global_filters(spec, state)
+    table_name = config.TABLES[spec['data_table']]
+
+    if spec['view'] == "availability":
+        args = (client, table_name, global_filters, *selections)
+    else:
+        local = dict(zip((dimension['column'] for dimension in spec['dimensions']), selections))
+        filters = {
+            'data_collection_period': global_filters['data_collection_period'],
+            'country': global_filters['country'],
+            'region': local.get('region') or None,
+            'sector': local.get('sector') or None
+        }
+        if spec['medians']:
+            filters['statistics_mode'] = state.get("statistics_mode", statistics_mode({}))
+        args = (client, table_name, filters)
+
+    return [(function, args) for function in spec['data']]
+
+
+# ====================================
+# Runtime
+# ====================================
+
+def checkbox_filter(options_df, column, key_prefix):
+    """
+    Local Region/Sector checkbox filter in an expander, every box ticked by default.
+
+    Args:
+        options_df: Options query result with the column and facility_count (or None)
+        column (str): 'region' or 'sector'
+        key_prefix (str): Checkbox session state key prefix, e.g. 'insulin_region_'
+
+    Returns:
+        list: The selected values
+    """
+    label = DIMENSION_LABELS[column]
+    if options_df is None or options_df.empty:
+        st.info(f"No {column} data available")
+        return []
+
+    option_data = list(zip(options_df[column].tolist(), options_df['facility_count'].tolist()))
+
+    # Initialize checkboxes in session state (first time only)
+    for value, _ in option_data:
+        if f"{key_prefix}{value}" not in st.session_state:
+            st.session_state[f"{key_prefix}{value}"] = True
+
+    selected_count = sum(1 for value, _ in option_data if st.session_state.get(f"{key_prefix}{value}", True))
+    excluded_count = len(option_data) - selected_count
+
+    with st.expander(f"Select {label}s ({selected_count}/{len(option_data)} selected)", expanded=False):
+        if excluded_count > 0:
+            st.caption(f"🚫 {excluded_count} item{'s' if excluded_count != 1 else ''} excluded")
+
+        selected = []
+        for value, count in option_data:
+            checkbox_key = f"{key_prefix}{value}"
+            if st.checkbox(f"{value} ({count:,})", value=st.session_state.get(checkbox_key, True), key=checkbox_key):
+                selected.append(value)
+
+    # Kept in full when everything is ticked: the options leave out NULL values
+    return canonical_values(selected)
+
+
+def _render_dimension(spec, dimension, client, global_filters, local_regions):
+    st.markdown(f"**{DIMENSION_LABELS[dimension['column']]}**")
+    with st.spinner(f"Loading {dimension['column']}s..."):
+        function, args = section_option_call(spec, dimension, client, global_filters, local_regions)
+        return checkbox_filter(function(*args), dimension['column'], dimension['key_prefix'])
+
+
+def _render_dimensions(spec, client, global_filters):
+    dimensions = spec['dimensions']
+    # Two filters side by side
+    containers = st.columns(len(dimensions)) if len(dimensions) > 1 else [st.container()]
+    selections = {}
+    for container, dimension in zip(containers, dimensions):
+        with container:
+            selections[dimension['column']] = _render_dimension(
+                spec, dimension, client, global_filters, selections.get('region', [])
+            )
+    return [selections[dimension['column']] for dimension in dimensions]
+
+
+def run_section(name, client):
+    """
+    Render one section from its spec and record its time in st.session_state.section_timings.
+
+    Args:
+        name (str): Key of SECTIONS
+        client: BigQuery client
+    """
+    spec = SECTIONS[name]
+    started = time.perf_counter()
+
+    if spec['requires_periods'] and not st.session_state.get(PERIODS_KEYS[spec['view']]):
+        if spec['tip']:
+            for markdown in spec['header']:
+                st.markdown(markdown, unsafe_allow_html=True)
+            st.markdown(f"""
+                <div class="info-box">
+                    <strong>💡 Tip:</strong> Select one or more data collection periods above to {spec['tip']}
+                </div>
+            """, unsafe_allow_html=True)
+        return
+
+    for markdown in spec['header']:
+        st.markdown(markdown, unsafe_allow_html=True)
+
+    selections = _render_dimensions(spec, client, section_global_filters(spec, st.session_state))
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    with st.spinner(spec['spinner']):
+        results = [
+            function(*args)
+            for function, args in section_data_calls(spec, client, st.session_state, selections)
+        ]
+    spec['render'](*results)
+
+    _record_timing(name, time.perf_counter() - started)
+
+
+def _record_timing(name, seconds):
+    st.session_state.setdefault('section_timings', {})[name] = seconds
+    if config.SECTION_TIMING_LOG:
+        print(f"⏱ Section {name}: {seconds:.3f}s", flush=True)
+
+
+@st.fragment
+def _section_fragment(name, client):
+    run_section(name, client)
+
+
+def page_block(name, header, spinner, render):
+    """
+    Page content above a view's sections, rendered (and ordered) with them by render_page.
+
+    Args:
+        name (str): Name of the block in the timings
+        header (list): Markdown shown above the block (also in its placeholder)
+        spinner (str): Shown in the block's placeholder until it is filled
+        render (callable): Draws the block's content
+
+    Returns:
+        dict
+    """
+    return {'name': name, 'header': header, 'spinner': spinner, 'render': render}
+
+
+def _render_block(block):
+    started = time.perf_counter()
+    for markdown in block['header']:
+        st.markdown(markdown, unsafe_allow_html=True)
+    block['render']()
+    _record_timing(block['name'], time.perf_counter() - started)
+
+
+def _placeholder(slot, header, spinner):
+    # One element, so the content filled in later replaces it whole
+    slot.markdown("\n\n".join(header + [f"⏳ *{spinner}*"]), unsafe_allow_html=True)
+
+
+def render_page(view, client, blocks=(), started=None):
+    """
+    Render a view's page blocks, then its sections, each section as its own st.fragment.
+
+    Only the active view's sections run; a widget inside a section reruns
+    that section alone. With config.PROGRESSIVE_RENDERING every block and
+    section is laid out as a placeholder first, then filled in priority
+    order: the page blocks, then the sections by their priority. The time to
+    the first filled block (first meaningful content) and to the full page
+    are kept in st.session_state.page_timings[view].
+
+    Args:
+        view (str): "availability" or "price"
+        client: BigQuery client
+        blocks (list): page_block() dicts, highest priority first
+        started (float): time.perf_counter() at the start of the script run
+            (defaults to now)
+    """
+    started = time.perf_counter() if started is None else started
+    periods = st.session_state.get(PERIODS_KEYS[view])
+
+    items = [(block['name'], functools.partial(_render_block, block)) for block in blocks]
+    names = view_sections(view)
+    if config.PROGRESSIVE_RENDERING:
+        names = sorted(names, key=lambda name: SECTIONS[name]['priority'])
+    items += [(name, functools.partial(_section_fragment, name, client)) for name in names]
+
+    slots = {}
+    if config.PROGRESSIVE_RENDERING:
+        for block in blocks:
+            slots[block['name']] = st.empty()
+            _placeholder(slots[block['name']], block['header'], block['spinner'])
+        for name in view_sections(view):
+            spec = SECTIONS[name]
+            slots[name] = st.empty()
+            # Sections shown without data (tips) fill in at once
+            if periods or not spec['requires_periods']:
+                _placeholder(slots[name], spec['header'], spec['spinner'])
+
+    first_content = None
+    for name, render in items:
+        with slots[name].container() if name in slots else nullcontext():
+            render()
+        if first_content is None:
+            first_content = time.perf_counter() - started
+
+    full_page = time.perf_counter() - started
+    if first_content is None:
+        first_content = full_page
+    st.session_state.setdefault('page_timings', {})[view] = {'first_content': first_content, 'full_page': full_page}
+    if config.SECTION_TIMING_LOG:
+        print(f"⏱ Page {view}: first content {first_content:.3f}s, full page {full_page:.3f}s", flush=True)
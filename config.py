@@ -25,4 +25,152 @@ GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", Non
 
 # App Configuration
 APP_TITLE = "HAI Facilities Data Dashboard"
-APP_ICON = "📊"
\ No newline at end of file
+APP_ICON = "📊"
+
+# Local Replica Configuration
+# When enabled, every query is answered from local Parquet snapshots of TABLES
+# using an embedded DuckDB engine instead of BigQuery.
+# Build the snapshot with: python -m database.local_replica snapshot
+LOCAL_REPLICA_ENABLED = os.getenv("LOCAL_REPLICA_ENABLED", "false").lower() in ("1", "true", "yes")
+LOCAL_REPLICA_DIR = os.getenv("LOCAL_REPLICA_DIR", "data/replica")
+
+# Availability Cube Configuration
+# When enabled, the Availability Analysis sections are derived in pandas from one
+# GROUPING SETS scan per table (see database/availability_cube.py), so local
+# Region/Sector checkbox changes do not issue new queries.
+AVAILABILITY_CUBE_ENABLED = os.getenv("AVAILABILITY_CUBE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Dimension Index
+# When enabled, every local Region/Sector dropdown is looked up in pandas from one
+# scan per table and period/country selection, grouped by period, country, region,
+# sector and level of care (see database/dimension_index.py).
+DIMENSION_INDEX_ENABLED = os.getenv("DIMENSION_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Facility Count Mode
+# "exact" (default) sums exact per-cell counts from the dimension index; "sketch"
+# answers the Region/Sector dropdown facility counts by merging per-cell HyperLogLog
+# sketches (see database/facility_sketches.py; needs DIMENSION_INDEX_ENABLED). The relative standard error is
+# 1.04 / sqrt(2 ** FACILITY_SKETCH_PRECISION), about 0.8% at the default of 14.
+FACILITY_COUNT_MODE = os.getenv("FACILITY_COUNT_MODE", "exact").lower()
+FACILITY_SKETCH_PRECISION = int(os.getenv("FACILITY_SKETCH_PRECISION", "14"))
+
+# Metric Batches
+# Sibling queries that only differ in one predicate (Human/Analogue charts,
+# originator/biosimilar scorecards, brand and originator prices) are merged into one
+# conditional-aggregation scan per filter selection (see database/metric_batch.py).
+METRIC_BATCH_ENABLED = os.getenv("METRIC_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Semantic Cache
+# Price tab sections run their query once per period/country selection grouped by
+# region and sector, and answer narrower local Region/Sector selections from those
+# cells in pandas; medians over several cells come from the price quantile sketches
+# below, or fall back to a query (see database/semantic_cache.py).
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Price Quantile Sketches
+# When enabled, Price tab medians over several Region/Sector cells are recomputed in
+# memory from per-cell quantile sketches (at most PRICE_SKETCH_BUCKETS rank buckets
+# per cell, exact for cells with no more prices than buckets) instead of a new query.
+PRICE_SKETCH_ENABLED = os.getenv("PRICE_SKETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+PRICE_SKETCH_BUCKETS = int(os.getenv("PRICE_SKETCH_BUCKETS", "128"))
+
+# Statistics Mode
+# "fast" (default) keeps the approximate APPROX_QUANTILES medians; "exact" computes
+# the true medians defined in plans/queries.md in memory from per-cell price vectors
+# (see database/statistics_mode.py). The Price tab can switch modes per request.
+STATISTICS_MODE = os.getenv("STATISTICS_MODE", "fast").lower()
+
+# Staging Layer
+# Every query function reads the survey tables through a cleaning layer (blank,
+# 'NULL' and '---' placeholders as NULLs, typed order columns, precomputed
+# sector_category flags and canonical level of care; see database/staging.py),
+# materialized as staging tables after every data refresh with:
+# python -m database.staging build
+# Tables not built yet, or all of them when disabled, are read through an
+# inline view that repeats the cleaning on every scan.
+STAGING_TABLES_ENABLED = os.getenv("STAGING_TABLES_ENABLED", "true").lower() in ("1", "true", "yes")
+STAGING_TABLE_PREFIX = os.getenv("STAGING_TABLE_PREFIX", "stg_")
+
+# Summary Tables
+# When enabled, the availability cube, the dimension index and the free insulin
+# sections sum the cells of small pre-aggregated summary tables (one per section
+# family, keyed by period, country, region, sector and level of care) instead of
+# scanning the raw tables (see database/summary_tables.py). Build them after every
+# data refresh with: python -m database.summary_tables build
+SUMMARY_TABLES_ENABLED = os.getenv("SUMMARY_TABLES_ENABLED", "false").lower() in ("1", "true", "yes")
+SUMMARY_TABLE_PREFIX = os.getenv("SUMMARY_TABLE_PREFIX", "summary_")
+
+# Query Cache Audit
+# Report queries that BigQuery cannot serve from its 24-hour result cache
+# (non-deterministic functions such as CURRENT_DATE()); see database/query_runner.py.
+QUERY_CACHE_AUDIT_ENABLED = os.getenv("QUERY_CACHE_AUDIT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Section Prefetch
+# Right after the Data Selectors resolve, every section's queries are submitted
+# to a bounded thread pool sharing the BigQuery client (see database/prefetch.py),
+# so the page waits roughly for the slowest query instead of the sum of all.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+PREFETCH_MAX_WORKERS = int(os.getenv("PREFETCH_MAX_WORKERS", "8"))
+
+# BigQuery Storage Read API
+# Download query results as Arrow over parallel Storage Read API streams
+# (needs google-cloud-bigquery-storage; falls back to the REST API without it).
+# Small results that fit in the first page are always read over REST.
+BQ_STORAGE_API_ENABLED = os.getenv("BQ_STORAGE_API_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Compact Results
+# DataFrames returned by the query functions are stored compactly before they are
+# cached: repeated strings as categoricals, prices as float32 where no value changes
+# by more than half a cent, 0/1 availability flags as booleans (see
+# utils/data_processing.compact_dataframe).
+COMPACT_RESULTS_ENABLED = os.getenv("COMPACT_RESULTS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Persistent Result Cache
+# Query results are also stored on disk as compressed Parquet (see database/result_cache.py),
+# shared by every server process on the host and kept across restarts and redeploys.
+# Local replica mode keeps its own cache inside the replica directory.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_DIR = os.getenv(
+    "RESULT_CACHE_DIR",
+    os.path.join(LOCAL_REPLICA_DIR, "result_cache") if LOCAL_REPLICA_ENABLED else "data/result_cache"
+)
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "86400"))  # seconds
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Cache Freshness
+# Cached query results are kept until a table they read changes: table metadata
+# (modified time, row count) is polled at most every FRESHNESS_POLL_INTERVAL seconds
+# and only the results derived from changed tables are cleared (see database/freshness.py).
+# With the watcher disabled, cached results expire after QUERY_CACHE_TTL seconds.
+FRESHNESS_WATCHER_ENABLED = os.getenv("FRESHNESS_WATCHER_ENABLED", "true").lower() in ("1", "true", "yes")
+FRESHNESS_POLL_INTERVAL = int(os.getenv("FRESHNESS_POLL_INTERVAL", "60"))  # seconds
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "600"))  # seconds
+
+# Cache Warm-up
+# At server start a background thread runs the Data Selector queries (country,
+# region and sector counts, facility statistics) for every data collection period
+# and for all periods together, at most WARMUP_MAX_WORKERS at a time, so the first
+# visitor does not wait for cold queries. Also runnable as: python -m database.warmup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+WARMUP_MAX_WORKERS = int(os.getenv("WARMUP_MAX_WORKERS", "4"))
+
+# Dashboard Sections
+# Each section below the Data Selectors is declared in components/sections.py and
+# rendered by its runtime. Figures are kept per identical query result (at most
+# FIGURE_CACHE_MAX_ENTRIES per chart kind) instead of being rebuilt on every rerun.
+# The time each section took is kept in st.session_state.section_timings, and
+# also printed with SECTION_TIMING_LOG.
+# With PROGRESSIVE_RENDERING, every block of a view is laid out as a placeholder
+# first and filled highest priority first (period summary, facility tree, then the
+# sections by priority); st.session_state.page_timings keeps the time to first
+# meaningful content apart from the time to the full page.
+FIGURE_CACHE_ENABLED = os.getenv("FIGURE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+FIGURE_CACHE_MAX_ENTRIES = int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "256"))
+SECTION_TIMING_LOG = os.getenv("SECTION_TIMING_LOG", "false").lower() in ("1", "true", "yes")
+PROGRESSIVE_RENDERING = os.getenv("PROGRESSIVE_RENDERING", "true").lower() in ("1", "true", "yes")
+
+# Diagnostics
+# Admin-only panel on the Availability tab (see components/diagnostics.py): table
+# metadata, query counters and section timings, plus country survey and level of
+# care reports that run only on request, in the background, as cached queries.
+DIAGNOSTICS_ENABLED = os.getenv("DIAGNOSTICS_ENABLED", "false").lower() in ("1", "true", "yes")
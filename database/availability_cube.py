@@ -0,0 +1,684 @@
+"""
+Availability cube: one GROUPING SETS scan per table per global filter change.
+
+Every Availability Analysis section is an aggregate over the same rows, only
+sliced differently by the local Region/Sector checkboxes and by a product
+dimension (insulin type, INN, presentation, ...). Instead of issuing one
+BigQuery job per section and per checkbox change, each table is scanned once
+for the current Data Selectors and grouped at the finest grain the sections
+need: region x sector x level_of_care x <product dimensions>. The sections are
+then derived from those cells in pandas; the checkbox selections are evaluated
+on a bitmap index of each grain's cells (utils/bitmap_index.py).
+
+Distinct facility counts are only summable across cells because region,
+sector and level_of_care are facility attributes (constant per survey case).
+The cube verifies this on every build: each grain also gets a check set
+grouped by its product dimensions alone, and if the summed cells disagree
+with the directly counted totals the grain is flagged and the section falls
+back to its own query.
+
+With summary tables enabled (config.SUMMARY_TABLES_ENABLED) the cube sums the
+cells of a pre-aggregated summary table per grain instead of scanning the raw
+table; see database/summary_tables.py.
+"""
+import numpy as np
+import pandas as pd
+import config
+from database.freshness import cached_query
+from database.query_builder import add_in_filter
+from database.query_runner import run_query
+from database.staging import staged_table
+from database.summary_tables import SUMMARY_KEY_DIMENSIONS, summary_table
+from utils.bitmap_index import BitmapIndex
+
+
+# Facility-level dimensions shared by every grain (local filters slice these)
+FACILITY_DIMENSIONS = ["region", "sector", "level_of_care"]
+
+# Cube layout per table (keys match config.TABLES)
+#   columns:  derived dimension columns (name -> SQL expression)
+#   inputs:   raw columns the measures read
+#   measures: name -> (SQL aggregate, is_distinct_count)
+#   grains:   grain name -> product dimensions added to FACILITY_DIMENSIONS
+CUBE_SPECS = {
+    "surveys": {
+        "columns": {
+            "sector_order": "sector_order",
+        },
+        "inputs": ["form_case__case_id", "insulin_available_num"],
+        "measures": {
+            "facilities": ("COUNT(DISTINCT form_case__case_id)", True),
+            "facilities_available": ("SUM(COALESCE(insulin_available_num, 0))", False),
+        },
+        "grains": {
+            "sector": ["sector_order"],
+        },
+    },
+    "repeat_repivot": {
+        "columns": {
+            "insulin_type": "insulin_type",
+            "insulin_type_order": "insulin_type_order",
+            "insulin_inn": "insulin_inn",
+            "insulin_presentation": "insulin_presentation",
+            "insulin_originator_biosimilar": "insulin_originator_biosimilar",
+            "is_human": "insulin_type LIKE '%Human%'",
+            "is_analogue": "insulin_type LIKE '%Analogue%'",
+        },
+        "inputs": ["form_case__case_id", "is_unavailable"],
+        "measures": {
+            "facilities": ("COUNT(DISTINCT form_case__case_id)", True),
+            "facilities_available": ("COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END)", True),
+        },
+        "grains": {
+            "type": ["insulin_type", "insulin_type_order"],
+            "human": ["is_human"],
+            "analogue": ["is_analogue"],
+            "inn": ["insulin_inn"],
+            "presentation": ["insulin_presentation", "insulin_type"],
+            "originator_human": ["insulin_originator_biosimilar", "is_human"],
+            "originator_analogue": ["insulin_originator_biosimilar", "is_analogue"],
+        },
+    },
+    "surveys_repeat": {
+        "columns": {
+            "insulin_brand": "insulin_brand",
+        },
+        "inputs": [],
+        "measures": {
+            "record_count": ("COUNT(*)", False),
+        },
+        "grains": {
+            "brand": ["insulin_brand"],
+        },
+    },
+    "comparators": {
+        "columns": {
+            "name": "name",
+            "strength": "strength",
+        },
+        "inputs": ["survey_id", "available_num"],
+        "measures": {
+            "surveys": ("COUNT(DISTINCT survey_id)", True),
+            "surveys_available": ("SUM(CAST(available_num AS INT64))", False),
+        },
+        "grains": {
+            "comparator": ["name", "strength"],
+        },
+    },
+}
+
+CHECK_SUFFIX = "__check"
+
+
+def get_cube_spec(table_name):
+    """
+    Look up the cube layout for a physical table name.
+
+    Args:
+        table_name: Table name (e.g. adl_repeat_repivot)
+
+    Returns:
+        dict: Entry of CUBE_SPECS, or None if the table has no cube
+    """
+    for key, spec in CUBE_SPECS.items():
+        if config.TABLES.get(key) == table_name:
+            return spec
+    return None
+
+
+def _distinct_measures(spec):
+    """Names of the measures that are distinct counts (not trivially additive)."""
+    return [name for name, (_, is_distinct) in spec['measures'].items() if is_distinct]
+
+
+def build_cube_query(table_name, global_filters, spec):
+    """
+    Build the single GROUPING SETS query for one table.
+
+    Args:
+        table_name: Table name
+        global_filters (dict): Global filters from Data Selectors
+        spec (dict): Cube layout from CUBE_SPECS
+
+    Returns:
+        tuple: (SQL query returning one row per cell labelled by a grain column, query parameters)
+    """
+    # Build WHERE clause with global filters only (local filters are applied in pandas)
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", global_filters['data_collection_period'])
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
+
+    # Add global region filter (optional)
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
+
+    where_clause = " AND ".join(where_clauses)
+
+    # Each grain, plus a check set (product dimensions only) when distinct counts need verifying
+    grouping_sets = {}
+    for grain, product_dimensions in spec['grains'].items():
+        grouping_sets[grain] = FACILITY_DIMENSIONS + product_dimensions
+        if _distinct_measures(spec):
+            grouping_sets[grain + CHECK_SUFFIX] = list(product_dimensions)
+
+    query = _grouping_sets_query(table_name, spec, where_clause, FACILITY_DIMENSIONS, grouping_sets)
+    return query, params
+
+
+def _product_dimensions(spec):
+    """Every product dimension column of the grains, in a stable order."""
+    dimensions = []
+    for product_dimensions in spec['grains'].values():
+        for column in product_dimensions:
+            if column not in dimensions:
+                dimensions.append(column)
+    return dimensions
+
+
+def _grouping_sets_query(table_name, spec, where_clause, key_dimensions, grouping_sets):
+    """
+    GROUPING SETS query over the raw table, each row labelled with its grouping set.
+
+    Args:
+        table_name: Table name
+        spec (dict): Cube layout from CUBE_SPECS
+        where_clause (str): WHERE predicates
+        key_dimensions (list): Raw columns grouped on besides the product dimensions
+        grouping_sets (dict): grain label -> grouping columns
+
+    Returns:
+        str: SQL query
+    """
+    # Every grouping column, in a stable order
+    dimensions = list(key_dimensions) + [
+        column for column in _product_dimensions(spec) if column not in key_dimensions
+    ]
+
+    # Label each output row with the grouping set it came from
+    grain_cases = []
+    for grain, columns in grouping_sets.items():
+        conditions = " AND ".join(
+            f"GROUPING({column}) = {0 if column in columns else 1}" for column in dimensions
+        )
+        grain_cases.append(f"WHEN {conditions} THEN '{grain}'")
+    grain_case_sql = "\n            ".join(grain_cases)
+
+    base_columns = list(key_dimensions) + [f"{expression} AS {name}" for name, expression in spec['columns'].items()]
+    base_columns += spec['inputs']
+    measure_columns = [f"{expression} AS {name}" for name, (expression, _) in spec['measures'].items()]
+    sets_sql = ",\n        ".join(f"({', '.join(columns)})" for columns in grouping_sets.values())
+
+    return f"""
+    WITH base AS (
+        SELECT {', '.join(base_columns)}
+        FROM {staged_table(table_name)}
+        WHERE {where_clause}
+    )
+    SELECT
+        CASE
+            {grain_case_sql}
+        END as grain,
+        {', '.join(dimensions)},
+        {', '.join(measure_columns)}
+    FROM base
+    GROUP BY GROUPING SETS (
+        {sets_sql}
+    )
+    """
+
+
+def build_summary_query(table_name, spec):
+    """
+    Build the query materializing a table's availability summary table.
+
+    One row per grain and cell of data_collection_period x country x
+    FACILITY_DIMENSIONS x <product dimensions>, over every row of the table.
+    Rows keep the staging layer's dimension values, so each section still
+    applies its own predicates (NULL regions, ...) to the cells.
+
+    Args:
+        table_name: Table name
+        spec (dict): Cube layout from CUBE_SPECS
+
+    Returns:
+        str: SQL query
+    """
+    key_dimensions = SUMMARY_KEY_DIMENSIONS
+    grouping_sets = {
+        grain: key_dimensions + product_dimensions
+        for grain, product_dimensions in spec['grains'].items()
+    }
+    return _grouping_sets_query(table_name, spec, "1=1", key_dimensions, grouping_sets)
+
+
+def build_cube_summary_query(summary_name, global_filters, spec):
+    """
+    Build the cube query for one table from its availability summary table.
+
+    Summary cells are summed over the selected periods and countries. The
+    distinct counts are additive across periods and countries because the
+    summary tables' consistency check verified it when they were built, so
+    no check sets are needed.
+
+    Args:
+        summary_name: Summary table name (see database/summary_tables.py)
+        global_filters (dict): Global filters from Data Selectors
+        spec (dict): Cube layout from CUBE_SPECS
+
+    Returns:
+        tuple: (SQL query returning one row per cell labelled by a grain column, query parameters)
+    """
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", global_filters['data_collection_period'])
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
+
+    # Add global region filter (optional)
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
+
+    where_clause = " AND ".join(where_clauses)
+    dimensions = ", ".join(FACILITY_DIMENSIONS + _product_dimensions(spec))
+    measure_columns = ", ".join(f"SUM({name}) AS {name}" for name in spec['measures'])
+
+    query = f"""
+    SELECT
+        grain,
+        {dimensions},
+        {measure_columns}
+    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{summary_name}`
+    WHERE {where_clause}
+    GROUP BY grain, {dimensions}
+    """
+    return query, params
+
+
+def _non_additive_grains(cells, spec):
+    """
+    Find grains whose distinct counts do not add up across facility cells.
+
+    Args:
+        cells (dict): grain name -> DataFrame of cells (including check sets)
+        spec (dict): Cube layout from CUBE_SPECS
+
+    Returns:
+        set: Grain names that must fall back to their own queries
+    """
+    distinct_measures = _distinct_measures(spec)
+    if not distinct_measures:
+        return set()
+
+    flagged = set()
+    for grain, product_dimensions in spec['grains'].items():
+        grain_cells = cells.get(grain)
+        check = cells.get(grain + CHECK_SUFFIX)
+        if grain_cells is None or check is None:
+            continue
+
+        # Sum the facility cells back up to the check set's grouping
+        summed = (
+            grain_cells.groupby(product_dimensions, dropna=False)[distinct_measures]
+            .sum()
+            .reset_index()
+        )
+        merged = check.merge(summed, on=product_dimensions, how='outer', suffixes=('', '_summed'))
+        for measure in distinct_measures:
+            expected = merged[measure].fillna(0).astype('int64')
+            actual = merged[f"{measure}_summed"].fillna(0).astype('int64')
+            if not (expected == actual).all():
+                flagged.add(grain)
+                break
+
+    return flagged
+
+
+@cached_query(show_spinner=False)
+def get_availability_cube(_client, table_name, global_filters):
+    """
+    Scan one table once for the given global filters and return its cube.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name (adl_surveys, adl_repeat_repivot, adl_surveys_repeat or adl_comparators)
+        global_filters (dict): Global filters from Data Selectors
+
+    Returns:
+        dict: {
+            'cells': {grain: DataFrame of facility cells},
+            'indexes': {grain: BitmapIndex of the cells},
+            'non_additive': set of grains that failed the additivity check
+        }
+        or None if the table has no cube or the query failed
+    """
+    spec = get_cube_spec(table_name)
+    if spec is None or not global_filters.get('data_collection_period'):
+        return None
+
+    summary = summary_table("availability", table_name)
+    if summary:
+        query, params = build_cube_summary_query(summary, global_filters, spec)
+    else:
+        query, params = build_cube_query(table_name, global_filters, spec)
+
+    try:
+        df = run_query(_client, query, params)
+    except Exception as e:
+        # Sections fall back to their own queries, which report errors themselves
+        print(f"⚠ Availability cube for {table_name} failed: {str(e)}", flush=True)
+        return None
+
+    cells = {grain: group.drop(columns=['grain']).reset_index(drop=True) for grain, group in df.groupby('grain')}
+    non_additive = _non_additive_grains(cells, spec)
+    if non_additive:
+        print(f"⚠ Availability cube for {table_name}: non-additive grains {sorted(non_additive)}", flush=True)
+
+    # Check sets are only needed for verification
+    cells = {grain: frame for grain, frame in cells.items() if not grain.endswith(CHECK_SUFFIX)}
+
+    indexes = {grain: BitmapIndex(frame) for grain, frame in cells.items()}
+    return {'cells': cells, 'indexes': indexes, 'non_additive': non_additive}
+
+
+def _select_cells(_client, table_name, global_filters, grain, local_regions=None, local_sectors=None):
+    """
+    Fetch a grain's cells from the cube and apply the local Region/Sector filters.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        global_filters (dict): Global filters from Data Selectors
+        grain (str): Grain name from CUBE_SPECS
+        local_regions (list): Selected regions from local Region dropdown
+        local_sectors (list): Selected sectors from local Sector dropdown
+
+    Returns:
+        pandas DataFrame of matching cells, or None if the section must run its own query
+    """
+    cube = get_availability_cube(_client, table_name, global_filters)
+    if cube is None or grain in cube['non_additive']:
+        return None
+
+    cells = cube['cells'].get(grain)
+    if cells is None:
+        spec = get_cube_spec(table_name)
+        if grain not in spec['grains']:
+            return None
+        # No rows matched the global filters
+        columns = ['region', 'sector', 'level_of_care'] + spec['grains'][grain] + list(spec['measures'])
+        return pd.DataFrame(columns=columns)
+
+    # Same semantics as "region IN (...)": NULL regions drop out once a filter is set
+    if local_regions or local_sectors:
+        cells = cells[cube['indexes'][grain].mask({'region': local_regions, 'sector': local_sectors})]
+
+    return cells
+
+
+def _is_true(series):
+    """Boolean mask for a nullable flag column (NULL counts as false, like in WHERE)."""
+    return series.fillna(False).astype(bool)
+
+
+def _is_present(series, excluded=()):
+    """Mask for 'col IS NOT NULL AND TRIM(col) != ''' plus any excluded placeholder values."""
+    mask = series.notna() & (series.astype('string').str.strip() != '')
+    if excluded:
+        mask &= ~series.isin(list(excluded))
+    return mask.fillna(False).astype(bool)
+
+
+def _round_half_away(values):
+    """ROUND(values, 1) with BigQuery's half-away-from-zero rounding."""
+    return np.sign(values) * np.floor(np.abs(values) * 10 + 0.5) / 10
+
+
+def _percentage(numerator, denominator):
+    """
+    CASE WHEN denominator > 0 THEN ROUND(numerator * 100.0 / denominator, 1) ELSE 0 END.
+
+    Rounds half away from zero like BigQuery's ROUND; a NULL numerator stays NULL.
+    """
+    numerator = pd.to_numeric(numerator).astype('float64')
+    denominator = pd.to_numeric(denominator).astype('float64')
+    ratio = numerator * 100.0 / denominator.where(denominator > 0)
+    return _round_half_away(ratio).where(denominator > 0, 0.0)
+
+
+def _aggregate(cells, group_by, measures, total_column, available_column):
+    """
+    Sum cells per group and rename measures to the section's column names.
+
+    Args:
+        cells (DataFrame): Filtered cube cells
+        group_by (list): Output grouping columns
+        measures (tuple): (total measure, available measure) cube column names
+        total_column (str): Output name for the total count
+        available_column (str): Output name for the available count
+
+    Returns:
+        pandas DataFrame with group_by columns, both counts and availability_percentage
+    """
+    total_measure, available_measure = measures
+    df = (
+        cells.groupby(group_by, dropna=False, sort=False)
+        .agg(**{
+            total_column: (total_measure, 'sum'),
+            available_column: (available_measure, lambda values: values.sum(min_count=1)),
+        })
+        .reset_index()
+    )
+    df['availability_percentage'] = _percentage(df[available_column], df[total_column])
+    return df
+
+
+def _sorted(df, by, ascending=True, na_position='last'):
+    """Stable sort so ties keep a deterministic order."""
+    return df.sort_values(by, ascending=ascending, kind='mergesort', na_position=na_position).reset_index(drop=True)
+
+
+# ============================================================================
+# Section derivations (each mirrors the SQL of its bigquery_client function)
+# ============================================================================
+
+def insulin_availability_metrics(_client, table_name, global_filters, local_regions, local_sectors):
+    """
+    Derive the Plan 3 scorecard metrics from the adl_surveys cube.
+
+    Returns:
+        dict like get_insulin_availability_metrics, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'sector', local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    total = int(cells['facilities'].sum())
+    available = cells['facilities_available'].sum()
+    available = int(available) if pd.notna(available) else 0
+    unavailable_pct = 0.0
+    if total > 0:
+        unavailable_pct = float(_round_half_away(100 - (available * 100.0) / total))
+
+    return {
+        'facilities_with_availability': available,
+        'total_facilities': total,
+        'unavailability_percentage': unavailable_pct
+    }
+
+
+def insulin_by_sector_chart(_client, table_name, global_filters, local_regions):
+    """
+    Derive the Plan 4 by-sector chart data from the adl_surveys cube.
+
+    Returns:
+        DataFrame like get_insulin_by_sector_chart_data, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'sector', local_regions)
+    if cells is None:
+        return None
+
+    cells = cells[_is_present(cells['sector'])]
+    df = _aggregate(cells, ['sector', 'sector_order'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    return _sorted(df, ['sector_order', 'sector'])
+
+
+def insulin_by_type_chart(_client, table_name, global_filters, local_regions, local_sectors, insulin_class):
+    """
+    Derive the Plan 5 by-type chart data (insulin_class 'Human' or 'Analogue').
+
+    Returns:
+        DataFrame like get_insulin_by_type_human_chart_data, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'type', local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_present(cells['insulin_type'])]
+    cells = cells[cells['insulin_type'].str.contains(insulin_class, regex=False, na=False)]
+    df = _aggregate(cells, ['insulin_type', 'insulin_type_order'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    return _sorted(df, 'insulin_type_order')
+
+
+def insulin_by_region_chart(_client, table_name, global_filters, local_sectors, insulin_class):
+    """
+    Derive the Plan 6 by-region chart data (insulin_class 'Human' or 'Analogue').
+
+    Returns:
+        DataFrame like get_insulin_by_region_human_chart_data, or None to fall back
+    """
+    grain = insulin_class.lower()
+    cells = _select_cells(_client, table_name, global_filters, grain, local_sectors=local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_true(cells[f"is_{grain}"]) & _is_present(cells['region'])]
+    df = _aggregate(cells, ['region'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    return _sorted(df, 'region')
+
+
+def insulin_public_levelcare_chart(_client, table_name, global_filters, local_regions, insulin_class):
+    """
+    Derive the Plan 7 public-sector level-of-care chart data (insulin_class 'Human' or 'Analogue').
+
+    Returns:
+        DataFrame like get_insulin_public_levelcare_human_chart_data, or None to fall back
+    """
+    grain = insulin_class.lower()
+    cells = _select_cells(_client, table_name, global_filters, grain, local_regions)
+    if cells is None:
+        return None
+
+    cells = cells[
+        _is_true(cells[f"is_{grain}"])
+        & cells['sector'].str.contains('Public', regex=False, na=False)
+        & _is_present(cells['level_of_care'], excluded=('NULL', '---'))
+    ]
+    df = _aggregate(cells, ['level_of_care'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    return _sorted(df, 'level_of_care')
+
+
+def insulin_by_inn_chart(_client, table_name, global_filters, local_regions, local_sectors):
+    """
+    Derive the Plan 8 by-INN chart data (availability > 0 only).
+
+    Returns:
+        DataFrame like get_insulin_by_inn_chart_data, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'inn', local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_present(cells['insulin_inn'], excluded=('NULL',))]
+    df = _aggregate(cells, ['insulin_inn'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    df = df[df['availability_percentage'] > 0]
+    return _sorted(df, 'availability_percentage', ascending=False)
+
+
+def insulin_brand_counts(_client, table_name, global_filters, local_sectors):
+    """
+    Derive the Plan 9 record counts per brand, before the top 10 + "Other" step.
+
+    Returns:
+        DataFrame with insulin_brand and record_count (descending), or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'brand', local_sectors=local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_present(cells['insulin_brand'], excluded=('NULL', '---'))]
+    df = (
+        cells.groupby('insulin_brand', sort=False)['record_count']
+        .sum()
+        .reset_index()
+    )
+    return _sorted(df, 'record_count', ascending=False)
+
+
+def insulin_by_presentation_chart(_client, table_name, global_filters, local_regions, local_sectors):
+    """
+    Derive the Plan 10 presentation x type chart data (availability > 0 only).
+
+    Returns:
+        DataFrame like get_insulin_by_presentation_chart_data, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'presentation', local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[
+        _is_present(cells['insulin_presentation'], excluded=('NULL',))
+        & _is_present(cells['insulin_type'], excluded=('NULL',))
+    ]
+    df = _aggregate(cells, ['insulin_presentation', 'insulin_type'], ('facilities', 'facilities_available'),
+                    'total_facilities', 'facilities_with_insulin')
+    df = df[df['availability_percentage'] > 0]
+    return _sorted(df, 'availability_percentage', ascending=False)
+
+
+def insulin_originator_metric(_client, table_name, global_filters, local_regions, local_sectors,
+                              insulin_class, originator):
+    """
+    Derive a Plan 11 scorecard (insulin_class 'Human'/'Analogue', originator
+    'Originator Brand'/'Biosimilar').
+
+    Returns:
+        float availability percentage, or None to fall back
+    """
+    grain = insulin_class.lower()
+    cells = _select_cells(_client, table_name, global_filters, f"originator_{grain}", local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_true(cells[f"is_{grain}"]) & (cells['insulin_originator_biosimilar'] == originator)]
+    total = cells['facilities'].sum()
+    available = cells['facilities_available'].sum()
+    percentage = _percentage(pd.Series([available]), pd.Series([total])).iloc[0]
+    return float(percentage) if pd.notna(percentage) else 0.0
+
+
+def comparator_medicine_table(_client, table_name, global_filters, local_regions, local_sectors):
+    """
+    Derive the Plan 12 comparator medicine table from the adl_comparators cube.
+
+    Returns:
+        DataFrame like get_comparator_medicine_table_data, or None to fall back
+    """
+    cells = _select_cells(_client, table_name, global_filters, 'comparator', local_regions, local_sectors)
+    if cells is None:
+        return None
+
+    cells = cells[_is_present(cells['name']) & cells['strength'].notna()]
+    df = _aggregate(cells, ['name', 'strength'], ('surveys', 'surveys_available'),
+                    'total_surveys', 'surveys_with_medicine')
+    return _sorted(df, 'name', ascending=False)
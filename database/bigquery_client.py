@@ -7,12 +7,46 @@ from google.cloud import bigquery
 from google.oauth2 import service_account
 import config
 import traceback
+from database.local_replica import LocalReplicaClient
+from database.freshness import cached_query
+from database import availability_cube, dimension_index, metric_batch, semantic_cache
+from database.query_builder import add_in_filter, canonical_values, cutoff_date
+from database.staging import find_staging_tables, sector_category_flag, staged_table
+from database.statistics_mode import statistics_mode
+from database.query_runner import arrow_to_dataframe, run_query, run_query_arrow
+from utils.data_processing import compact_result
 
 
 @st.cache_resource
 def get_bigquery_client():
     """
-    Create and cache a BigQuery client connection.
+    Create and cache the client used by every query function.
+
+    Returns a LocalReplicaClient when config.LOCAL_REPLICA_ENABLED is set, so
+    queries are answered from the local Parquet snapshot; otherwise returns a
+    BigQuery client (see create_bigquery_client). Also looks up which staging
+    tables are built (database/staging.py).
+    """
+    if config.LOCAL_REPLICA_ENABLED:
+        print(f"Loading local replica from {config.LOCAL_REPLICA_DIR}...", flush=True)
+        try:
+            client = LocalReplicaClient(config.LOCAL_REPLICA_DIR)
+            print("✓ Local replica client created!", flush=True)
+        except Exception as e:
+            print(f"✗ Local replica failed: {str(e)}", flush=True)
+            st.error(f"⚠️ Failed to load the local replica: {str(e)}")
+            return None
+    else:
+        client = create_bigquery_client()
+
+    if client is not None:
+        find_staging_tables(client)
+    return client
+
+
+def create_bigquery_client():
+    """
+    Create a BigQuery client connection.
     Priority order:
     1. Streamlit secrets (for cloud deployment)
     2. Service account key file (for local development)
@@ -70,8 +104,9 @@ def get_bigquery_client():
         return None
 
 
-@st.cache_data(ttl=600)
-def query_table(_client, table_name, limit=100):
+@cached_query
+@compact_result
+def query_table(_client, table_name, limit=100, as_arrow=False):
     """
     Query a BigQuery table and return results as a pandas DataFrame.
 
@@ -79,9 +114,10 @@ def query_table(_client, table_name, limit=100):
         _client: BigQuery client instance
         table_name: Name of the table to query
         limit: Maximum number of rows to return (default: 100)
+        as_arrow: Return the pyarrow.Table instead of pandas (default: False)
 
     Returns:
-        pandas DataFrame with query results
+        pandas DataFrame with query results (country/region/sector as categoricals)
     """
     query = f"""
         SELECT *
@@ -90,34 +126,39 @@ def query_table(_client, table_name, limit=100):
     """
 
     try:
-        df = _client.query(query).to_dataframe()
-        return df
+        # Bulk result: Arrow download, dictionary-encoded strings
+        table = run_query_arrow(_client, query)
+        return table if as_arrow else arrow_to_dataframe(table)
     except Exception as e:
         st.error(f"Error querying table {table_name}: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
-def run_custom_query(_client, query):
+@cached_query
+@compact_result
+def run_custom_query(_client, query, as_arrow=False):
     """
     Execute a custom SQL query and return results as a pandas DataFrame.
 
     Args:
         _client: BigQuery client instance
         query: SQL query string
+        as_arrow: Return the pyarrow.Table instead of pandas (default: False)
 
     Returns:
-        pandas DataFrame with query results
+        pandas DataFrame with query results (country/region/sector as categoricals)
     """
     try:
-        df = _client.query(query).to_dataframe()
-        return df
+        # Bulk result: Arrow download, dictionary-encoded strings
+        table = run_query_arrow(_client, query)
+        return table if as_arrow else arrow_to_dataframe(table)
     except Exception as e:
         st.error(f"Error executing query: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_table_schema(_client, table_name):
     """
     Get the schema of a BigQuery table.
@@ -148,7 +189,8 @@ def get_table_schema(_client, table_name):
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_row_count(_client, table_name):
     """
     Get the total row count for a table.
@@ -166,7 +208,7 @@ def get_row_count(_client, table_name):
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query)
         return result['row_count'].iloc[0]
     except Exception as e:
         st.error(f"Error getting row count for {table_name}: {str(e)}")
@@ -174,7 +216,8 @@ def get_row_count(_client, table_name):
 
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_grouped_counts(_client, table_name, group_by_column, sort_desc=True):
     """
     Get grouped counts for a specific column.
@@ -189,26 +232,28 @@ def get_grouped_counts(_client, table_name, group_by_column, sort_desc=True):
         pandas DataFrame with grouped counts
     """
     order_clause = "DESC" if sort_desc else "ASC"
+    params = {"cutoff_date": cutoff_date()}
     query = f"""
         SELECT
             {group_by_column},
             COUNT(DISTINCT form_case__case_id) as survey_count
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE survey_date IS NOT NULL
-            AND survey_date < CURRENT_DATE()
+            AND survey_date < @cutoff_date
         GROUP BY {group_by_column}
         ORDER BY survey_count {order_clause}
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting grouped counts for {group_by_column}: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_country_counts_by_period(_client, table_name, selected_periods):
     """
     Get country counts filtered by selected data collection periods.
@@ -224,31 +269,34 @@ def get_country_counts_by_period(_client, table_name, selected_periods):
     if not selected_periods:
         return None
     
-    periods_str = "', '".join(selected_periods)
+    params = {
+        "data_collection_period": canonical_values(selected_periods),
+        "cutoff_date": cutoff_date()
+    }
     
     query = f"""
         SELECT
             country,
             COUNT(DISTINCT form_case__case_id) as survey_count
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE survey_date IS NOT NULL
-            AND survey_date < CURRENT_DATE()
-            AND data_collection_period IN ('{periods_str}')
+            AND survey_date < @cutoff_date
+            AND data_collection_period IN UNNEST(@data_collection_period)
             AND country IS NOT NULL
-            AND country != ''
         GROUP BY country
         ORDER BY survey_count DESC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting country counts by period: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_region_counts_by_period(_client, table_name, selected_periods):
     """
     Get region counts filtered by selected data collection periods.
@@ -264,24 +312,26 @@ def get_region_counts_by_period(_client, table_name, selected_periods):
     if not selected_periods:
         return None
     
-    periods_str = "', '".join(selected_periods)
+    params = {
+        "data_collection_period": canonical_values(selected_periods),
+        "cutoff_date": cutoff_date()
+    }
     
     query = f"""
         SELECT
             region,
             COUNT(DISTINCT form_case__case_id) as survey_count
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE survey_date IS NOT NULL
-            AND survey_date < CURRENT_DATE()
-            AND data_collection_period IN ('{periods_str}')
+            AND survey_date < @cutoff_date
+            AND data_collection_period IN UNNEST(@data_collection_period)
             AND region IS NOT NULL
-            AND region != ''
         GROUP BY region
         ORDER BY survey_count DESC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting region counts by period: {str(e)}")
@@ -289,7 +339,8 @@ def get_region_counts_by_period(_client, table_name, selected_periods):
 
 
 
-@st.cache_data(ttl=60)
+@cached_query
+@compact_result
 def get_sector_counts_by_period(_client, table_name, selected_periods):
     """
     Get sector counts filtered by selected data collection periods.
@@ -305,35 +356,36 @@ def get_sector_counts_by_period(_client, table_name, selected_periods):
     if not selected_periods:
         return None
     
-    periods_str = "', '".join(selected_periods)
+    params = {
+        "data_collection_period": canonical_values(selected_periods),
+        "cutoff_date": cutoff_date()
+    }
     
     query = f"""
         SELECT
             sector,
             COUNT(DISTINCT form_case__case_id) as survey_count
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE survey_date IS NOT NULL
-            AND survey_date < CURRENT_DATE()
-            AND data_collection_period IN ('{periods_str}')
+            AND survey_date < @cutoff_date
+            AND data_collection_period IN UNNEST(@data_collection_period)
             AND country IS NOT NULL
-            AND country != ''
             AND region IS NOT NULL
-            AND region != ''
             AND sector IS NOT NULL
-            AND sector != ''
         GROUP BY sector
         ORDER BY survey_count DESC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting sector counts by period: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=60)  # Reduced to 60 seconds for testing
+@cached_query
+@compact_result
 def get_data_collection_periods(_client, table_name):
     """
     Get data collection periods with survey counts and start dates.
@@ -348,14 +400,13 @@ def get_data_collection_periods(_client, table_name):
     """
     # Build WHERE clauses - same as get_selected_periods_summary()
     where_clauses = []
+    params = {}
     where_clauses.append("data_collection_period IS NOT NULL")
-    where_clauses.append("data_collection_period != 'Click here to select...'")
     where_clauses.append("survey_date IS NOT NULL")
-    where_clauses.append("survey_date < CURRENT_DATE()")
+    where_clauses.append("survey_date < @cutoff_date")
+    params["cutoff_date"] = cutoff_date()
     where_clauses.append("country IS NOT NULL")
-    where_clauses.append("country != ''")
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("region != ''")
     
     where_clause = " AND ".join(where_clauses)
     
@@ -364,21 +415,22 @@ def get_data_collection_periods(_client, table_name):
             data_collection_period,
             COUNT(DISTINCT form_case__case_id) as survey_count,
             MIN(survey_date) as first_survey_date
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE {where_clause}
         GROUP BY data_collection_period
         ORDER BY data_collection_period DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting data collection periods: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_selected_periods_summary(_client, table_name, selected_periods, selected_countries=None, selected_regions=None):
     """
     Get summary table for selected data collection periods.
@@ -396,29 +448,21 @@ def get_selected_periods_summary(_client, table_name, selected_periods, selected
     if not selected_periods:
         return None
     
-    # Build the WHERE clause for selected periods
-    periods_str = "', '".join(selected_periods)
-    
     # Build WHERE clauses
     where_clauses = []
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
-    where_clauses.append("data_collection_period != 'Click here to select...'")
+    params = {}
+    add_in_filter(where_clauses, params, "data_collection_period", selected_periods)
     where_clauses.append("survey_date IS NOT NULL")
-    where_clauses.append("survey_date < CURRENT_DATE()")
+    where_clauses.append("survey_date < @cutoff_date")
+    params["cutoff_date"] = cutoff_date()
     where_clauses.append("country IS NOT NULL")
-    where_clauses.append("country != ''")
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("region != ''")
     
     # Add country filter if provided
-    if selected_countries:
-        countries_str = "', '".join(selected_countries)
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", selected_countries)
     
     # Add region filter if provided
-    if selected_regions:
-        regions_str = "', '".join(selected_regions)
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", selected_regions)
     
     where_clause = " AND ".join(where_clauses)
     
@@ -428,22 +472,23 @@ def get_selected_periods_summary(_client, table_name, selected_periods, selected
             MIN(survey_date) as first_survey_date,
             MAX(survey_date) as last_survey_date,
             COUNT(DISTINCT form_case__case_id) as survey_count
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE {where_clause}
         GROUP BY data_collection_period
         ORDER BY data_collection_period DESC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting selected periods summary: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
-def get_facility_data(_client, table_name, selected_periods, selected_countries=None, selected_regions=None):
+@cached_query
+@compact_result
+def get_facility_data(_client, table_name, selected_periods, selected_countries=None, selected_regions=None, as_arrow=False):
     """
     Get facility data for the selected filters.
     
@@ -453,24 +498,22 @@ def get_facility_data(_client, table_name, selected_periods, selected_countries=
         selected_periods: List of selected data collection periods
         selected_countries: List of selected countries (optional)
         selected_regions: List of selected regions (optional)
+        as_arrow: Return the pyarrow.Table instead of pandas (default: False)
     
     Returns:
-        pandas DataFrame with facility data
+        pandas DataFrame with facility data (country/region/sector as categoricals)
     """
     if not selected_periods:
         return None
     
     # Build the WHERE clause
-    periods_str = "', '".join(selected_periods)
-    where_clauses = [f"data_collection_period IN ('{periods_str}')"]
+    where_clauses = []
+    params = {}
+    add_in_filter(where_clauses, params, "data_collection_period", selected_periods)
     
-    if selected_countries:
-        countries_str = "', '".join(selected_countries)
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", selected_countries)
     
-    if selected_regions:
-        regions_str = "', '".join(selected_regions)
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", selected_regions)
     
     where_clause = " AND ".join(where_clauses)
     
@@ -487,14 +530,16 @@ def get_facility_data(_client, table_name, selected_periods, selected_countries=
     """
     
     try:
-        df = _client.query(query).to_dataframe()
-        return df
+        # Bulk result: Arrow download, dictionary-encoded strings
+        table = run_query_arrow(_client, query, params)
+        return table if as_arrow else arrow_to_dataframe(table)
     except Exception as e:
         st.error(f"Error getting facility data: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def fetch_facility_statistics(_client, table_name, filters):
     """
     Fetch facility statistics from database using optimized single query.
@@ -517,53 +562,49 @@ def fetch_facility_statistics(_client, table_name, filters):
     
     # Build the WHERE clause with filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
     
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
     
     # Add date validation filters to exclude invalid records
     where_clauses.append("survey_date IS NOT NULL")
-    where_clauses.append("survey_date < CURRENT_DATE()")
+    where_clauses.append("survey_date < @cutoff_date")
+    params["cutoff_date"] = cutoff_date()
     
     # Exclude NULL/empty country and region to match dropdown filters
     where_clauses.append("country IS NOT NULL")
-    where_clauses.append("country != ''")
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("region != ''")
     
     where_clause = " AND ".join(where_clauses)
     
     # Optimized single query with conditional aggregation
-    # Using COALESCE to handle NULL values
+    # Sector categories are precomputed flags of the staging layer
+    public = sector_category_flag("public")
     query = f"""
     SELECT
         COUNT(DISTINCT form_case__case_id) as total_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Public%' THEN form_case__case_id END) as public_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Public%' AND COALESCE(level_of_care, '') = 'Primary' THEN form_case__case_id END) as primary_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Public%' AND COALESCE(level_of_care, '') = 'Secondary' THEN form_case__case_id END) as secondary_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Public%' AND COALESCE(level_of_care, '') = 'Tertiary' THEN form_case__case_id END) as tertiary_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Private Pharmacy%' THEN form_case__case_id END) as private_pharmacies,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%NGO%' THEN form_case__case_id END) as ngo_facilities,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Private Hospital or Clinic%' THEN form_case__case_id END) as private_hospitals,
-        COUNT(DISTINCT CASE WHEN COALESCE(sector, '') LIKE '%Other%' AND COALESCE(sector, '') NOT LIKE '%Public%' AND COALESCE(sector, '') NOT LIKE '%Private Pharmacy%' AND COALESCE(sector, '') NOT LIKE '%NGO%' AND COALESCE(sector, '') NOT LIKE '%Private Hospital or Clinic%' THEN form_case__case_id END) as other_facilities
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        COUNT(DISTINCT CASE WHEN {public} THEN form_case__case_id END) as public_facilities,
+        COUNT(DISTINCT CASE WHEN {public} AND level_of_care = 'Primary' THEN form_case__case_id END) as primary_facilities,
+        COUNT(DISTINCT CASE WHEN {public} AND level_of_care = 'Secondary' THEN form_case__case_id END) as secondary_facilities,
+        COUNT(DISTINCT CASE WHEN {public} AND level_of_care = 'Tertiary' THEN form_case__case_id END) as tertiary_facilities,
+        COUNT(DISTINCT CASE WHEN {sector_category_flag("private_pharmacy")} THEN form_case__case_id END) as private_pharmacies,
+        COUNT(DISTINCT CASE WHEN {sector_category_flag("ngo")} THEN form_case__case_id END) as ngo_facilities,
+        COUNT(DISTINCT CASE WHEN {sector_category_flag("private_hospital")} THEN form_case__case_id END) as private_hospitals,
+        COUNT(DISTINCT CASE WHEN {sector_category_flag("other")} THEN form_case__case_id END) as other_facilities
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
     
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
         
         if result.empty:
             return None
@@ -670,7 +711,8 @@ def validate_facility_stats(stats):
 
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_sector_values(_client, table_name, filters):
     """
     Get actual distinct sector values to help debug query issues.
@@ -688,21 +730,17 @@ def get_sector_values(_client, table_name, filters):
     
     # Build the WHERE clause with filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
     
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
     
     where_clause = " AND ".join(where_clauses)
     
@@ -728,7 +766,7 @@ def get_sector_values(_client, table_name, filters):
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting sector values: {str(e)}")
@@ -736,7 +774,8 @@ def get_sector_values(_client, table_name, filters):
 
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability component.
@@ -756,28 +795,29 @@ def get_insulin_regions(_client, table_name, global_filters):
     """
     if not global_filters.get('data_collection_period'):
         return None
+
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region')
+        if derived is not None:
+            return derived
     
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
     
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
     
     # Exclude NULL regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
     
     where_clause = " AND ".join(where_clauses)
     
@@ -785,21 +825,22 @@ def get_insulin_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region ASC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_sectors(_client, table_name, global_filters, local_regions):
     """
     Get sectors for local Sector dropdown in Insulin Availability component.
@@ -815,33 +856,32 @@ def get_insulin_sectors(_client, table_name, global_filters, local_regions):
     """
     if not global_filters.get('data_collection_period'):
         return None
+
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', local_regions=local_regions)
+        if derived is not None:
+            return derived
     
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
     
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
     
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
     
     # Exclude NULL sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
     
     where_clause = " AND ".join(where_clauses)
     
@@ -849,21 +889,22 @@ def get_insulin_sectors(_client, table_name, global_filters, local_regions):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector ASC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600, show_spinner=False)
+@cached_query(show_spinner=False)
+@compact_result
 def get_insulin_availability_metrics(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get insulin availability metrics for scorecards.
@@ -884,34 +925,32 @@ def get_insulin_availability_metrics(_client, table_name, global_filters, local_
     """
     if not global_filters.get('data_collection_period'):
         return None
+
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_availability_metrics(_client, table_name, global_filters, local_regions, local_sectors)
+        if derived is not None:
+            return derived
     
     # Build WHERE clause with all filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
     
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
     
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
     
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
     
     where_clause = " AND ".join(where_clauses)
     
@@ -924,12 +963,12 @@ def get_insulin_availability_metrics(_client, table_name, global_filters, local_
             THEN ROUND(100 - ((COALESCE(SUM(COALESCE(insulin_available_num, 0)), 0) * 100.0) / COUNT(DISTINCT form_case__case_id)), 1)
             ELSE 0
         END as unavailability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
     
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
         
         if result.empty:
             return None
@@ -955,7 +994,8 @@ def get_insulin_availability_metrics(_client, table_name, global_filters, local_
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_sector_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - By Sector component.
@@ -975,29 +1015,29 @@ def get_insulin_by_sector_regions(_client, table_name, global_filters):
     """
     if not global_filters.get('data_collection_period'):
         return None
+
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
     
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
     
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
     
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
     
     where_clause = " AND ".join(where_clauses)
     
@@ -1005,21 +1045,22 @@ def get_insulin_by_sector_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by sector regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_sector_chart_data(_client, table_name, global_filters, local_regions):
     """
     Get insulin availability percentages by sector for bar chart.
@@ -1040,40 +1081,39 @@ def get_insulin_by_sector_chart_data(_client, table_name, global_filters, local_
     """
     if not global_filters.get('data_collection_period'):
         return None
+
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_sector_chart(_client, table_name, global_filters, local_regions)
+        if derived is not None:
+            return derived
     
     # Build WHERE clause with global + local region filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
     
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
     
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
     
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
     
     where_clause = " AND ".join(where_clauses)
     
     query = f"""
     SELECT
         sector,
-        SAFE_CAST(sector_order AS INT64) as sector_order,
+        sector_order,
         COUNT(DISTINCT form_case__case_id) as total_facilities,
         SUM(COALESCE(insulin_available_num, 0)) as facilities_with_insulin,
         CASE
@@ -1081,14 +1121,14 @@ def get_insulin_by_sector_chart_data(_client, table_name, global_filters, local_
             THEN ROUND((SUM(COALESCE(insulin_available_num, 0)) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector, sector_order
-    ORDER BY SAFE_CAST(sector_order AS INT64) ASC NULLS LAST, sector ASC
+    ORDER BY sector_order ASC NULLS LAST, sector ASC
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by sector chart data: {str(e)}")
@@ -1099,7 +1139,8 @@ def get_insulin_by_sector_chart_data(_client, table_name, global_filters, local_
 # Plan 5: Insulin Availability - By Insulin Type Functions
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_type_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - By Insulin Type component.
@@ -1120,28 +1161,28 @@ def get_insulin_by_type_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1149,21 +1190,22 @@ def get_insulin_by_type_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by type regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_type_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin Availability - By Insulin Type component.
@@ -1179,27 +1221,28 @@ def get_insulin_by_type_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1207,21 +1250,22 @@ def get_insulin_by_type_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by type sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_type_human_chart_data(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get insulin availability percentages by insulin type for Human insulin bar chart.
@@ -1244,37 +1288,40 @@ def get_insulin_by_type_human_chart_data(_client, table_name, global_filters, lo
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_type_chart(_client, table_name, global_filters, local_regions, local_sectors, 'Human')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Analogue chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'by_type_charts', 'human', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty insulin types and filter for Human
     where_clauses.append("insulin_type IS NOT NULL")
-    where_clauses.append("TRIM(insulin_type) != ''")
     where_clauses.append("insulin_type LIKE '%Human%'")
 
     where_clause = " AND ".join(where_clauses)
@@ -1290,21 +1337,22 @@ def get_insulin_by_type_human_chart_data(_client, table_name, global_filters, lo
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_type, insulin_type_order
     ORDER BY insulin_type_order ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by type (Human) chart data: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_type_analogue_chart_data(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get insulin availability percentages by insulin type for Analogue insulin bar chart.
@@ -1327,37 +1375,40 @@ def get_insulin_by_type_analogue_chart_data(_client, table_name, global_filters,
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_type_chart(_client, table_name, global_filters, local_regions, local_sectors, 'Analogue')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Human chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'by_type_charts', 'analogue', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty insulin types and filter for Analogue
     where_clauses.append("insulin_type IS NOT NULL")
-    where_clauses.append("TRIM(insulin_type) != ''")
     where_clauses.append("insulin_type LIKE '%Analogue%'")
 
     where_clause = " AND ".join(where_clauses)
@@ -1373,14 +1424,14 @@ def get_insulin_by_type_analogue_chart_data(_client, table_name, global_filters,
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_type, insulin_type_order
     ORDER BY insulin_type_order ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by type (Analogue) chart data: {str(e)}")
@@ -1389,7 +1440,8 @@ def get_insulin_by_type_analogue_chart_data(_client, table_name, global_filters,
 
 # Plan 6: Insulin Availability - By Region functions
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_region_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin Availability - By Region component.
@@ -1405,27 +1457,28 @@ def get_insulin_by_region_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1433,21 +1486,22 @@ def get_insulin_by_region_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by region sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_region_human_chart_data(_client, table_name, global_filters, local_sectors):
     """
     Get insulin availability percentages by region for Human insulin bar chart.
@@ -1468,32 +1522,37 @@ def get_insulin_by_region_human_chart_data(_client, table_name, global_filters,
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_region_chart(_client, table_name, global_filters, local_sectors, 'Human')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Analogue chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'by_region_charts', 'human', global_filters, local_sectors=local_sectors)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local sector filter
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty regions and filter for Human insulin
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
     where_clauses.append("insulin_type IS NOT NULL")
     where_clauses.append("insulin_type LIKE '%Human%'")
 
@@ -1509,21 +1568,22 @@ def get_insulin_by_region_human_chart_data(_client, table_name, global_filters,
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by region (Human) chart data: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_region_analogue_chart_data(_client, table_name, global_filters, local_sectors):
     """
     Get insulin availability percentages by region for Analogue insulin bar chart.
@@ -1544,32 +1604,37 @@ def get_insulin_by_region_analogue_chart_data(_client, table_name, global_filter
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_region_chart(_client, table_name, global_filters, local_sectors, 'Analogue')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Human chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'by_region_charts', 'analogue', global_filters, local_sectors=local_sectors)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local sector filter
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty regions and filter for Analogue insulin
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
     where_clauses.append("insulin_type IS NOT NULL")
     where_clauses.append("insulin_type LIKE '%Analogue%'")
 
@@ -1585,14 +1650,14 @@ def get_insulin_by_region_analogue_chart_data(_client, table_name, global_filter
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by region (Analogue) chart data: {str(e)}")
@@ -1603,7 +1668,8 @@ def get_insulin_by_region_analogue_chart_data(_client, table_name, global_filter
 # Plan 7: Insulin Availability - Public Sector - By Level of Care Functions
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_public_levelcare_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - Public Sector - By Level of Care component.
@@ -1624,31 +1690,31 @@ def get_insulin_public_levelcare_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', public_only=True)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add implicit Public sector filter (ALWAYS)
-    where_clauses.append("sector LIKE '%Public%'")
+    where_clauses.append(sector_category_flag("public"))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1656,21 +1722,22 @@ def get_insulin_public_levelcare_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin public levelcare regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_public_levelcare_human_chart_data(_client, table_name, global_filters, local_regions):
     """
     Get insulin availability percentages by level of care for Human insulin in Public sector.
@@ -1691,38 +1758,42 @@ def get_insulin_public_levelcare_human_chart_data(_client, table_name, global_fi
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_public_levelcare_chart(_client, table_name, global_filters, local_regions, 'Human')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Analogue chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'public_levelcare_charts', 'human', global_filters, local_regions)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local region filter
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add implicit Public sector filter (ALWAYS)
-    where_clauses.append("sector LIKE '%Public%'")
+    where_clauses.append(sector_category_flag("public"))
 
     # Filter for Human insulin and exclude NULL/empty level_of_care
     where_clauses.append("insulin_type IS NOT NULL")
     where_clauses.append("insulin_type LIKE '%Human%'")
     where_clauses.append("level_of_care IS NOT NULL")
-    where_clauses.append("TRIM(level_of_care) != ''")
-    where_clauses.append("level_of_care NOT IN ('NULL', '---')")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1736,21 +1807,22 @@ def get_insulin_public_levelcare_human_chart_data(_client, table_name, global_fi
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY level_of_care
     ORDER BY level_of_care ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin public levelcare (Human) chart data: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_public_levelcare_analogue_chart_data(_client, table_name, global_filters, local_regions):
     """
     Get insulin availability percentages by level of care for Analogue insulin in Public sector.
@@ -1771,38 +1843,42 @@ def get_insulin_public_levelcare_analogue_chart_data(_client, table_name, global
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_public_levelcare_chart(_client, table_name, global_filters, local_regions, 'Analogue')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the Human chart (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'public_levelcare_charts', 'analogue', global_filters, local_regions)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause with global + local region filter
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add implicit Public sector filter (ALWAYS)
-    where_clauses.append("sector LIKE '%Public%'")
+    where_clauses.append(sector_category_flag("public"))
 
     # Filter for Analogue insulin and exclude NULL/empty level_of_care
     where_clauses.append("insulin_type IS NOT NULL")
     where_clauses.append("insulin_type LIKE '%Analogue%'")
     where_clauses.append("level_of_care IS NOT NULL")
-    where_clauses.append("TRIM(level_of_care) != ''")
-    where_clauses.append("level_of_care NOT IN ('NULL', '---')")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1816,14 +1892,14 @@ def get_insulin_public_levelcare_analogue_chart_data(_client, table_name, global
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY level_of_care
     ORDER BY level_of_care ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin public levelcare (Analogue) chart data: {str(e)}")
@@ -1834,7 +1910,8 @@ def get_insulin_public_levelcare_analogue_chart_data(_client, table_name, global
 # Plan 8: Insulin Availability - By INN Functions
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_inn_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - By INN component.
@@ -1855,28 +1932,28 @@ def get_insulin_by_inn_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1884,21 +1961,22 @@ def get_insulin_by_inn_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by INN regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_inn_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin Availability - By INN component.
@@ -1914,28 +1992,28 @@ def get_insulin_by_inn_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
-    where_clauses.append("sector != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -1943,21 +2021,22 @@ def get_insulin_by_inn_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by INN sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_inn_chart_data(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get insulin availability percentages by insulin INN, ONLY showing insulins with availability > 0%.
@@ -1981,38 +2060,34 @@ def get_insulin_by_inn_chart_data(_client, table_name, global_filters, local_reg
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_inn_chart(_client, table_name, global_filters, local_regions, local_sectors)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global + local region + local sector filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty insulin_inn
     where_clauses.append("insulin_inn IS NOT NULL")
-    where_clauses.append("TRIM(insulin_inn) != ''")
-    where_clauses.append("insulin_inn != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2026,7 +2101,7 @@ def get_insulin_by_inn_chart_data(_client, table_name, global_filters, local_reg
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_inn
     HAVING
@@ -2039,7 +2114,7 @@ def get_insulin_by_inn_chart_data(_client, table_name, global_filters, local_reg
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by INN chart data: {str(e)}")
@@ -2050,7 +2125,8 @@ def get_insulin_by_inn_chart_data(_client, table_name, global_filters, local_reg
 # Plan 9: Insulin - Top 10 Brands Functions
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_top_brands_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin - Top 10 brands component.
@@ -2071,28 +2147,28 @@ def get_insulin_top_brands_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
-    where_clauses.append("sector != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2100,21 +2176,67 @@ def get_insulin_top_brands_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin top brands sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+def _top_brands_with_other(df):
+    """
+    Keep the top 10 brands by record count and fold the rest into "Other".
+
+    Args:
+        df: DataFrame with insulin_brand and record_count, sorted by record_count descending
+
+    Returns:
+        pandas DataFrame with insulin_brand, record_count and percentage, or None if empty
+    """
+    if df is None or df.empty:
+        return None
+
+    # Post-processing: Calculate top 10 + "Other"
+    total_count = df['record_count'].sum()
+
+    if total_count == 0:
+        return None
+
+    # Take top 10 brands
+    top_10 = df.head(10).copy()
+
+    # Calculate percentages for top 10
+    top_10['percentage'] = (top_10['record_count'] / total_count) * 100
+
+    # If more than 10 brands, sum remaining into "Other"
+    if len(df) > 10:
+        other_count = df.iloc[10:]['record_count'].sum()
+        other_percentage = (other_count / total_count) * 100
+
+        # Create "Other" row
+        other_row = pd.DataFrame([{
+            'insulin_brand': 'Other',
+            'record_count': other_count,
+            'percentage': other_percentage
+        }])
+
+        # Concatenate top 10 + "Other"
+        result = pd.concat([top_10, other_row], ignore_index=True)
+    else:
+        result = top_10
+
+    return result
+
+
+@cached_query
+@compact_result
 def get_insulin_top_brands_chart_data(_client, table_name, global_filters, local_sectors):
     """
     Get record counts for all insulin brands, processed for top 10 + "Other" display.
@@ -2136,34 +2258,31 @@ def get_insulin_top_brands_chart_data(_client, table_name, global_filters, local
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive brand counts from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        df = availability_cube.insulin_brand_counts(_client, table_name, global_filters, local_sectors)
+        if df is not None:
+            return _top_brands_with_other(df)
+
     # Build WHERE clause with global + local sector filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
-    # Exclude NULL/empty insulin_brand and "---" placeholder
+    # Exclude NULL insulin_brand (placeholders are NULL in the staging layer)
     where_clauses.append("insulin_brand IS NOT NULL")
-    where_clauses.append("TRIM(insulin_brand) != ''")
-    where_clauses.append("insulin_brand != 'NULL'")
-    where_clauses.append("insulin_brand != '---'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2171,55 +2290,23 @@ def get_insulin_top_brands_chart_data(_client, table_name, global_filters, local
     SELECT
         insulin_brand,
         COUNT(*) as record_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_brand
     ORDER BY record_count DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
-
-        if df is None or df.empty:
-            return None
-
-        # Post-processing: Calculate top 10 + "Other"
-        total_count = df['record_count'].sum()
-
-        if total_count == 0:
-            return None
-
-        # Take top 10 brands
-        top_10 = df.head(10).copy()
-
-        # Calculate percentages for top 10
-        top_10['percentage'] = (top_10['record_count'] / total_count) * 100
-
-        # If more than 10 brands, sum remaining into "Other"
-        if len(df) > 10:
-            other_count = df.iloc[10:]['record_count'].sum()
-            other_percentage = (other_count / total_count) * 100
-
-            # Create "Other" row
-            other_row = pd.DataFrame([{
-                'insulin_brand': 'Other',
-                'record_count': other_count,
-                'percentage': other_percentage
-            }])
-
-            # Concatenate top 10 + "Other"
-            result = pd.concat([top_10, other_row], ignore_index=True)
-        else:
-            result = top_10
-
-        return result
+        df = run_query(_client, query, params)
+        return _top_brands_with_other(df)
 
     except Exception as e:
         st.error(f"Error getting insulin top brands chart data: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_presentation_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - By Presentation and Type component.
@@ -2240,28 +2327,28 @@ def get_insulin_by_presentation_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2269,21 +2356,22 @@ def get_insulin_by_presentation_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by presentation regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_presentation_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin Availability - By Presentation and Type component.
@@ -2299,28 +2387,28 @@ def get_insulin_by_presentation_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
-    where_clauses.append("sector != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2328,21 +2416,22 @@ def get_insulin_by_presentation_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by presentation sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_by_presentation_chart_data(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get insulin availability percentages by presentation and insulin type, ONLY showing combinations with availability > 0%.
@@ -2367,41 +2456,35 @@ def get_insulin_by_presentation_chart_data(_client, table_name, global_filters,
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_by_presentation_chart(_client, table_name, global_filters, local_regions, local_sectors)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global + local region + local sector filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty insulin_presentation and insulin_type
     where_clauses.append("insulin_presentation IS NOT NULL")
-    where_clauses.append("TRIM(insulin_presentation) != ''")
-    where_clauses.append("insulin_presentation != 'NULL'")
     where_clauses.append("insulin_type IS NOT NULL")
-    where_clauses.append("TRIM(insulin_type) != ''")
-    where_clauses.append("insulin_type != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2416,7 +2499,7 @@ def get_insulin_by_presentation_chart_data(_client, table_name, global_filters,
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_presentation, insulin_type
     HAVING
@@ -2429,7 +2512,7 @@ def get_insulin_by_presentation_chart_data(_client, table_name, global_filters,
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin by presentation chart data: {str(e)}")
@@ -2440,7 +2523,8 @@ def get_insulin_by_presentation_chart_data(_client, table_name, global_filters,
 # Plan 11: Insulin Availability - By Originator Brands VS Biosimilars Functions
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_originator_biosimilar_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Insulin Availability - Originator VS Biosimilar component.
@@ -2461,28 +2545,28 @@ def get_insulin_originator_biosimilar_regions(_client, table_name, global_filter
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2490,21 +2574,22 @@ def get_insulin_originator_biosimilar_regions(_client, table_name, global_filter
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin originator/biosimilar regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_originator_biosimilar_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Insulin Availability - Originator VS Biosimilar component.
@@ -2520,28 +2605,28 @@ def get_insulin_originator_biosimilar_sectors(_client, table_name, global_filter
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
-    where_clauses.append("sector != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2549,21 +2634,22 @@ def get_insulin_originator_biosimilar_sectors(_client, table_name, global_filter
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting insulin originator/biosimilar sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_human_originator_metric(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get availability percentage for Human insulin Originator Brands.
@@ -2581,33 +2667,38 @@ def get_insulin_human_originator_metric(_client, table_name, global_filters, loc
     if not global_filters.get('data_collection_period'):
         return 0.0
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_originator_metric(_client, table_name, global_filters, local_regions, local_sectors, 'Human', 'Originator Brand')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the other three originator/biosimilar metrics (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'originator_metrics', 'human_originator', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            percentage = batched['availability_percentage'].iloc[0]
+            return float(percentage) if pd.notna(percentage) else 0.0
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Filter by Originator Brand and Human insulin type
     where_clauses.append("insulin_originator_biosimilar = 'Originator Brand'")
@@ -2624,12 +2715,12 @@ def get_insulin_human_originator_metric(_client, table_name, global_filters, loc
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
 
         if result.empty:
             return 0.0
@@ -2644,7 +2735,8 @@ def get_insulin_human_originator_metric(_client, table_name, global_filters, loc
         return 0.0
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_analogue_originator_metric(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get availability percentage for Analogue insulin Originator Brands.
@@ -2662,33 +2754,38 @@ def get_insulin_analogue_originator_metric(_client, table_name, global_filters,
     if not global_filters.get('data_collection_period'):
         return 0.0
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_originator_metric(_client, table_name, global_filters, local_regions, local_sectors, 'Analogue', 'Originator Brand')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the other three originator/biosimilar metrics (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'originator_metrics', 'analogue_originator', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            percentage = batched['availability_percentage'].iloc[0]
+            return float(percentage) if pd.notna(percentage) else 0.0
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Filter by Originator Brand and Analogue insulin type
     where_clauses.append("insulin_originator_biosimilar = 'Originator Brand'")
@@ -2705,12 +2802,12 @@ def get_insulin_analogue_originator_metric(_client, table_name, global_filters,
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
 
         if result.empty:
             return 0.0
@@ -2725,7 +2822,8 @@ def get_insulin_analogue_originator_metric(_client, table_name, global_filters,
         return 0.0
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_human_biosimilar_metric(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get availability percentage for Human insulin Biosimilars.
@@ -2743,33 +2841,38 @@ def get_insulin_human_biosimilar_metric(_client, table_name, global_filters, loc
     if not global_filters.get('data_collection_period'):
         return 0.0
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_originator_metric(_client, table_name, global_filters, local_regions, local_sectors, 'Human', 'Biosimilar')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the other three originator/biosimilar metrics (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'originator_metrics', 'human_biosimilar', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            percentage = batched['availability_percentage'].iloc[0]
+            return float(percentage) if pd.notna(percentage) else 0.0
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Filter by Biosimilar and Human insulin type
     where_clauses.append("insulin_originator_biosimilar = 'Biosimilar'")
@@ -2786,12 +2889,12 @@ def get_insulin_human_biosimilar_metric(_client, table_name, global_filters, loc
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
 
         if result.empty:
             return 0.0
@@ -2806,7 +2909,8 @@ def get_insulin_human_biosimilar_metric(_client, table_name, global_filters, loc
         return 0.0
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_insulin_analogue_biosimilar_metric(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get availability percentage for Analogue insulin Biosimilars.
@@ -2824,33 +2928,38 @@ def get_insulin_analogue_biosimilar_metric(_client, table_name, global_filters,
     if not global_filters.get('data_collection_period'):
         return 0.0
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.insulin_originator_metric(_client, table_name, global_filters, local_regions, local_sectors, 'Analogue', 'Biosimilar')
+        if derived is not None:
+            return derived
+
+    # One scan shared with the other three originator/biosimilar metrics (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'originator_metrics', 'analogue_biosimilar', global_filters, local_regions, local_sectors)
+        if batched is not None:
+            percentage = batched['availability_percentage'].iloc[0]
+            return float(percentage) if pd.notna(percentage) else 0.0
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Filter by Biosimilar and Analogue insulin type
     where_clauses.append("insulin_originator_biosimilar = 'Biosimilar'")
@@ -2867,12 +2976,12 @@ def get_insulin_analogue_biosimilar_metric(_client, table_name, global_filters,
             THEN ROUND((COUNT(DISTINCT CASE WHEN is_unavailable = 0 THEN form_case__case_id END) * 100.0) / COUNT(DISTINCT form_case__case_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
 
         if result.empty:
             return 0.0
@@ -2891,7 +3000,8 @@ def get_insulin_analogue_biosimilar_metric(_client, table_name, global_filters,
 # Plan 12: Comparator Medicine Availability Functions
 # ============================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_comparator_medicine_regions(_client, table_name, global_filters):
     """
     Get regions for local Region dropdown in Comparator Medicine Availability component.
@@ -2912,28 +3022,28 @@ def get_comparator_medicine_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("TRIM(region) != ''")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -2941,21 +3051,22 @@ def get_comparator_medicine_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting comparator medicine regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_comparator_medicine_sectors(_client, table_name, global_filters):
     """
     Get sectors for local Sector dropdown in Comparator Medicine Availability component.
@@ -2971,28 +3082,28 @@ def get_comparator_medicine_sectors(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Exclude NULL/empty sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
-    where_clauses.append("sector != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -3000,21 +3111,22 @@ def get_comparator_medicine_sectors(_client, table_name, global_filters):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting comparator medicine sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_comparator_medicine_table_data(_client, table_name, global_filters, local_regions, local_sectors):
     """
     Get comparator medicine availability data for table display.
@@ -3032,37 +3144,34 @@ def get_comparator_medicine_table_data(_client, table_name, global_filters, loca
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Derive from the availability cube (no extra scan for local filter changes)
+    if config.AVAILABILITY_CUBE_ENABLED:
+        derived = availability_cube.comparator_medicine_table(_client, table_name, global_filters, local_regions, local_sectors)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause with global + local filters
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter (required)
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add global region filter (optional)
-    if global_filters.get('region'):
-        regions_str = "', '".join(global_filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", global_filters.get('region'))
 
     # Add local region filter (optional)
-    if local_regions:
-        local_regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{local_regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Add local sector filter (optional)
-    if local_sectors:
-        local_sectors_str = "', '".join(local_sectors)
-        where_clauses.append(f"sector IN ('{local_sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
 
     # Exclude NULL/empty names and strengths
     where_clauses.append("name IS NOT NULL")
-    where_clauses.append("TRIM(name) != ''")
     where_clauses.append("strength IS NOT NULL")
 
     where_clause = " AND ".join(where_clauses)
@@ -3078,14 +3187,14 @@ def get_comparator_medicine_table_data(_client, table_name, global_filters, loca
             THEN ROUND((SUM(CAST(available_num AS INT64)) * 100.0) / COUNT(DISTINCT survey_id), 1)
             ELSE 0
         END as availability_percentage
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY name, strength
     ORDER BY name DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting comparator medicine table data: {str(e)}")
@@ -3096,7 +3205,8 @@ def get_comparator_medicine_table_data(_client, table_name, global_filters, loca
 # PRICE ANALYSIS FUNCTIONS (Phase 2)
 # ============================================================================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_price_regions(_client, table_name, global_filters):
     """
     Get regions for price analysis filter with facility counts.
@@ -3112,22 +3222,25 @@ def get_price_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', global_region=False, exclude_blank=False, ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Exclude NULL regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -3135,21 +3248,22 @@ def get_price_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting price regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_price_sectors(_client, table_name, global_filters, local_regions):
     """
     Get sectors for price analysis filter with facility counts.
@@ -3166,27 +3280,28 @@ def get_price_sectors(_client, table_name, global_filters, local_regions):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', global_region=False, local_regions=local_regions, ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add local region filter (optional)
-    if local_regions:
-        regions_str = "', '".join(local_regions)
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
 
     # Exclude NULL sectors
     where_clauses.append("sector IS NOT NULL")
-    where_clauses.append("TRIM(sector) != ''")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -3194,21 +3309,22 @@ def get_price_sectors(_client, table_name, global_filters, local_regions):
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting price sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_median_price_by_type(_client, table_name, filters):
     """
     Get median insulin prices by insulin type for chart.
@@ -3229,32 +3345,37 @@ def get_median_price_by_type(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_median_price_by_type', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_median_price_by_type', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Insulin type filters
     where_clauses.append("insulin_type IS NOT NULL")
-    where_clauses.append("insulin_type != '---'")
 
     # Price filters - only include records with valid prices (but allow 0 prices)
     where_clauses.append("insulin_standard_price_local IS NOT NULL")
@@ -3271,7 +3392,7 @@ def get_median_price_by_type(_client, table_name, filters):
             insulin_type_order,
             insulin_standard_price_local,
             insulin_standard_price_usd
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE {where_clause}
     ),
     aggregated AS (
@@ -3304,14 +3425,15 @@ def get_median_price_by_type(_client, table_name, filters):
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting median price by type: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_median_price_by_type_levelcare(_client, table_name, filters):
     """
     Get median insulin prices by insulin type and level of care (public sector only).
@@ -3333,32 +3455,40 @@ def get_median_price_by_type_levelcare(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_median_price_by_type_levelcare', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_median_price_by_type_levelcare', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
-    # Insulin type filters - EXCLUDE insulin_type EQUALS "---"
-    where_clauses.append("insulin_type != '---'")
+    # Insulin type filters - EXCLUDE insulin_type EQUALS "---" (NULL in the staging layer)
+    where_clauses.append("insulin_type IS NOT NULL")
 
     # Public sector filter - INCLUDE Sector CONTAINS "Public"
     where_clauses.append("LOWER(sector) LIKE '%public%'")
 
-    # Level of care filters - EXCLUDE level_of_care EQUALS "NULL" OR "---"
-    where_clauses.append("(level_of_care IS NOT NULL AND level_of_care != 'NULL' AND level_of_care != '---')")
+    # Level of care filters - EXCLUDE level_of_care EQUALS "NULL" OR "---" (NULL in the staging layer)
+    where_clauses.append("level_of_care IS NOT NULL")
 
     # Out-of-pocket payment filter - INCLUDE insulin_out_of_pocket EQUALS "Yes" OR "Some people pay out of pocket"
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3373,7 +3503,7 @@ def get_median_price_by_type_levelcare(_client, table_name, filters):
             level_of_care,
             insulin_standard_price_local,
             insulin_standard_price_usd
-        FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+        FROM {staged_table(table_name)}
         WHERE {where_clause}
     ),
     aggregated AS (
@@ -3408,14 +3538,15 @@ def get_median_price_by_type_levelcare(_client, table_name, filters):
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting median price by type and level of care: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def debug_level_of_care_values(_client, table_name, filters):
     """
     Debug function to see what level_of_care values exist in the data.
@@ -3433,21 +3564,17 @@ def debug_level_of_care_values(_client, table_name, filters):
     
     # Build WHERE clause with minimal filters
     where_clauses = ["1=1"]
+    params = {}
     
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
     
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
     
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
     
     where_clause = " AND ".join(where_clauses)
     
@@ -3468,14 +3595,82 @@ def debug_level_of_care_values(_client, table_name, filters):
     """
     
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error in debug query: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
+def get_country_survey_summary(_client, table_name, cutoff):
+    """
+    Get survey counts and dates per country, split at the cutoff date (diagnostics).
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name (adl_surveys)
+        cutoff: Cutoff date (today, see query_builder.cutoff_date), part of the cache key
+
+    Returns:
+        pandas DataFrame with one row per country
+    """
+    query = f"""
+    SELECT
+        country,
+        COUNT(DISTINCT form_case__case_id) as total_surveys,
+        COUNT(DISTINCT CASE WHEN survey_date < @cutoff_date THEN form_case__case_id END) as surveys_before_today,
+        COUNT(DISTINCT CASE WHEN survey_date >= @cutoff_date THEN form_case__case_id END) as surveys_today_or_future,
+        MIN(survey_date) as first_survey_date,
+        MAX(survey_date) as last_survey_date,
+        COUNT(DISTINCT CASE WHEN EXTRACT(YEAR FROM survey_date) >= 2025 THEN form_case__case_id END) as surveys_in_2025_plus
+    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    WHERE survey_date IS NOT NULL
+    GROUP BY country
+    ORDER BY total_surveys DESC
+    """
+    return run_query(_client, query, {"cutoff_date": cutoff})
+
+
+@cached_query
+@compact_result
+def get_country_survey_records(_client, table_name, cutoff, country):
+    """
+    Get the distinct survey records of one country, flagged against the cutoff date (diagnostics).
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name (adl_surveys)
+        cutoff: Cutoff date (today, see query_builder.cutoff_date), part of the cache key
+        country: Country name
+
+    Returns:
+        pandas DataFrame with one row per survey record
+    """
+    query = f"""
+    SELECT DISTINCT
+        form_case__case_id,
+        survey_date,
+        region,
+        sector,
+        level_of_care,
+        data_collection_period,
+        EXTRACT(YEAR FROM survey_date) as survey_year,
+        CASE
+            WHEN survey_date < @cutoff_date THEN 'Valid (< Today)'
+            WHEN survey_date >= @cutoff_date THEN 'Invalid (>= Today)'
+        END as date_status
+    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    WHERE country = @country
+        AND survey_date IS NOT NULL
+    ORDER BY survey_date DESC, form_case__case_id
+    """
+    return run_query(_client, query, {"cutoff_date": cutoff, "country": country})
+
+
+@cached_query
+@compact_result
 def get_price_by_inn(_client, table_name, filters):
     """
     Get min, median, and max insulin prices by INN category.
@@ -3499,32 +3694,37 @@ def get_price_by_inn(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_price_by_inn', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_price_by_inn', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Insulin INN filters
     where_clauses.append("insulin_inn IS NOT NULL")
-    where_clauses.append("insulin_inn != '---'")
 
     # Out-of-pocket payment filter
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3541,21 +3741,22 @@ def get_price_by_inn(_client, table_name, filters):
       APPROX_QUANTILES(insulin_standard_price_usd, 100)[OFFSET(50)] as median_price_usd,
       MAX(insulin_standard_price_usd) as max_price_usd,
       COUNT(1) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_inn
     ORDER BY insulin_inn ASC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting price by INN: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_price_by_brand_human(_client, table_name, filters):
     """
     Get price statistics for human insulin brands.
@@ -3576,28 +3777,40 @@ def get_price_by_brand_human(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_price_by_brand_human', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED and (filters.get('region') or filters.get('sector')):
+        derived = semantic_cache.derive_result(_client, table_name, 'get_price_by_brand_human', filters)
+        if derived is not None:
+            return derived
+
+    # One scan shared with the analogue brands (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'price_by_brand', 'human', filters)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Human insulin type filter
     where_clauses.append("insulin_type LIKE '%Human%'")
@@ -3605,8 +3818,6 @@ def get_price_by_brand_human(_client, table_name, filters):
     # Insulin brand filters
     where_clauses.append("insulin_standard_price_local IS NOT NULL")
     where_clauses.append("insulin_brand IS NOT NULL")
-    where_clauses.append("insulin_brand != '0'")
-    where_clauses.append("insulin_brand != '---'")
 
     # Out-of-pocket payment filter
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3625,21 +3836,22 @@ def get_price_by_brand_human(_client, table_name, filters):
         ELSE (APPROX_QUANTILES(insulin_price_local, 100)[OFFSET(49)] + APPROX_QUANTILES(insulin_price_local, 100)[OFFSET(51)]) / 2
       END as median_price_local,
       MAX(insulin_standard_price_local) as max_price_local
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_brand
     ORDER BY facility_count DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting price by brand (human): {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_price_by_brand_analogue(_client, table_name, filters):
     """
     Get price statistics for analogue insulin brands.
@@ -3660,28 +3872,40 @@ def get_price_by_brand_analogue(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_price_by_brand_analogue', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED and (filters.get('region') or filters.get('sector')):
+        derived = semantic_cache.derive_result(_client, table_name, 'get_price_by_brand_analogue', filters)
+        if derived is not None:
+            return derived
+
+    # One scan shared with the human brands (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'price_by_brand', 'analogue', filters)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Analogue insulin type filter
     where_clauses.append("insulin_type LIKE '%Analogue%'")
@@ -3689,8 +3913,6 @@ def get_price_by_brand_analogue(_client, table_name, filters):
     # Insulin brand filters
     where_clauses.append("insulin_standard_price_local IS NOT NULL")
     where_clauses.append("insulin_brand IS NOT NULL")
-    where_clauses.append("insulin_brand != '0'")
-    where_clauses.append("insulin_brand != '---'")
 
     # Out-of-pocket payment filter
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3709,21 +3931,22 @@ def get_price_by_brand_analogue(_client, table_name, filters):
         ELSE (APPROX_QUANTILES(insulin_price_local, 100)[OFFSET(49)] + APPROX_QUANTILES(insulin_price_local, 100)[OFFSET(51)]) / 2
       END as median_price_local,
       MAX(insulin_standard_price_local) as max_price_local
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_brand
     ORDER BY facility_count DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting price by brand (analogue): {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_median_price_by_presentation(_client, table_name, filters):
     """
     Get median insulin prices by presentation type.
@@ -3742,28 +3965,34 @@ def get_median_price_by_presentation(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_median_price_by_presentation', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_median_price_by_presentation', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Presentation filters
     where_clauses.append("insulin_presentation IS NOT NULL")
@@ -3783,21 +4012,22 @@ def get_median_price_by_presentation(_client, table_name, filters):
         ELSE (APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(49)] + APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(51)]) / 2
       END as median_price_local,
       COUNT(1) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_presentation
     ORDER BY insulin_presentation DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting median price by presentation: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_median_price_by_originator_human(_client, table_name, filters):
     """
     Get median insulin prices by originator/biosimilar for human insulin.
@@ -3816,35 +4046,46 @@ def get_median_price_by_originator_human(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_median_price_by_originator_human', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED and (filters.get('region') or filters.get('sector')):
+        derived = semantic_cache.derive_result(_client, table_name, 'get_median_price_by_originator_human', filters)
+        if derived is not None:
+            return derived
+
+    # One scan shared with the analogue prices (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'median_price_by_originator', 'human', filters)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Human insulin type filter
     where_clauses.append("insulin_type LIKE '%Human%'")
 
     # Originator/biosimilar filters
     where_clauses.append("insulin_originator_biosimilar IS NOT NULL")
-    where_clauses.append("insulin_originator_biosimilar != '---'")
 
     # Out-of-pocket payment filter
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3861,21 +4102,22 @@ def get_median_price_by_originator_human(_client, table_name, filters):
         ELSE (APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(49)] + APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(51)]) / 2
       END as median_price_local,
       COUNT(1) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_originator_biosimilar
     ORDER BY insulin_originator_biosimilar DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting median price by originator (human): {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_median_price_by_originator_analogue(_client, table_name, filters):
     """
     Get median insulin prices by originator/biosimilar for analogue insulin.
@@ -3894,35 +4136,46 @@ def get_median_price_by_originator_analogue(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Exact medians are computed in memory from the price vectors (see database/statistics_mode.py)
+    if statistics_mode(filters) == "exact":
+        exact = semantic_cache.exact_result(_client, table_name, 'get_median_price_by_originator_analogue', filters)
+        if exact is not None:
+            return exact
+
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED and (filters.get('region') or filters.get('sector')):
+        derived = semantic_cache.derive_result(_client, table_name, 'get_median_price_by_originator_analogue', filters)
+        if derived is not None:
+            return derived
+
+    # One scan shared with the human prices (see database/metric_batch.py)
+    if config.METRIC_BATCH_ENABLED:
+        batched = metric_batch.metric_result(_client, table_name, 'median_price_by_originator', 'analogue', filters)
+        if batched is not None:
+            return batched
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Analogue insulin type filter
     where_clauses.append("insulin_type LIKE '%Analogue%'")
 
     # Originator/biosimilar filters
     where_clauses.append("insulin_originator_biosimilar IS NOT NULL")
-    where_clauses.append("insulin_originator_biosimilar != '---'")
 
     # Out-of-pocket payment filter
     where_clauses.append("(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')")
@@ -3939,14 +4192,14 @@ def get_median_price_by_originator_analogue(_client, table_name, filters):
         ELSE (APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(49)] + APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(51)]) / 2
       END as median_price_local,
       COUNT(1) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_originator_biosimilar
     ORDER BY insulin_originator_biosimilar DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting median price by originator (analogue): {str(e)}")
@@ -3957,7 +4210,8 @@ def get_median_price_by_originator_analogue(_client, table_name, filters):
 # Phase 7: Free Insulin Functions
 # ============================
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_free_insulin_regions(_client, table_name, global_filters):
     """
     Get regions for free insulin analysis filter with facility counts.
@@ -3973,22 +4227,25 @@ def get_free_insulin_regions(_client, table_name, global_filters):
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'region', global_region=False, exclude_blank=False, ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Exclude NULL regions
     where_clauses.append("region IS NOT NULL")
-    where_clauses.append("region != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -3996,21 +4253,22 @@ def get_free_insulin_regions(_client, table_name, global_filters):
     SELECT
         region,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY region
     ORDER BY region DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting free insulin regions: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_free_insulin_sectors(_client, table_name, global_filters, selected_regions):
     """
     Get sectors for free insulin analysis filter with facility counts.
@@ -4027,23 +4285,25 @@ def get_free_insulin_sectors(_client, table_name, global_filters, selected_regio
     if not global_filters.get('data_collection_period'):
         return None
 
+    # Look up from the dimension index (no scan of its own)
+    if config.DIMENSION_INDEX_ENABLED:
+        derived = dimension_index.dimension_counts(_client, table_name, global_filters, 'sector', global_region=False, local_regions=selected_regions, exclude_null=False, exclude_blank=False, ascending=False)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = global_filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if global_filters.get('country'):
-        countries_str = "', '".join(global_filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", global_filters.get('country'))
 
     # Add region filter from local selection
-    if selected_regions:
-        regions_str = "', '".join(selected_regions)
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", selected_regions)
 
     where_clause = " AND ".join(where_clauses)
 
@@ -4051,21 +4311,22 @@ def get_free_insulin_sectors(_client, table_name, global_filters, selected_regio
     SELECT
         sector,
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY sector
     ORDER BY sector DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting free insulin sectors: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_facilities_providing_free(_client, table_name, filters):
     """
     Get count of facilities providing insulin for free.
@@ -4081,28 +4342,28 @@ def get_facilities_providing_free(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_facilities_providing_free', filters)
+        if derived is not None:
+            return int(derived.iloc[0]['facility_count'])
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Free insulin filter
     where_clauses.append("insulin_out_of_pocket IN ('No', 'Both')")
@@ -4112,12 +4373,12 @@ def get_facilities_providing_free(_client, table_name, filters):
     query = f"""
     SELECT
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
         if not result.empty:
             return int(result.iloc[0]['facility_count'])
         return 0
@@ -4126,7 +4387,8 @@ def get_facilities_providing_free(_client, table_name, filters):
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_reasons_insulin_free(_client, table_name, filters):
     """
     Get reasons why insulin is provided for free with product counts.
@@ -4142,34 +4404,34 @@ def get_reasons_insulin_free(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_reasons_insulin_free', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Free insulin filter
     where_clauses.append("insulin_out_of_pocket IN ('No', 'Both')")
     
-    # Exclude "---" values from insulin_free_reason
-    where_clauses.append("insulin_free_reason != '---'")
+    # Exclude "---" values from insulin_free_reason (NULL in the staging layer)
+    where_clauses.append("insulin_free_reason IS NOT NULL")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -4177,21 +4439,22 @@ def get_reasons_insulin_free(_client, table_name, filters):
     SELECT
         insulin_free_reason,
         COUNT(DISTINCT form_case__case_id) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_free_reason
     ORDER BY product_count DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting reasons insulin free: {str(e)}")
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_facilities_not_full_price(_client, table_name, filters):
     """
     Get count of facilities not charging full price for insulin.
@@ -4207,45 +4470,43 @@ def get_facilities_not_full_price(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_facilities_not_full_price', filters)
+        if derived is not None:
+            return int(derived.iloc[0]['facility_count'])
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Subsidised insulin filters
     where_clauses.append("insulin_subsidised_reason IS NOT NULL")
-    where_clauses.append("insulin_subsidised_reason != '---'")
-    where_clauses.append("insulin_subsidised_reason != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
     query = f"""
     SELECT
         COUNT(DISTINCT form_case__case_id) as facility_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     """
 
     try:
-        result = _client.query(query).to_dataframe()
+        result = run_query(_client, query, params)
         if not result.empty:
             return int(result.iloc[0]['facility_count'])
         return 0
@@ -4254,7 +4515,8 @@ def get_facilities_not_full_price(_client, table_name, filters):
         return None
 
 
-@st.cache_data(ttl=600)
+@cached_query
+@compact_result
 def get_reasons_not_full_price(_client, table_name, filters):
     """
     Get reasons why facilities are not charging full price with product counts.
@@ -4270,33 +4532,31 @@ def get_reasons_not_full_price(_client, table_name, filters):
     if not filters.get('data_collection_period'):
         return None
 
+    # Narrower Region/Sector selections are derived from the per-cell result
+    if config.SEMANTIC_CACHE_ENABLED:
+        derived = semantic_cache.derive_result(_client, table_name, 'get_reasons_not_full_price', filters)
+        if derived is not None:
+            return derived
+
     # Build WHERE clause
     where_clauses = ["1=1"]
+    params = {}
 
     # Add data collection period filter
     periods = filters['data_collection_period']
-    periods_str = "', '".join(periods)
-    where_clauses.append(f"data_collection_period IN ('{periods_str}')")
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
 
     # Add country filter (optional)
-    if filters.get('country'):
-        countries_str = "', '".join(filters['country'])
-        where_clauses.append(f"country IN ('{countries_str}')")
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
 
     # Add region filter (optional)
-    if filters.get('region'):
-        regions_str = "', '".join(filters['region'])
-        where_clauses.append(f"region IN ('{regions_str}')")
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
 
     # Add sector filter (optional)
-    if filters.get('sector'):
-        sectors_str = "', '".join(filters['sector'])
-        where_clauses.append(f"sector IN ('{sectors_str}')")
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
 
     # Subsidised insulin filters
     where_clauses.append("insulin_subsidised_reason IS NOT NULL")
-    where_clauses.append("insulin_subsidised_reason != '---'")
-    where_clauses.append("insulin_subsidised_reason != 'NULL'")
 
     where_clause = " AND ".join(where_clauses)
 
@@ -4304,14 +4564,14 @@ def get_reasons_not_full_price(_client, table_name, filters):
     SELECT
         insulin_subsidised_reason,
         COUNT(DISTINCT form_case__case_id) as product_count
-    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`
+    FROM {staged_table(table_name)}
     WHERE {where_clause}
     GROUP BY insulin_subsidised_reason
     ORDER BY product_count DESC
     """
 
     try:
-        df = _client.query(query).to_dataframe()
+        df = run_query(_client, query, params)
         return df
     except Exception as e:
         st.error(f"Error getting reasons not full price: {str(e)}")
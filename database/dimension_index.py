@@ -0,0 +1,268 @@
+"""
+Dimension index: one scan per table for every Region/Sector dropdown.
+
+About twenty dropdown functions (get_insulin_regions, get_price_sectors, ...)
+each ran their own "COUNT(DISTINCT form_case__case_id) GROUP BY region|sector"
+scan, differing only in their NULL rules, in whether the global Region
+selection applies and in the sort order. Instead, each table is scanned once
+per period/country selection and grouped by
+
+    data_collection_period -> country -> region -> sector -> level_of_care
+
+with distinct facility counts per cell. The dropdowns are then looked up from
+those cells in pandas, applying each function's own rules; Region selections
+are evaluated on a bitmap index of the cells (utils/bitmap_index.py).
+
+As in the availability cube, distinct facility counts only add up across cells
+because a survey case has a single region, sector and level of care. The build
+verifies this with a grand-total grouping set: if the summed cells disagree
+with the directly counted total, the index is discarded and the dropdowns fall
+back to their own queries. In sketch mode the dropdowns are served from
+HyperLogLog sketches of the same cells instead (database/facility_sketches.py),
+which do not need the counts to be additive.
+
+With summary tables enabled (config.SUMMARY_TABLES_ENABLED) the exact index
+is read from a pre-aggregated summary table holding the same cells for every
+period and country (see database/summary_tables.py). Sketches need the case
+ids, so sketch mode keeps scanning the raw table.
+"""
+import pandas as pd
+
+import config
+from database import facility_sketches
+from database.freshness import cached_query
+from database.query_builder import add_in_filter, canonical_values
+from database.query_runner import run_query
+from database.staging import staged_table
+from database.summary_tables import summary_table
+from utils.bitmap_index import BitmapIndex
+
+
+DIMENSIONS = ["data_collection_period", "country", "region", "sector", "level_of_care"]
+
+
+def build_index_query(table_name, periods, countries=None):
+    """
+    Build the index query for one table.
+
+    The global Region selection is applied at lookup time, since the price
+    dropdowns ignore it.
+
+    Args:
+        table_name: Table name
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+
+    Returns:
+        tuple: (SQL query returning one row per cell plus a grand total row, query parameters)
+    """
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", countries)
+
+    where_clause = " AND ".join(where_clauses)
+    dimensions = ", ".join(DIMENSIONS)
+
+    query = f"""
+    SELECT
+        GROUPING(data_collection_period) = 1 as is_total,
+        {dimensions},
+        COUNT(DISTINCT form_case__case_id) as facility_count
+    FROM {staged_table(table_name)}
+    WHERE {where_clause}
+    GROUP BY GROUPING SETS (
+        ({dimensions}),
+        ()
+    )
+    """
+    return query, params
+
+
+def build_summary_query(table_name):
+    """
+    Build the query materializing a table's dimension summary table.
+
+    Args:
+        table_name: Table name
+
+    Returns:
+        str: SQL query returning one row per cell over every row of the table
+    """
+    dimensions = ", ".join(DIMENSIONS)
+    return f"""
+    SELECT
+        {dimensions},
+        COUNT(DISTINCT form_case__case_id) as facility_count
+    FROM {staged_table(table_name)}
+    GROUP BY {dimensions}
+    """
+
+
+def build_index_summary_query(summary_name, periods, countries=None):
+    """
+    Build the index query for one table from its dimension summary table.
+
+    The summary rows already are the index cells, so they are only selected;
+    additivity was verified when the summary tables were built.
+
+    Args:
+        summary_name: Summary table name (see database/summary_tables.py)
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+
+    Returns:
+        tuple: (SQL query returning one row per cell, query parameters)
+    """
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", countries)
+
+    where_clause = " AND ".join(where_clauses)
+
+    query = f"""
+    SELECT
+        {', '.join(DIMENSIONS)},
+        facility_count
+    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{summary_name}`
+    WHERE {where_clause}
+    """
+    return query, params
+
+
+@cached_query(show_spinner=False)
+def get_dimension_index(_client, table_name, periods, countries=None):
+    """
+    Scan one table once for the given periods and countries.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        periods (list): Selected data collection periods (canonical_values)
+        countries (list): Selected countries (canonical_values, optional)
+
+    Returns:
+        dict: {
+            'cells': DataFrame with DIMENSIONS and facility_count (one row per cell),
+            'index': BitmapIndex of the cells
+        }
+        or None if the query failed or the counts are not additive
+    """
+    if not periods:
+        return None
+
+    summary = summary_table("dimensions", table_name)
+    if summary:
+        query, params = build_index_summary_query(summary, periods, countries)
+    else:
+        query, params = build_index_query(table_name, periods, countries)
+
+    try:
+        df = run_query(_client, query, params)
+    except Exception as e:
+        # Dropdowns fall back to their own queries, which report errors themselves
+        print(f"⚠ Dimension index for {table_name} failed: {str(e)}", flush=True)
+        return None
+
+    if summary:
+        return {'cells': df, 'index': BitmapIndex(df)}
+
+    is_total = df['is_total'].fillna(False).astype(bool)
+    cells = df[~is_total].drop(columns=['is_total']).reset_index(drop=True)
+    total = int(df.loc[is_total, 'facility_count'].sum())
+
+    # Every case counted in exactly one cell, or the cells cannot be summed
+    if int(cells['facility_count'].sum()) != total:
+        print(f"⚠ Dimension index for {table_name}: facility counts are not additive", flush=True)
+        return None
+
+    return {'cells': cells, 'index': BitmapIndex(cells)}
+
+
+def _is_present(series, exclude_null, exclude_blank):
+    """Mask for the IS NOT NULL / TRIM(col) != '' predicates."""
+    mask = pd.Series(True, index=series.index)
+    if exclude_null:
+        mask &= series.notna()
+    if exclude_blank:
+        mask &= (series.astype('string').str.strip() != '').fillna(False).astype(bool)
+    return mask
+
+
+def dimension_counts(_client, table_name, global_filters, dimension,
+                     global_region=True, local_regions=None, public_only=False,
+                     exclude_null=True, exclude_blank=True,
+                     ascending=True):
+    """
+    Look up a Region or Sector dropdown from the dimension index.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        global_filters (dict): Global filters from Data Selectors
+        dimension (str): 'region' or 'sector'
+        global_region (bool): Apply the global Region selection
+        local_regions (list): Selected regions from local Region dropdown
+        public_only (bool): Only sectors LIKE '%Public%'
+        exclude_null (bool): Drop NULL values
+        exclude_blank (bool): Drop empty/whitespace values
+        ascending (bool): Sort order of the dropdown values
+
+    Returns:
+        pandas DataFrame with columns: <dimension>, facility_count,
+        or None to fall back to the function's own query
+    """
+    sketch_mode = facility_sketches.sketch_mode_enabled()
+    if sketch_mode:
+        lookup = facility_sketches.lookup_sketches(_client, table_name, global_filters)
+    else:
+        lookup = get_dimension_index(
+            _client,
+            table_name,
+            canonical_values(global_filters['data_collection_period']),
+            canonical_values(global_filters.get('country')) or None
+        )
+    if lookup is None:
+        return None
+    index = lookup['cells']
+
+    # Same semantics as "region IN (...)": NULL regions drop out once a filter is set
+    mask = pd.Series(True, index=index.index)
+    region_filters = [local_regions]
+    if global_region:
+        region_filters.append(global_filters.get('region'))
+    for regions in region_filters:
+        regions = canonical_values(regions)
+        if regions:
+            mask &= lookup['index'].mask({'region': regions})
+    if public_only:
+        mask &= index['sector'].astype('string').str.contains('Public', regex=False).fillna(False).astype(bool)
+    mask &= _is_present(index[dimension], exclude_null, exclude_blank)
+
+    if sketch_mode:
+        # Merge the selected cells' sketches per value
+        counts = facility_sketches.estimate_counts(index[mask], dimension)
+    else:
+        counts = (
+            index[mask]
+            .groupby(dimension, dropna=False)['facility_count']
+            .sum()
+            .reset_index()
+        )
+    # BigQuery orders NULL first ascending and last descending
+    counts = counts.sort_values(
+        dimension,
+        ascending=ascending,
+        kind='mergesort',
+        na_position='first' if ascending else 'last'
+    )
+    return counts.reset_index(drop=True)
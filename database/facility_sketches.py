@@ -0,0 +1,192 @@
+"""
+Facility sketches: mergeable distinct facility counts for the Region/Sector dropdowns.
+
+The dimension index (database/dimension_index.py) sums exact per-cell facility
+counts, which is only valid while every survey case has a single region,
+sector and level of care; otherwise it is discarded and every dropdown runs
+its own COUNT(DISTINCT form_case__case_id) scan again. In sketch mode
+(config.FACILITY_COUNT_MODE = "sketch") each table is instead scanned once per
+period/country selection into HyperLogLog sketches of form_case__case_id per
+
+    data_collection_period -> country -> region -> sector -> level_of_care
+
+cell. Merging sketches (max rank per register) never double counts a case, so
+any selection of cells is answered in memory without that assumption, at the
+cost of an estimate with relative standard error 1.04 / sqrt(2**precision).
+
+BigQuery's own HLL_COUNT.INIT sketches are opaque bytes that can only be merged
+by HLL_COUNT.MERGE inside BigQuery. The registers are therefore computed in SQL
+from FARM_FINGERPRINT hashes and returned sparsely, one row per non-empty
+register per cell:
+
+    hll_register = low p bits of the hash
+    hll_rank     = 1 + trailing zeros of the remaining bits
+
+and merged with utils/sketches.py. The local replica hashes with DuckDB's
+hash() instead, so sketches are only merged with sketches from the same engine.
+"""
+import pandas as pd
+
+import config
+from database.freshness import cached_query
+from database.query_builder import add_in_filter, canonical_values
+from database.query_runner import run_query
+from database.staging import staged_table
+from utils.bitmap_index import BitmapIndex
+from utils.sketches import hll_estimate, hll_registers, hll_relative_error
+
+
+# Same cells as the dimension index
+DIMENSIONS = ["data_collection_period", "country", "region", "sector", "level_of_care"]
+
+
+def sketch_mode_enabled():
+    """Whether the dropdown facility counts are HyperLogLog estimates."""
+    return config.FACILITY_COUNT_MODE == "sketch"
+
+
+def build_sketch_query(table_name, periods, countries=None, precision=None):
+    """
+    Build the sketch query for one table.
+
+    Args:
+        table_name: Table name
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+        precision (int): Number of register index bits (default: config.FACILITY_SKETCH_PRECISION)
+
+    Returns:
+        tuple: (SQL query returning one row per cell and non-empty register, query parameters)
+    """
+    precision = precision or config.FACILITY_SKETCH_PRECISION
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", countries)
+
+    where_clause = " AND ".join(where_clauses)
+    dimensions = ", ".join(DIMENSIONS)
+
+    # ">>" fills with zeros, so the remaining bits are never negative; a case
+    # whose remaining bits are all zero gets the maximum rank
+    query = f"""
+    WITH hashed AS (
+        SELECT
+            {dimensions},
+            CASE
+                WHEN form_case__case_id IS NOT NULL
+                THEN FARM_FINGERPRINT(CAST(form_case__case_id AS STRING))
+            END as fingerprint
+        FROM {staged_table(table_name)}
+        WHERE {where_clause}
+    )
+    SELECT
+        {dimensions},
+        fingerprint & {(1 << precision) - 1} as hll_register,
+        MAX(LEAST(
+            BIT_COUNT(((fingerprint >> {precision}) & -(fingerprint >> {precision})) - 1) + 1,
+            {64 - precision + 1}
+        )) as hll_rank
+    FROM hashed
+    GROUP BY {dimensions}, hll_register
+    """
+    return query, params
+
+
+@cached_query(show_spinner=False)
+def get_facility_sketches(_client, table_name, periods, countries=None):
+    """
+    Scan one table once for the given periods and countries into per-cell sketches.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        periods (list): Selected data collection periods (canonical_values)
+        countries (list): Selected countries (canonical_values, optional)
+
+    Returns:
+        dict: {
+            'cells': DataFrame with DIMENSIONS, hll_register and hll_rank (NULL
+                for cells without case ids),
+            'index': BitmapIndex of the cells
+        }
+        or None if the query failed
+    """
+    if not periods:
+        return None
+
+    query, params = build_sketch_query(table_name, periods, countries)
+
+    try:
+        df = run_query(_client, query, params)
+    except Exception as e:
+        # Dropdowns fall back to their own queries, which report errors themselves
+        print(f"⚠ Facility sketches for {table_name} failed: {str(e)}", flush=True)
+        return None
+
+    return {'cells': df, 'index': BitmapIndex(df)}
+
+
+def lookup_sketches(_client, table_name, global_filters):
+    """
+    Fetch the sketches for the current Data Selectors.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        global_filters (dict): Global filters from Data Selectors
+
+    Returns:
+        dict from get_facility_sketches, or None
+    """
+    return get_facility_sketches(
+        _client,
+        table_name,
+        canonical_values(global_filters['data_collection_period']),
+        canonical_values(global_filters.get('country')) or None
+    )
+
+
+def estimate_counts(sketches, dimension):
+    """
+    Merge the sketches of the given cells per dimension value and estimate each count.
+
+    Args:
+        sketches (DataFrame): Selected rows of get_facility_sketches
+        dimension (str): Grouping column (e.g. 'region')
+
+    Returns:
+        pandas DataFrame with columns: <dimension>, facility_count
+    """
+    precision = config.FACILITY_SKETCH_PRECISION
+    values = []
+    counts = []
+    for value, group in sketches.groupby(dimension, dropna=False, sort=False):
+        registers = hll_registers(group['hll_register'], group['hll_rank'], precision)
+        values.append(value)
+        counts.append(int(round(hll_estimate(registers))))
+
+    return pd.DataFrame({
+        dimension: pd.Series(values, dtype=sketches[dimension].dtype),
+        'facility_count': pd.Series(counts, dtype='Int64'),
+    })
+
+
+def facility_count_caption():
+    """
+    Caption stating the error bound of the dropdown facility counts.
+
+    Returns:
+        str, or None in exact mode
+    """
+    if not sketch_mode_enabled():
+        return None
+    error = hll_relative_error(config.FACILITY_SKETCH_PRECISION)
+    return (
+        f"Facility counts in the Region/Sector filters are HyperLogLog estimates "
+        f"(±{error * 100:.1f}% standard error, about ±{error * 200:.1f}% at 95% confidence)."
+    )
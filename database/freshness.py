@@ -0,0 +1,235 @@
+"""
+Table-change-driven cache invalidation.
+
+The survey tables change rarely (new data collection rounds), so re-running
+identical scans on a fixed TTL wastes time and money. Instead, cached query
+functions keep their results until a table they read actually changes:
+
+    - cached_query replaces @st.cache_data on the query functions. It records
+      which tables each function reads: its table_name argument plus every
+      table referenced in the SQL it runs.
+    - check_tables polls each table in config.TABLES (plus the staging tables
+      in use and the summary tables when enabled) with get_table() (a free
+      metadata call, no query) at most every config.FRESHNESS_POLL_INTERVAL
+      seconds and compares
+      modification time and row count with the last poll. Only the
+      functions that read a changed table are cleared.
+    - table_version_token gives query_runner the current version of the
+      tables a query reads, so on-disk cached results of an older version of
+      a table are never served.
+
+Results are also keyed on the current UTC date (query_builder.cutoff_date),
+which the queries' date cutoff depends on. With the watcher disabled,
+cached_query falls back to config.QUERY_CACHE_TTL.
+"""
+import contextvars
+import functools
+import inspect
+import re
+import threading
+import time
+from collections import defaultdict
+
+import streamlit as st
+
+import config
+from database.query_builder import cutoff_date
+from database.staging import staging_tables_in_use
+from database.summary_tables import summary_table_names
+
+
+# `project.dataset.table` references in SQL
+_TABLE_REF_PATTERN = re.compile(r"`[\w-]+\.[\w-]+\.(\w+)`")
+
+_lock = threading.Lock()
+# table name -> cached functions whose results derive from it
+_functions_by_table = defaultdict(set)
+# table name -> (modified, num_rows) from the last poll
+_table_versions = {}
+_last_check = [0.0]
+# Cached function whose body is running (set while its SQL executes)
+_current_function = contextvars.ContextVar("current_cached_function", default=None)
+
+
+def tables_in_query(query):
+    """
+    Names of the tables a SQL query reads.
+
+    Args:
+        query (str): SQL text
+
+    Returns:
+        set: Table names (without project and dataset)
+    """
+    return set(_TABLE_REF_PATTERN.findall(query))
+
+
+def _register(function, tables):
+    with _lock:
+        for table in tables:
+            _functions_by_table[table].add(function)
+
+
+def record_query_tables(query):
+    """
+    Register the tables of a query with the cached function running it.
+
+    Called by query_runner.submit_query for every query.
+
+    Args:
+        query (str): SQL text
+    """
+    function = _current_function.get()
+    if function is not None:
+        _register(function, tables_in_query(query))
+
+
+def cached_query(function=None, **cache_kwargs):
+    """
+    st.cache_data for query functions, invalidated when their tables change.
+
+    Use like @st.cache_data: @cached_query or @cached_query(show_spinner=False).
+
+    Args:
+        function: Query function taking _client first and usually table_name
+        **cache_kwargs: Passed on to st.cache_data
+
+    Returns:
+        Cached function (with .clear() like st.cache_data functions)
+    """
+    if function is None:
+        return functools.partial(cached_query, **cache_kwargs)
+
+    cache_kwargs.setdefault("ttl", None if config.FRESHNESS_WATCHER_ENABLED else config.QUERY_CACHE_TTL)
+    signature = inspect.signature(function)
+    cached = None
+
+    @functools.wraps(function)
+    def run(*args, cutoff_day=None, **kwargs):
+        # Cache miss: attribute every query the body runs to this function
+        token = _current_function.set(cached)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_function.reset(token)
+
+    cached = st.cache_data(**cache_kwargs)(run)
+
+    @functools.wraps(function)
+    def call(*args, **kwargs):
+        table_name = signature.bind_partial(*args, **kwargs).arguments.get("table_name")
+        if table_name:
+            _register(cached, [table_name])
+        # The queries' date cutoff is computed inside the function bodies:
+        # key on it, so results with no TTL do not outlive their UTC day
+        return cached(*args, cutoff_day=cutoff_date(), **kwargs)
+
+    call.clear = cached.clear
+    return call
+
+
+def table_version_token(tables):
+    """
+    Version string of the given tables as of the last poll.
+
+    Args:
+        tables (iterable): Table names
+
+    Returns:
+        str: Empty when none of the tables has been polled yet
+    """
+    with _lock:
+        return ";".join(
+            f"{table}@{_table_versions[table][0]}/{_table_versions[table][1]}"
+            for table in sorted(tables)
+            if table in _table_versions
+        )
+
+
+def _poll_versions(_client):
+    tables = list(config.TABLES.values())
+    tables += staging_tables_in_use()
+    if config.SUMMARY_TABLES_ENABLED:
+        tables += summary_table_names()
+
+    versions = {}
+    for table_name in tables:
+        table_ref = f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}"
+        try:
+            table = _client.get_table(table_ref)
+        except Exception as e:
+            print(f"⚠ Could not read metadata of {table_name}: {str(e)}", flush=True)
+            continue
+        modified = table.modified.isoformat() if table.modified else None
+        versions[table_name] = (modified, table.num_rows)
+    return versions
+
+
+def invalidate_tables(tables):
+    """
+    Clear the cached results of every function that reads one of the tables.
+
+    Args:
+        tables (iterable): Table names
+
+    Returns:
+        int: Number of cached functions cleared
+    """
+    with _lock:
+        functions = set()
+        for table in tables:
+            functions |= _functions_by_table.get(table, set())
+
+    for function in functions:
+        function.clear()
+    return len(functions)
+
+
+def check_tables(_client, force=False):
+    """
+    Poll table metadata (throttled) and invalidate caches of changed tables.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        force (bool): Poll even if the last poll is more recent than
+            config.FRESHNESS_POLL_INTERVAL
+
+    Returns:
+        list: Names of the tables that changed since the previous poll
+    """
+    if not config.FRESHNESS_WATCHER_ENABLED:
+        return []
+
+    with _lock:
+        now = time.monotonic()
+        if not force and _last_check[0] and now - _last_check[0] < config.FRESHNESS_POLL_INTERVAL:
+            return []
+        _last_check[0] = now
+
+    versions = _poll_versions(_client)
+
+    with _lock:
+        changed = [
+            table for table, version in versions.items()
+            if table in _table_versions and _table_versions[table] != version
+        ]
+        _table_versions.update(versions)
+
+    if changed:
+        cleared = invalidate_tables(changed)
+        print(f"✓ Tables changed: {', '.join(sorted(changed))} (cleared {cleared} cached functions)", flush=True)
+    return changed
+
+
+def get_table_versions():
+    """
+    Table versions seen by the last poll.
+
+    Returns:
+        dict: table name -> {'modified': str, 'num_rows': int}
+    """
+    with _lock:
+        return {
+            table: {"modified": modified, "num_rows": num_rows}
+            for table, (modified, num_rows) in _table_versions.items()
+        }
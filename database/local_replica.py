@@ -0,0 +1,616 @@
+"""
+Local replica engine for low-latency query execution.
+
+Snapshots the tables in config.TABLES to local Parquet files and answers the
+SQL issued by database/bigquery_client.py from an embedded DuckDB engine.
+LocalReplicaClient mimics the parts of google.cloud.bigquery.Client used by
+the app (project, query().to_dataframe(), get_table()), so every query
+function keeps its signature and return shape.
+
+Command line usage:
+    python -m database.local_replica snapshot   # BigQuery tables -> Parquet files
+    python -m database.local_replica record     # Save reference results from BigQuery
+    python -m database.local_replica verify     # Compare replica results with the recording
+"""
+import argparse
+import datetime
+import inspect
+import json
+import os
+import pickle
+import re
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from database.query_runner import arrow_to_dataframe, run_query
+
+
+MANIFEST_FILE = "manifest.json"
+RECORDED_DIR = "recorded"
+
+# `project.dataset.table` -> "table"
+_TABLE_REF_PATTERN = re.compile(r"`[\w-]+\.[\w-]+\.(\w+)`")
+# BigQuery arrays are 0-based via OFFSET(n), DuckDB lists are 1-based
+_OFFSET_PATTERN = re.compile(r"\[\s*OFFSET\s*\(\s*(\d+)\s*\)\s*\]", re.IGNORECASE)
+_APPROX_QUANTILES_PATTERN = re.compile(r"APPROX_QUANTILES\s*\(", re.IGNORECASE)
+_SAFE_CAST_PATTERN = re.compile(r"\bSAFE_CAST\s*\(", re.IGNORECASE)
+_GENERATE_ARRAY_PATTERN = re.compile(r"\bGENERATE_ARRAY\s*\(", re.IGNORECASE)
+# Query parameters: BigQuery @name -> DuckDB $name, arrays are unnested in a subquery
+_UNNEST_PARAM_PATTERN = re.compile(r"\bIN\s+UNNEST\s*\(\s*@(\w+)\s*\)", re.IGNORECASE)
+_PARAM_PATTERN = re.compile(r"@(\w+)")
+_TYPE_PATTERNS = [
+    (re.compile(r"\bINT64\b", re.IGNORECASE), "BIGINT"),
+    (re.compile(r"\bFLOAT64\b", re.IGNORECASE), "DOUBLE"),
+    (re.compile(r"\bBOOL\b", re.IGNORECASE), "BOOLEAN"),
+]
+
+# Arrow -> BigQuery type names reported by get_table()
+_BQ_TYPE_NAMES = [
+    (pa.types.is_integer, "INTEGER"),
+    (pa.types.is_floating, "FLOAT"),
+    (pa.types.is_decimal, "NUMERIC"),
+    (pa.types.is_boolean, "BOOLEAN"),
+    (pa.types.is_date, "DATE"),
+    (pa.types.is_timestamp, "TIMESTAMP"),
+    (pa.types.is_string, "STRING"),
+    (pa.types.is_large_string, "STRING"),
+]
+
+
+def _replica_path(table_name, replica_dir=None):
+    return os.path.join(replica_dir or config.LOCAL_REPLICA_DIR, f"{table_name}.parquet")
+
+
+def _replace_approx_quantiles(query):
+    """
+    Rewrite APPROX_QUANTILES(expr, n) as QUANTILE_DISC(expr, [0, 1/n, ..., 1]).
+
+    Both return n + 1 boundaries, so the [OFFSET(k)] lookups used by the
+    median calculations keep their meaning once converted to 1-based indexes.
+    """
+    parts = []
+    position = 0
+
+    while True:
+        match = _APPROX_QUANTILES_PATTERN.search(query, position)
+        if not match:
+            parts.append(query[position:])
+            break
+
+        parts.append(query[position:match.start()])
+
+        # Walk to the matching closing parenthesis, remembering the last top-level comma
+        depth = 1
+        index = match.end()
+        split_at = None
+        while depth:
+            char = query[index]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "," and depth == 1:
+                split_at = index
+            index += 1
+
+        expression = query[match.end():split_at].strip()
+        buckets = int(query[split_at + 1:index - 1].strip())
+        fractions = ", ".join(str(step / buckets) for step in range(buckets + 1))
+        parts.append(f"QUANTILE_DISC({expression}, [{fractions}])")
+        position = index
+
+    return "".join(parts)
+
+
+def translate_query(query):
+    """
+    Translate the BigQuery SQL dialect used by this app to DuckDB SQL.
+
+    Args:
+        query: BigQuery Standard SQL string
+
+    Returns:
+        Equivalent DuckDB SQL string
+    """
+    translated = _TABLE_REF_PATTERN.sub(r'"\1"', query)
+    translated = _replace_approx_quantiles(translated)
+    translated = _OFFSET_PATTERN.sub(lambda m: f"[{int(m.group(1)) + 1}]", translated)
+    translated = _SAFE_CAST_PATTERN.sub("TRY_CAST(", translated)
+    translated = _GENERATE_ARRAY_PATTERN.sub("generate_series(", translated)
+    translated = _UNNEST_PARAM_PATTERN.sub(lambda m: f"IN (SELECT UNNEST(${m.group(1)}))", translated)
+    translated = _PARAM_PATTERN.sub(lambda m: f"${m.group(1)}", translated)
+    for pattern, replacement in _TYPE_PATTERNS:
+        translated = pattern.sub(replacement, translated)
+    return translated
+
+
+def _normalize_arrow(arrow_table):
+    """Cast DuckDB-specific result types to the types BigQuery would return."""
+    columns = []
+    for field, column in zip(arrow_table.schema, arrow_table.columns):
+        if pa.types.is_decimal(field.type):
+            # DuckDB returns SUM(BIGINT) as HUGEINT and 100.0 literals as DECIMAL
+            target = pa.int64() if field.type.scale == 0 else pa.float64()
+            column = column.cast(target)
+        elif pa.types.is_integer(field.type) and field.type != pa.int64():
+            column = column.cast(pa.int64())
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=arrow_table.column_names)
+
+
+class LocalQueryJob:
+    """Completed query job holding a DuckDB result, shaped like bigquery.QueryJob."""
+
+    state = "DONE"
+    cache_hit = False
+    total_bytes_processed = 0
+
+    def __init__(self, query, arrow_table):
+        self.query = query
+        self._arrow_table = arrow_table
+
+    def done(self, *args, **kwargs):
+        return True
+
+    def result(self, *args, **kwargs):
+        return self
+
+    def to_arrow(self, *args, **kwargs):
+        return self._arrow_table
+
+    def to_dataframe(self, *args, **kwargs):
+        # Same nullable dtypes as QueryJob.to_dataframe()
+        return arrow_to_dataframe(self._arrow_table, dictionary_columns=())
+
+
+class LocalTable:
+    """Table metadata for a replicated table, shaped like bigquery.Table."""
+
+    def __init__(self, table_id, schema, num_rows, num_bytes, modified):
+        self.table_id = table_id
+        self.schema = schema
+        self.num_rows = num_rows
+        self.num_bytes = num_bytes
+        self.modified = modified
+
+
+class LocalReplicaClient:
+    """
+    Drop-in replacement for bigquery.Client backed by local Parquet snapshots.
+
+    Each snapshot is loaded once into an in-memory DuckDB database; queries are
+    translated from BigQuery SQL and executed on a per-call cursor so the client
+    can be shared across Streamlit sessions and threads.
+    """
+
+    def __init__(self, replica_dir=None):
+        import duckdb
+
+        self.project = config.GCP_PROJECT_ID
+        self.replica_dir = replica_dir or config.LOCAL_REPLICA_DIR
+        self._connection = duckdb.connect(database=":memory:")
+        self._tables = {}
+
+        # FARM_FINGERPRINT stand-in (a different hash, but a non-negative INT64 as well)
+        self._connection.execute("CREATE MACRO FARM_FINGERPRINT(value) AS CAST(hash(value) >> 1 AS BIGINT)")
+
+        for table_name in config.TABLES.values():
+            path = _replica_path(table_name, self.replica_dir)
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Local replica of {table_name} not found at {path}. "
+                    "Run 'python -m database.local_replica snapshot' first."
+                )
+            self._load(table_name, path)
+
+        # Staging and summary tables built by database/staging.py and
+        # database/summary_tables.py, if any
+        prefixes = (config.STAGING_TABLE_PREFIX, config.SUMMARY_TABLE_PREFIX)
+        for name in sorted(os.listdir(self.replica_dir)):
+            if name.startswith(prefixes) and name.endswith(".parquet"):
+                self._load(name[:-len(".parquet")], os.path.join(self.replica_dir, name))
+
+    def _load(self, table_name, path):
+        escaped_path = path.replace("'", "''")
+        self._connection.execute(
+            f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM read_parquet(\'{escaped_path}\')'
+        )
+        self._tables[table_name] = path
+
+    def query(self, query, job_config=None, **kwargs):
+        """Run a BigQuery SQL string (with optional query parameters) against the replica."""
+        translated = translate_query(query)
+
+        # Bind the parameters the statement references (ArrayQueryParameter / ScalarQueryParameter)
+        parameters = {}
+        for parameter in getattr(job_config, "query_parameters", None) or []:
+            if re.search(rf"\${re.escape(parameter.name)}\b", translated):
+                value = parameter.values if hasattr(parameter, "values") else parameter.value
+                parameters[parameter.name] = value
+
+        cursor = self._connection.cursor()
+        try:
+            if parameters:
+                arrow_table = cursor.execute(translated, parameters).arrow()
+            else:
+                arrow_table = cursor.execute(translated).arrow()
+        finally:
+            cursor.close()
+        if not isinstance(arrow_table, pa.Table):
+            # Newer DuckDB releases return a RecordBatchReader
+            arrow_table = arrow_table.read_all()
+        return LocalQueryJob(query, _normalize_arrow(arrow_table))
+
+    def materialize(self, table_name, query):
+        """
+        Stand-in for CREATE OR REPLACE TABLE ... AS: write a query's result as a new replicated table.
+
+        Args:
+            table_name: Name of the new table
+            query: BigQuery SQL string producing its rows
+
+        Returns:
+            int: Number of rows written
+        """
+        arrow_table = self.query(query).to_arrow()
+
+        # Write to a temp file first so a running app never sees a partial file
+        path = _replica_path(table_name, self.replica_dir)
+        pq.write_table(arrow_table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+
+        self._load(table_name, path)
+        return arrow_table.num_rows
+
+    def get_table(self, table_ref):
+        """Return schema and size metadata for a replicated table."""
+        from google.cloud import bigquery
+
+        table_name = str(table_ref).split(".")[-1]
+        path = self._tables[table_name]
+        metadata = pq.read_metadata(path)
+
+        schema = []
+        for field in metadata.schema.to_arrow_schema():
+            field_type = next(
+                (name for check, name in _BQ_TYPE_NAMES if check(field.type)),
+                "STRING"
+            )
+            schema.append(bigquery.SchemaField(
+                field.name,
+                field_type,
+                mode="NULLABLE" if field.nullable else "REQUIRED"
+            ))
+
+        modified = datetime.datetime.fromtimestamp(os.path.getmtime(path), tz=datetime.timezone.utc)
+        return LocalTable(table_name, schema, metadata.num_rows, os.path.getsize(path), modified)
+
+
+def snapshot_tables(client, replica_dir=None):
+    """
+    Download every table in config.TABLES to a local Parquet file.
+
+    Uses tabledata.list (client.list_rows), which is not billed as a query scan.
+
+    Args:
+        client: BigQuery client instance
+        replica_dir: Output directory (default: config.LOCAL_REPLICA_DIR)
+
+    Returns:
+        dict: Manifest with snapshot time and row count per table
+    """
+    replica_dir = replica_dir or config.LOCAL_REPLICA_DIR
+    os.makedirs(replica_dir, exist_ok=True)
+
+    manifest = {
+        "project": config.GCP_PROJECT_ID,
+        "dataset": config.BQ_DATASET,
+        "snapshot_time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "tables": {}
+    }
+
+    for table_name in config.TABLES.values():
+        table_ref = f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}"
+        print(f"Snapshotting {table_ref}...", flush=True)
+        arrow_table = client.list_rows(table_ref).to_arrow()
+
+        # Write to a temp file first so a running app never sees a partial file
+        path = _replica_path(table_name, replica_dir)
+        pq.write_table(arrow_table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+
+        manifest["tables"][table_name] = {"rows": arrow_table.num_rows}
+        print(f"✓ {table_name}: {arrow_table.num_rows:,} rows", flush=True)
+
+    with open(os.path.join(replica_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+# ============================================================================
+# Verification against recorded BigQuery results
+# ============================================================================
+
+# Table used by each query function, matching the calls made in app.py
+FUNCTION_TABLES = {
+    "get_grouped_counts": "surveys",
+    "get_row_count": "surveys",
+    "get_country_counts_by_period": "surveys",
+    "get_region_counts_by_period": "surveys",
+    "get_sector_counts_by_period": "surveys",
+    "get_data_collection_periods": "surveys",
+    "get_selected_periods_summary": "surveys",
+    "get_facility_data": "surveys",
+    "fetch_facility_statistics": "surveys",
+    "get_sector_values": "surveys",
+    "get_insulin_regions": "surveys",
+    "get_insulin_sectors": "surveys",
+    "get_insulin_availability_metrics": "surveys",
+    "get_insulin_by_sector_regions": "surveys",
+    "get_insulin_by_sector_chart_data": "surveys",
+    "get_insulin_by_type_regions": "repeat_repivot",
+    "get_insulin_by_type_sectors": "repeat_repivot",
+    "get_insulin_by_type_human_chart_data": "repeat_repivot",
+    "get_insulin_by_type_analogue_chart_data": "repeat_repivot",
+    "get_insulin_by_region_sectors": "surveys",
+    "get_insulin_by_region_human_chart_data": "repeat_repivot",
+    "get_insulin_by_region_analogue_chart_data": "repeat_repivot",
+    "get_insulin_public_levelcare_regions": "repeat_repivot",
+    "get_insulin_public_levelcare_human_chart_data": "repeat_repivot",
+    "get_insulin_public_levelcare_analogue_chart_data": "repeat_repivot",
+    "get_insulin_by_inn_regions": "surveys",
+    "get_insulin_by_inn_sectors": "surveys",
+    "get_insulin_by_inn_chart_data": "repeat_repivot",
+    "get_insulin_top_brands_sectors": "surveys",
+    "get_insulin_top_brands_chart_data": "surveys_repeat",
+    "get_insulin_by_presentation_regions": "surveys",
+    "get_insulin_by_presentation_sectors": "surveys",
+    "get_insulin_by_presentation_chart_data": "repeat_repivot",
+    "get_insulin_originator_biosimilar_regions": "surveys",
+    "get_insulin_originator_biosimilar_sectors": "surveys",
+    "get_insulin_human_originator_metric": "repeat_repivot",
+    "get_insulin_analogue_originator_metric": "repeat_repivot",
+    "get_insulin_human_biosimilar_metric": "repeat_repivot",
+    "get_insulin_analogue_biosimilar_metric": "repeat_repivot",
+    "get_comparator_medicine_regions": "surveys",
+    "get_comparator_medicine_sectors": "surveys",
+    "get_comparator_medicine_table_data": "comparators",
+    "get_price_regions": "surveys_repeat",
+    "get_price_sectors": "surveys_repeat",
+    "get_median_price_by_type": "surveys_repeat",
+    "get_median_price_by_type_levelcare": "surveys_repeat",
+    "debug_level_of_care_values": "surveys_repeat",
+    "get_price_by_inn": "surveys_repeat",
+    "get_price_by_brand_human": "surveys_repeat",
+    "get_price_by_brand_analogue": "surveys_repeat",
+    "get_median_price_by_presentation": "surveys_repeat",
+    "get_median_price_by_originator_human": "surveys_repeat",
+    "get_median_price_by_originator_analogue": "surveys_repeat",
+    "get_free_insulin_regions": "surveys",
+    "get_free_insulin_sectors": "surveys",
+    "get_facilities_providing_free": "surveys_repeat",
+    "get_reasons_insulin_free": "surveys_repeat",
+    "get_facilities_not_full_price": "surveys_repeat",
+    "get_reasons_not_full_price": "surveys_repeat",
+}
+
+# Results whose row order is not fixed by an ORDER BY (brands tie on facility_count)
+_UNORDERED_FUNCTIONS = {"get_facility_data", "get_price_by_brand_human", "get_price_by_brand_analogue"}
+
+
+def _ticked_values(client, table_name, column, periods):
+    """Every non-NULL value of a column in the periods: what a local checkbox list offers."""
+    df = run_query(
+        client,
+        f"SELECT DISTINCT {column} FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}` "
+        f"WHERE {column} IS NOT NULL AND data_collection_period IN UNNEST(@periods)",
+        {"periods": periods}
+    )
+    return sorted(df[column].tolist())
+
+
+def _verification_cases(client, max_periods=3):
+    """
+    Build (case_id, function, kwargs) tuples covering every query function.
+
+    Each function is called once per data collection period (the most recent
+    max_periods) and once for all periods combined, with every Region/Sector
+    selection left empty (no filter). Functions taking selections get a
+    second "ticked" case with every box ticked, as the dashboard passes them
+    by default: the Data Selector options for countries and regions, every
+    non-NULL value for the local lists. These leave out Test Survey and NULL
+    regions/sectors, so they must not match like no filter.
+    """
+    from database import bigquery_client
+
+    surveys_table = config.TABLES["surveys"]
+    bigquery_client.get_data_collection_periods.clear()
+    period_df = bigquery_client.get_data_collection_periods(client, surveys_table)
+    if period_df is None or period_df.empty:
+        return []
+
+    periods = sorted(period_df["data_collection_period"].tolist(), reverse=True)
+    period_sets = [[period] for period in periods[:max_periods]] + [periods]
+    selection_parameters = {"global_filters", "filters", "local_regions", "local_sectors", "selected_regions"}
+
+    cases = []
+    for function_name, table_key in FUNCTION_TABLES.items():
+        function = getattr(bigquery_client, function_name)
+        parameters = inspect.signature(function).parameters
+        table_name = config.TABLES[table_key]
+
+        for index, period_set in enumerate(period_sets):
+            filters = {"data_collection_period": period_set, "country": None, "region": None}
+            values = {
+                "_client": client,
+                "table_name": table_name,
+                "selected_periods": period_set,
+                "global_filters": filters,
+                "filters": filters,
+                "local_regions": [],
+                "local_sectors": [],
+                "selected_regions": [] if "global_filters" in parameters else None,
+                "group_by_column": "country",
+            }
+            kwargs = {name: values[name] for name in parameters if name in values}
+            period_label = "all" if len(period_set) > 1 else period_set[0]
+            case_id = f"{function_name}__{re.sub(r'[^A-Za-z0-9]+', '_', period_label)}"
+            cases.append((case_id, function, kwargs))
+
+            if selection_parameters & set(parameters):
+                countries = bigquery_client.get_country_counts_by_period(client, surveys_table, period_set)
+                global_regions = bigquery_client.get_region_counts_by_period(client, surveys_table, period_set)
+                local_regions = _ticked_values(client, table_name, "region", period_set)
+                local_sectors = _ticked_values(client, table_name, "sector", period_set)
+                global_filters = {
+                    "data_collection_period": period_set,
+                    "country": sorted(countries["country"].tolist()),
+                    "region": sorted(global_regions["region"].tolist())
+                }
+                values.update({
+                    "global_filters": global_filters,
+                    # Price sections: the local lists replace the global region filter
+                    "filters": dict(global_filters, region=local_regions, sector=local_sectors),
+                    "local_regions": local_regions,
+                    "local_sectors": local_sectors,
+                    "selected_regions": local_regions if "global_filters" in parameters else global_filters["region"],
+                    "selected_countries": global_filters["country"],
+                })
+                kwargs = {name: values[name] for name in parameters if name in values}
+                cases.append((f"{case_id}__ticked", function, kwargs))
+
+            if "selected_periods" not in parameters and "filters" not in parameters \
+                    and "global_filters" not in parameters:
+                # Period-independent functions only need one case
+                break
+
+    return cases
+
+
+def _normalize_result(case_id, result):
+    if isinstance(result, pd.DataFrame):
+        result = result.reset_index(drop=True)
+        if case_id.split("__")[0] in _UNORDERED_FUNCTIONS and not result.empty:
+            result = result.sort_values(list(result.columns)).reset_index(drop=True)
+    return result
+
+
+def _decategorize(df):
+    categorical = df.select_dtypes("category").columns
+    if len(categorical) == 0:
+        return df
+    return df.astype({column: df[column].cat.categories.dtype for column in categorical})
+
+
+def _results_match(expected, actual):
+    """Compare two query function results, tolerating dtype and float rounding noise."""
+    if isinstance(expected, pd.DataFrame) or isinstance(actual, pd.DataFrame):
+        if not (isinstance(expected, pd.DataFrame) and isinstance(actual, pd.DataFrame)):
+            return False, "result type differs"
+        # Dictionary-encoded (categorical) columns compare by value
+        expected, actual = _decategorize(expected), _decategorize(actual)
+        try:
+            pd.testing.assert_frame_equal(
+                expected, actual, check_dtype=False, check_exact=False, rtol=1e-6
+            )
+        except AssertionError as e:
+            return False, str(e).splitlines()[0]
+        return True, ""
+
+    if expected != actual:
+        return False, f"expected {expected!r}, got {actual!r}"
+    return True, ""
+
+
+def record_results(client, replica_dir=None):
+    """
+    Run every verification case against BigQuery and save the results.
+
+    Args:
+        client: BigQuery client instance
+        replica_dir: Replica directory (default: config.LOCAL_REPLICA_DIR)
+
+    Returns:
+        int: Number of recorded cases
+    """
+    recorded_dir = os.path.join(replica_dir or config.LOCAL_REPLICA_DIR, RECORDED_DIR)
+    os.makedirs(recorded_dir, exist_ok=True)
+
+    cases = _verification_cases(client)
+    for case_id, function, kwargs in cases:
+        # _client is not part of the cache key, so clear to force a real query
+        function.clear()
+        result = _normalize_result(case_id, function(**kwargs))
+        with open(os.path.join(recorded_dir, f"{case_id}.pkl"), "wb") as f:
+            pickle.dump(result, f)
+        print(f"✓ Recorded {case_id}", flush=True)
+
+    return len(cases)
+
+
+def verify_replica(replica_dir=None):
+    """
+    Re-run every recorded case against the local replica and compare results.
+
+    Args:
+        replica_dir: Replica directory (default: config.LOCAL_REPLICA_DIR)
+
+    Returns:
+        list: (case_id, message) tuples for every mismatching case
+    """
+    replica_dir = replica_dir or config.LOCAL_REPLICA_DIR
+    recorded_dir = os.path.join(replica_dir, RECORDED_DIR)
+    local_client = LocalReplicaClient(replica_dir)
+
+    mismatches = []
+    recorded = {name[:-4] for name in os.listdir(recorded_dir) if name.endswith(".pkl")}
+    for case_id, function, kwargs in _verification_cases(local_client):
+        if case_id not in recorded:
+            continue
+        with open(os.path.join(recorded_dir, f"{case_id}.pkl"), "rb") as f:
+            expected = pickle.load(f)
+
+        function.clear()
+        actual = _normalize_result(case_id, function(**kwargs))
+        matches, message = _results_match(expected, actual)
+        if matches:
+            print(f"✓ {case_id}", flush=True)
+        else:
+            print(f"✗ {case_id}: {message}", flush=True)
+            mismatches.append((case_id, message))
+
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local replica of the BigQuery tables.")
+    parser.add_argument("command", choices=["snapshot", "record", "verify"])
+    parser.add_argument("--replica-dir", default=config.LOCAL_REPLICA_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        mismatches = verify_replica(args.replica_dir)
+        print(f"{len(mismatches)} mismatching case(s)", flush=True)
+        return 1 if mismatches else 0
+
+    from database.bigquery_client import create_bigquery_client
+
+    client = create_bigquery_client()
+    if client is None:
+        return 1
+
+    if args.command == "snapshot":
+        snapshot_tables(client, args.replica_dir)
+    else:
+        count = record_results(client, args.replica_dir)
+        print(f"Recorded {count} case(s)", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Metric batches: sibling queries merged into one conditional-aggregation scan.
+
+Several sections run two or four queries that are identical except for one
+predicate, e.g. the Human and Analogue charts only differ in
+"insulin_type LIKE '%Human%'" versus "'%Analogue%'". A batch declares those
+sibling metrics once:
+
+    where:      predicates every metric shares
+    group_by:   grouping columns (empty for single-row metrics)
+    order_by:   (column, ascending) pairs, as in the functions' ORDER BY
+    aggregates: output column -> SQL aggregate; {column} placeholders are
+                replaced by "CASE WHEN <metric condition> THEN column END"
+                ({row} counts the metric's rows, like COUNT(1))
+    metrics:    metric name -> its own predicate
+
+run_metric_batch compiles a batch into one query over the rows matching any
+metric, computing every aggregate per metric with the masked columns. Since
+aggregates ignore NULLs, each metric's columns equal what its own query
+returns; metric_result splits them back into that query's result shape.
+The first sibling call runs the scan, the others read it from the cache.
+
+Distinct counts, MIN/MAX and the median CASE expressions all skip NULL inputs,
+so they can be masked this way. APPROX_QUANTILES sees exactly the same
+non-NULL values as in the metric's own query.
+"""
+from database.freshness import cached_query
+from database.query_builder import add_in_filter
+from database.query_runner import run_query
+from database.staging import sector_category_flag, staged_table
+
+
+_AVAILABILITY_AGGREGATES = {
+    "total_facilities": "COUNT(DISTINCT {form_case__case_id})",
+    "facilities_with_insulin": "COUNT(DISTINCT CASE WHEN {is_unavailable} = 0 THEN {form_case__case_id} END)",
+    "availability_percentage": """CASE
+            WHEN COUNT(DISTINCT {form_case__case_id}) > 0
+            THEN ROUND((COUNT(DISTINCT CASE WHEN {is_unavailable} = 0 THEN {form_case__case_id} END) * 100.0) / COUNT(DISTINCT {form_case__case_id}), 1)
+            ELSE 0
+        END""",
+}
+
+_HUMAN_ANALOGUE = {
+    "human": "insulin_type LIKE '%Human%'",
+    "analogue": "insulin_type LIKE '%Analogue%'",
+}
+
+_OUT_OF_POCKET = "(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')"
+
+
+def _median(column):
+    """The median CASE expression of the price functions, for a {placeholder} column."""
+    return f"""CASE
+        WHEN MOD(COUNT({{{column}}}), 2) = 1 THEN APPROX_QUANTILES({{{column}}}, 2)[OFFSET(1)]
+        WHEN MOD(COUNT({{{column}}}), 2) = 0 AND COUNT({{{column}}}) >= 100 THEN APPROX_QUANTILES({{{column}}}, 2)[OFFSET(1)]
+        ELSE (APPROX_QUANTILES({{{column}}}, 100)[OFFSET(49)] + APPROX_QUANTILES({{{column}}}, 100)[OFFSET(51)]) / 2
+      END"""
+
+
+# Batch layouts (each mirrors the SQL of its sibling bigquery_client functions)
+BATCHES = {
+    # Plan 11 scorecards: get_insulin_{human,analogue}_{originator,biosimilar}_metric
+    "originator_metrics": {
+        "where": [],
+        "group_by": [],
+        "order_by": [],
+        "aggregates": _AVAILABILITY_AGGREGATES,
+        "metrics": {
+            "human_originator": "insulin_originator_biosimilar = 'Originator Brand' AND insulin_type LIKE '%Human%'",
+            "analogue_originator": "insulin_originator_biosimilar = 'Originator Brand' AND insulin_type LIKE '%Analogue%'",
+            "human_biosimilar": "insulin_originator_biosimilar = 'Biosimilar' AND insulin_type LIKE '%Human%'",
+            "analogue_biosimilar": "insulin_originator_biosimilar = 'Biosimilar' AND insulin_type LIKE '%Analogue%'",
+        },
+    },
+    # Plan 5: get_insulin_by_type_{human,analogue}_chart_data
+    "by_type_charts": {
+        "where": ["insulin_type IS NOT NULL"],
+        "group_by": ["insulin_type", "insulin_type_order"],
+        "order_by": [("insulin_type_order", True)],
+        "aggregates": _AVAILABILITY_AGGREGATES,
+        "metrics": _HUMAN_ANALOGUE,
+    },
+    # Plan 6: get_insulin_by_region_{human,analogue}_chart_data
+    "by_region_charts": {
+        "where": ["region IS NOT NULL", "insulin_type IS NOT NULL"],
+        "group_by": ["region"],
+        "order_by": [("region", True)],
+        "aggregates": _AVAILABILITY_AGGREGATES,
+        "metrics": _HUMAN_ANALOGUE,
+    },
+    # Plan 7: get_insulin_public_levelcare_{human,analogue}_chart_data
+    "public_levelcare_charts": {
+        "where": [
+            sector_category_flag("public"),
+            "insulin_type IS NOT NULL",
+            "level_of_care IS NOT NULL",
+        ],
+        "group_by": ["level_of_care"],
+        "order_by": [("level_of_care", True)],
+        "aggregates": _AVAILABILITY_AGGREGATES,
+        "metrics": _HUMAN_ANALOGUE,
+    },
+    # Price tab: get_price_by_brand_{human,analogue}
+    "price_by_brand": {
+        "where": [
+            "insulin_standard_price_local IS NOT NULL",
+            "insulin_brand IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_brand"],
+        "order_by": [("facility_count", False)],
+        "aggregates": {
+            "facility_count": "COUNT(DISTINCT {form_case__case_id})",
+            "min_price_local": "MIN({insulin_standard_price_local})",
+            "median_price_local": _median("insulin_price_local"),
+            "max_price_local": "MAX({insulin_standard_price_local})",
+        },
+        "metrics": _HUMAN_ANALOGUE,
+    },
+    # Price tab: get_median_price_by_originator_{human,analogue}
+    "median_price_by_originator": {
+        "where": [
+            "insulin_originator_biosimilar IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_originator_biosimilar"],
+        "order_by": [("insulin_originator_biosimilar", False)],
+        "aggregates": {
+            "median_price_local": _median("insulin_standard_price_local"),
+            "product_count": "COUNT({row})",
+        },
+        "metrics": _HUMAN_ANALOGUE,
+    },
+}
+
+ROWS_COLUMN = "rows"
+
+
+class _Masked(dict):
+    """format_map mapping that turns every {column} into the metric-masked column."""
+
+    def __init__(self, condition):
+        super().__init__()
+        self.condition = condition
+
+    def __missing__(self, column):
+        value = 1 if column == "row" else column
+        return f"CASE WHEN {self.condition} THEN {value} END"
+
+
+def build_batch_query(table_name, batch, filters, local_regions=None, local_sectors=None):
+    """
+    Compile a batch into one conditional-aggregation query.
+
+    Args:
+        table_name: Table name
+        batch (dict): Batch layout from BATCHES
+        filters (dict): Global filters (data_collection_period, country, region, sector)
+        local_regions (list): Selected regions from local Region dropdown
+        local_sectors (list): Selected sectors from local Sector dropdown
+
+    Returns:
+        tuple: (SQL query with "<metric>__<column>" and "<metric>__rows" columns, query parameters)
+    """
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", filters['data_collection_period'])
+
+    # Add country, region and sector filters (optional)
+    add_in_filter(where_clauses, params, "country", filters.get('country'))
+    add_in_filter(where_clauses, params, "region", filters.get('region'))
+    add_in_filter(where_clauses, params, "sector", filters.get('sector'))
+
+    # Add local region/sector filters (optional)
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
+    add_in_filter(where_clauses, params, "sector", local_sectors, "local_sectors")
+
+    where_clauses += batch['where']
+
+    # Only rows some metric needs
+    conditions = [f"({condition})" for condition in batch['metrics'].values()]
+    where_clauses.append(f"({' OR '.join(conditions)})")
+
+    where_clause = " AND ".join(where_clauses)
+
+    select_columns = list(batch['group_by'])
+    for metric, condition in batch['metrics'].items():
+        masked = _Masked(condition)
+        select_columns.append(f"COUNT({masked['row']}) as {metric}__{ROWS_COLUMN}")
+        for column, aggregate in batch['aggregates'].items():
+            select_columns.append(f"{aggregate.format_map(masked)} as {metric}__{column}")
+
+    group_by_clause = f"GROUP BY {', '.join(batch['group_by'])}" if batch['group_by'] else ""
+    select_clause = ",\n        ".join(select_columns)
+
+    query = f"""
+    SELECT
+        {select_clause}
+    FROM {staged_table(table_name)}
+    WHERE {where_clause}
+    {group_by_clause}
+    """
+    return query, params
+
+
+@cached_query(show_spinner=False)
+def run_metric_batch(_client, table_name, batch_name, filters, local_regions=None, local_sectors=None):
+    """
+    Run every metric of a batch in one scan.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        batch_name (str): Key of BATCHES
+        filters (dict): Global filters (data_collection_period, country, region, sector)
+        local_regions (list): Selected regions from local Region dropdown
+        local_sectors (list): Selected sectors from local Sector dropdown
+
+    Returns:
+        pandas DataFrame with the group_by columns and every metric's columns,
+        or None if the query failed
+    """
+    query, params = build_batch_query(table_name, BATCHES[batch_name], filters, local_regions, local_sectors)
+
+    try:
+        return run_query(_client, query, params)
+    except Exception as e:
+        # Metrics fall back to their own queries, which report errors themselves
+        print(f"⚠ Metric batch {batch_name} for {table_name} failed: {str(e)}", flush=True)
+        return None
+
+
+def metric_result(_client, table_name, batch_name, metric, filters, local_regions=None, local_sectors=None):
+    """
+    Get one metric of a batch in the shape its own query returns.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        batch_name (str): Key of BATCHES
+        metric (str): Metric name within the batch
+        filters (dict): Global filters (data_collection_period, country, region, sector)
+        local_regions (list): Selected regions from local Region dropdown
+        local_sectors (list): Selected sectors from local Sector dropdown
+
+    Returns:
+        pandas DataFrame with the group_by and aggregate columns, or None to
+        fall back to the metric's own query
+    """
+    batch = BATCHES[batch_name]
+    df = run_metric_batch(_client, table_name, batch_name, filters, local_regions, local_sectors)
+    if df is None:
+        return None
+
+    if batch['group_by']:
+        # Groups only some other metric has rows in
+        df = df[df[f"{metric}__{ROWS_COLUMN}"] > 0]
+
+    columns = {f"{metric}__{column}": column for column in batch['aggregates']}
+    df = df[batch['group_by'] + list(columns)].rename(columns=columns)
+
+    if batch['order_by']:
+        # Stable sort on the grouping columns first, so ties come out in a fixed order
+        df = df.sort_values(batch['group_by'], kind='mergesort')
+        # BigQuery orders NULL first ascending and last descending
+        for column, ascending in reversed(batch['order_by']):
+            df = df.sort_values(column, ascending=ascending, kind='mergesort', na_position='first' if ascending else 'last')
+
+    return df.reset_index(drop=True)
@@ -0,0 +1,254 @@
+"""
+Concurrent prefetch of the dashboard's section queries.
+
+Each section renders one after another on the page, and its cached query
+functions used to run strictly in sequence, so a cold page waited for the sum
+of all query round trips. Right after the Data Selectors resolve, app.py now
+calls prefetch_availability_sections / prefetch_price_sections, which submit
+every section's query functions to a bounded thread pool sharing the one
+get_bigquery_client() connection (the BigQuery client is thread-safe, the
+local replica uses a cursor per call).
+
+The prefetch does not block rendering. It calls the same @st.cache_data
+functions with the same arguments the rendering code will use, so:
+    - a finished prefetch turns the rendering call into a cache hit
+    - a prefetch still in flight makes the rendering call wait for that
+      result (st.cache_data computes each key once), it never re-runs the query
+Wall time for a cold page is therefore roughly the slowest chain of dependent
+queries (Region options -> Sector options -> chart), not the sum of all.
+
+The calls come from the section registry (components/sections.py), the same
+section_option_call / section_data_calls the rendering runtime uses, and local
+Region/Sector selections are rebuilt from the checkbox states in
+st.session_state exactly like the rendering code builds them, so the cache
+keys match. Worker threads run without a ScriptRunContext on purpose: cache
+spinners would otherwise be drawn from several threads into the page.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from database.bigquery_client import fetch_facility_statistics, get_selected_periods_summary
+from database.query_builder import canonical_values
+
+
+# Worker threads have no ScriptRunContext (see module docstring); silence the
+# "missing ScriptRunContext" warning Streamlit logs for every cached call there
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").setLevel(logging.ERROR)
+
+# One bounded pool per server process, shared by all sessions
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, config.PREFETCH_MAX_WORKERS),
+    thread_name_prefix="prefetch"
+)
+
+
+class PrefetchBatch:
+    """
+    Set of query function calls submitted to the shared prefetch pool.
+
+    fetch() submits calls concurrently; its optional callback receives their
+    results once all of them finished and may fetch() dependent calls, which
+    are submitted before the parent calls count as done, so wait() covers them.
+    """
+
+    def __init__(self):
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def fetch(self, calls, then=None):
+        """
+        Submit (function, args) calls to the pool.
+
+        Args:
+            calls (list): (function, args tuple) pairs
+            then (callable): Called with the list of results (None for a
+                failed call) once every call finished
+        """
+        calls = list(calls)
+        if not calls:
+            if then is not None:
+                then([])
+            return
+
+        results = [None] * len(calls)
+        remaining = [len(calls)]
+        results_lock = threading.Lock()
+
+        def _run(index, function, args):
+            results[index] = _call(function, args)
+            with results_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and then is not None:
+                try:
+                    then(results)
+                except Exception as e:
+                    print(f"⚠ Prefetch callback failed: {str(e)}", flush=True)
+
+        with self._lock:
+            for index, (function, args) in enumerate(calls):
+                self._futures.append(_executor.submit(_run, index, function, args))
+
+    def wait(self, timeout=None):
+        """
+        Block until every submitted call (including dependent ones) finished.
+
+        The page never calls this, rendering waits per query through the
+        cache; it is meant for scripts and benchmarks.
+
+        Args:
+            timeout (float): Seconds to wait per call (None waits indefinitely)
+        """
+        index = 0
+        while True:
+            with self._lock:
+                if index >= len(self._futures):
+                    return
+                future = self._futures[index]
+            future.result(timeout=timeout)
+            index += 1
+
+
+def _call(function, args):
+    try:
+        return function(*args)
+    except Exception as e:
+        # Rendering calls the function again and reports the error in the page
+        print(f"⚠ Prefetch of {getattr(function, '__name__', function)} failed: {str(e)}", flush=True)
+        return None
+
+
+def checkbox_selection(options_df, column, key_prefix, checkbox_states):
+    """
+    Rebuild a local checkbox filter selection the way the section runtime builds it.
+
+    Args:
+        options_df: DataFrame returned by the options query (or None)
+        column (str): Column holding the option values ('region' or 'sector')
+        key_prefix (str): Checkbox session state key prefix, e.g. 'insulin_region_'
+        checkbox_states (dict): Snapshot of st.session_state (unticked boxes are False,
+            boxes never rendered default to ticked)
+
+    Returns:
+        list: The selection the section will pass to the query functions
+    """
+    if options_df is None or options_df.empty:
+        return []
+
+    options = options_df[column].tolist()
+    selected = [value for value in options if checkbox_states.get(f"{key_prefix}{value}", True)]
+    return canonical_values(selected)
+
+
+def _prefetch_section(batch, spec, client, checkbox_states):
+    """
+    Fetch a section's option lists, rebuild its local selections from them, then fetch its data.
+
+    Options that depend on the local Region selection are fetched once the
+    Region options are in.
+
+    Args:
+        batch (PrefetchBatch): Batch to submit to
+        spec (dict): Section spec (components/sections.py)
+        client: BigQuery client
+        checkbox_states (dict): Snapshot of st.session_state
+    """
+    from components.sections import section_data_calls, section_global_filters, section_option_call
+
+    global_filters = section_global_filters(spec, checkbox_states)
+    dimensions = spec['dimensions']
+    independent = [dimension for dimension in dimensions if not dimension['by_region']]
+    dependent = [dimension for dimension in dimensions if dimension['by_region']]
+    selections = {}
+
+    def select(dimensions_fetched, results):
+        for dimension, options_df in zip(dimensions_fetched, results):
+            selections[dimension['column']] = checkbox_selection(
+                options_df, dimension['column'], dimension['key_prefix'], checkbox_states
+            )
+
+    def data(results):
+        select(dependent, results)
+        batch.fetch(section_data_calls(
+            spec, client, checkbox_states, [selections[dimension['column']] for dimension in dimensions]
+        ))
+
+    def dependent_options(results):
+        select(independent, results)
+        batch.fetch(
+            [section_option_call(spec, dimension, client, global_filters, selections.get('region', []))
+             for dimension in dependent],
+            then=data
+        )
+
+    batch.fetch(
+        [section_option_call(spec, dimension, client, global_filters, None) for dimension in independent],
+        then=dependent_options
+    )
+
+
+def _prefetch_view(batch, view, client, checkbox_states):
+    from components.sections import PERIODS_KEYS, SECTIONS, view_sections
+
+    periods = checkbox_states.get(PERIODS_KEYS[view])
+    for name in view_sections(view):
+        spec = SECTIONS[name]
+        # Sections hidden without a data collection period are not fetched
+        if spec['requires_periods'] and not periods:
+            continue
+        _prefetch_section(batch, spec, client, checkbox_states)
+
+
+def prefetch_availability_sections(client, checkbox_states):
+    """
+    Submit every Availability Analysis section query for the current selection.
+
+    Args:
+        client: BigQuery client (shared by all workers)
+        checkbox_states (dict): Snapshot of st.session_state taken after the Data Selectors
+
+    Returns:
+        PrefetchBatch, or None when no data collection period is selected
+    """
+    periods = checkbox_states.get("selected_periods")
+    if not periods:
+        return None
+
+    countries = checkbox_states.get("selected_countries")
+    regions = checkbox_states.get("selected_regions")
+    surveys = config.TABLES["surveys"]
+    global_filters = {
+        'data_collection_period': periods,
+        'country': countries if countries else None,
+        'region': regions if regions else None
+    }
+
+    batch = PrefetchBatch()
+
+    # Summary table and facility tree only need the global filters
+    batch.fetch([
+        (get_selected_periods_summary, (client, surveys, periods, global_filters['country'], global_filters['region'])),
+        (fetch_facility_statistics, (client, surveys, global_filters)),
+    ])
+
+    _prefetch_view(batch, "availability", client, checkbox_states)
+    return batch
+
+
+def prefetch_price_sections(client, checkbox_states):
+    """
+    Submit every Price Analysis section query for the current selection.
+
+    Args:
+        client: BigQuery client (shared by all workers)
+        checkbox_states (dict): Snapshot of st.session_state taken after the Data Selectors
+
+    Returns:
+        PrefetchBatch
+    """
+    batch = PrefetchBatch()
+    _prefetch_view(batch, "price", client, checkbox_states)
+    return batch
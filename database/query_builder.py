@@ -0,0 +1,117 @@
+"""
+Canonical filter/query builder shared by the query functions.
+
+Filter values are bound as BigQuery query parameters instead of being joined
+into the SQL text. Values are sorted and de-duplicated first, so the same
+logical selection always produces the same SQL and the same parameters no
+matter in which order the checkboxes were ticked. That keeps both
+st.cache_data and BigQuery's result cache hitting, and keeps long region
+lists out of the query text.
+
+Typical use inside a query function:
+
+    where_clauses = ["1=1"]
+    params = {}
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+    add_in_filter(where_clauses, params, "region", local_regions, "local_regions")
+    where_clauses.append("survey_date < @cutoff_date")
+    params["cutoff_date"] = cutoff_date()
+    where_clause = " AND ".join(where_clauses)
+    df = run_query(_client, query, params)
+"""
+import datetime
+
+import pandas as pd
+from google.cloud import bigquery
+
+
+def canonical_values(values):
+    """
+    Normalize a filter selection to a sorted list without duplicates.
+
+    Missing values (None/NaN, e.g. a NULL sector offered as a checkbox) are
+    dropped: they cannot be compared when sorting and never match IN anyway.
+    A selection of missing values only is returned as [None], not as [] (no
+    filter): like "column IN (NULL)", it matches no row.
+
+    Args:
+        values: Iterable of filter values (or None)
+
+    Returns:
+        list: Sorted unique values (empty list for None or an empty selection)
+    """
+    if values is None:
+        return []
+    values = list(values)
+    present = sorted({value for value in values if not pd.isna(value)})
+    if values and not present:
+        return [None]
+    return present
+
+
+def add_in_filter(where_clauses, params, column, values, param_name=None):
+    """
+    Append a "column IN UNNEST(@param)" predicate bound to canonical values.
+
+    Does nothing when values is empty, matching the optional filters. A
+    selection of missing values only matches no row.
+
+    Args:
+        where_clauses (list): WHERE predicates being built
+        params (dict): Query parameters being built (name -> value)
+        column (str): Column (or SQL expression) to filter
+        values: Selected values
+        param_name (str): Parameter name (default: column)
+    """
+    values = canonical_values(values)
+    if not values:
+        return
+    if values == [None]:
+        # NULL never matches IN
+        where_clauses.append("FALSE")
+        return
+
+    name = param_name or column
+    params[name] = values
+    where_clauses.append(f"{column} IN UNNEST(@{name})")
+
+
+def cutoff_date():
+    """
+    Today's date (UTC, like BigQuery's CURRENT_DATE()) for the @cutoff_date parameter.
+
+    Queries bind this instead of calling CURRENT_DATE(): the SQL text and
+    parameters then stay identical for the whole day, so BigQuery can answer
+    repeats from its result cache, which it never does for CURRENT_DATE().
+
+    Returns:
+        datetime.date
+    """
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def query_parameters(params):
+    """
+    Convert a params dict to BigQuery query parameter objects.
+
+    Args:
+        params (dict): name -> list of strings, str, int, float, bool or datetime.date
+
+    Returns:
+        list: ArrayQueryParameter / ScalarQueryParameter objects
+    """
+    parameters = []
+    for name, value in sorted((params or {}).items()):
+        if isinstance(value, (list, tuple)):
+            parameters.append(bigquery.ArrayQueryParameter(name, "STRING", list(value)))
+        elif isinstance(value, bool):
+            parameters.append(bigquery.ScalarQueryParameter(name, "BOOL", value))
+        elif isinstance(value, int):
+            parameters.append(bigquery.ScalarQueryParameter(name, "INT64", value))
+        elif isinstance(value, float):
+            parameters.append(bigquery.ScalarQueryParameter(name, "FLOAT64", value))
+        elif isinstance(value, datetime.date):
+            parameters.append(bigquery.ScalarQueryParameter(name, "DATE", value))
+        else:
+            parameters.append(bigquery.ScalarQueryParameter(name, "STRING", value))
+    return parameters
@@ -0,0 +1,404 @@
+"""
+Central query executor with execution statistics.
+
+Every query function in database/bigquery_client.py runs its SQL through
+run_query, which binds the query parameters and counts what actually reaches
+the client. Calls answered by st.cache_data never get here, so the counters
+measure cache misses directly: comparing executions with the number of query
+function calls gives the st.cache_data hit rate, and bigquery_cache_hits
+gives the share answered by BigQuery's own result cache.
+
+Every query is also audited for result cache eligibility: BigQuery never
+serves queries that call non-deterministic functions such as CURRENT_DATE()
+from its cache, so those are reported (once per distinct query) and counted.
+Bind query_builder.cutoff_date() as @cutoff_date instead.
+
+Jobs can also be submitted without waiting for them: submit_query returns a
+QueryHandle right after BigQuery accepted the job, so several jobs queue and
+run on BigQuery's side while the script keeps rendering. Resolve a handle with
+result() where its data is needed. run_query is submit_query(...).result().
+
+Bulk results (thousands of rows) should use run_query_arrow instead: it
+downloads through the BigQuery Storage Read API (parallel streams, when
+google-cloud-bigquery-storage is installed) into a pyarrow.Table, which can
+stay Arrow until the UI needs pandas; arrow_to_dataframe then converts it with
+the repeated country/region/sector strings dictionary-encoded (pandas
+categoricals) instead of one Python string object per row.
+
+With config.RESULT_CACHE_ENABLED, submit_query first looks the query up in
+the on-disk result cache (database/result_cache.py) shared by all server
+processes, and downloaded results are written back to it.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import Counter, deque
+
+import pandas as pd
+import pyarrow as pa
+from google.cloud import bigquery
+
+import config
+from database import freshness, result_cache
+from database.query_builder import query_parameters
+
+
+# Functions that make a query ineligible for BigQuery's result cache
+_NON_DETERMINISTIC_PATTERN = re.compile(
+    r"\b(CURRENT_DATE|CURRENT_DATETIME|CURRENT_TIME|CURRENT_TIMESTAMP|SESSION_USER|RAND|GENERATE_UUID)\s*\(",
+    re.IGNORECASE
+)
+
+_stats_lock = threading.Lock()
+_query_stats = {
+    "executions": 0,
+    "bigquery_cache_hits": 0,
+    "cache_ineligible_executions": 0,
+    "bytes_processed": 0,
+    "disk_cache_hits": 0,
+    "queries": Counter(),
+}
+# Most recent jobs, newest last
+_recent_jobs = deque(maxlen=200)
+_reported_ineligible = set()
+
+# Low-cardinality string columns kept dictionary-encoded by arrow_to_dataframe
+DICTIONARY_COLUMNS = ("country", "region", "sector")
+
+
+def query_key(query, params=None):
+    """
+    Stable hash of SQL text plus parameters (what BigQuery's result cache keys on).
+
+    Args:
+        query (str): SQL text
+        params (dict): Query parameters
+
+    Returns:
+        str: Hex digest identifying the query
+    """
+    digest = hashlib.sha256(query.encode("utf-8"))
+    for name, value in sorted((params or {}).items()):
+        digest.update(f"\0{name}={value!r}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def audit_cache_eligibility(query):
+    """
+    List the non-deterministic functions that keep a query out of BigQuery's result cache.
+
+    Args:
+        query (str): SQL text
+
+    Returns:
+        list: Upper-cased function names (empty if the query is cache eligible)
+    """
+    return sorted({name.upper() for name in _NON_DETERMINISTIC_PATTERN.findall(query)})
+
+
+def _record_execution(key, job, ineligible):
+    cache_hit = bool(getattr(job, "cache_hit", False))
+    bytes_processed = getattr(job, "total_bytes_processed", 0) or 0
+
+    with _stats_lock:
+        _query_stats["executions"] += 1
+        _query_stats["queries"][key] += 1
+        if cache_hit:
+            _query_stats["bigquery_cache_hits"] += 1
+        if ineligible:
+            _query_stats["cache_ineligible_executions"] += 1
+        _query_stats["bytes_processed"] += bytes_processed
+        _recent_jobs.append({
+            "query_key": key,
+            "cache_hit": cache_hit,
+            "cache_eligible": not ineligible,
+            "bytes_processed": bytes_processed,
+        })
+
+
+class QueryHandle:
+    """
+    Lightweight handle to a submitted query job.
+
+    done() polls the job state without downloading anything; result() (or
+    arrow()) waits for the job, downloads the rows once and records the
+    execution. A job that could not be submitted raises its error from
+    result() / arrow(). A handle created from the on-disk result cache has no
+    job and is done immediately.
+    """
+
+    def __init__(self, key, job=None, ineligible=None, error=None, cached=None, disk_key=None):
+        self.key = key
+        self._disk_key = disk_key or key
+        self._job = job
+        self._ineligible = ineligible or []
+        self._error = error
+        self._df = None
+        self._arrow = cached
+        self._from_cache = cached is not None
+        self._recorded = False
+        self._lock = threading.Lock()
+
+    @property
+    def from_cache(self):
+        return self._from_cache
+
+    @property
+    def job_id(self):
+        return getattr(self._job, "job_id", None)
+
+    def done(self):
+        """
+        Whether the job finished (successfully or not) on BigQuery's side.
+
+        Returns:
+            bool
+        """
+        if self._error is not None or self._df is not None or self._from_cache:
+            return True
+        try:
+            return self._job.done()
+        except Exception:
+            # A failed state poll counts as done, result() reports the error
+            return True
+
+    def result(self):
+        """
+        Wait for the job and return its rows.
+
+        Returns:
+            pandas DataFrame with query results
+        """
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._df is None:
+                if self._arrow is not None:
+                    self._df = _table_to_dataframe(self._arrow)
+                else:
+                    self._df = self._job.to_dataframe(create_bqstorage_client=config.BQ_STORAGE_API_ENABLED)
+                    self._record()
+                    self._store(self._df)
+            return self._df
+
+    def arrow(self):
+        """
+        Wait for the job and return its rows as Arrow.
+
+        Returns:
+            pyarrow.Table with query results
+        """
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._arrow is None:
+                self._arrow = self._job.to_arrow(create_bqstorage_client=config.BQ_STORAGE_API_ENABLED)
+                self._record()
+                self._store(self._arrow)
+            return self._arrow
+
+    def _record(self):
+        if not self._recorded:
+            self._recorded = True
+            _record_execution(self.key, self._job, self._ineligible)
+
+    def _store(self, result):
+        if not config.RESULT_CACHE_ENABLED:
+            return
+        try:
+            # A result that does not convert to Arrow is just not cached
+            if isinstance(result, pd.DataFrame):
+                result = pa.Table.from_pandas(result, preserve_index=False)
+            result_cache.put(self._disk_key, result)
+        except Exception as e:
+            print(f"⚠ Could not write query {self.key} to the result cache: {str(e)}", flush=True)
+
+
+def _table_to_dataframe(table):
+    # Results cached from to_dataframe() carry their pandas dtypes in the schema
+    if table.schema.pandas_metadata is not None:
+        return table.to_pandas()
+    return arrow_to_dataframe(table, dictionary_columns=())
+
+
+def submit_query(_client, query, params=None):
+    """
+    Submit SQL with bound query parameters without waiting for the result.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        query (str): SQL text referencing parameters as @name
+        params (dict): Query parameters (name -> value), see query_parameters
+
+    Returns:
+        QueryHandle
+    """
+    key = query_key(query, params)
+
+    # Audit: non-deterministic functions bypass BigQuery's result cache
+    ineligible = audit_cache_eligibility(query) if config.QUERY_CACHE_AUDIT_ENABLED else []
+    if ineligible and key not in _reported_ineligible:
+        _reported_ineligible.add(key)
+        print(f"⚠ Query {key} is not result-cache eligible (uses {', '.join(ineligible)})", flush=True)
+
+    # Tie the calling cached function to the tables this query reads
+    tables = freshness.tables_in_query(query)
+    freshness.record_query_tables(query)
+
+    # Results stored by any server process on this host (for the current table versions)
+    disk_key = _disk_key(_client, key, tables)
+    if config.RESULT_CACHE_ENABLED:
+        cached = result_cache.get(disk_key)
+        if cached is not None:
+            with _stats_lock:
+                _query_stats["disk_cache_hits"] += 1
+            return QueryHandle(key, cached=cached, disk_key=disk_key)
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=query_parameters(params),
+        use_query_cache=True
+    )
+
+    try:
+        job = _client.query(query, job_config=job_config)
+    except Exception as e:
+        return QueryHandle(key, error=e)
+    return QueryHandle(key, job, ineligible, disk_key=disk_key)
+
+
+def _client_source(_client):
+    """Where a client's results come from: a local replica directory or a BigQuery project."""
+    replica_dir = getattr(_client, "replica_dir", None)
+    if replica_dir:
+        return f"replica:{os.path.abspath(replica_dir)}"
+    return f"bigquery:{getattr(_client, 'project', None)}"
+
+
+def _disk_key(_client, key, tables):
+    # The replica and BigQuery share the cache directory but not their results;
+    # a new version of a table the query reads gives its results a new key
+    version = freshness.table_version_token(tables) or ""
+    source = _client_source(_client)
+    return hashlib.sha256(f"{source}\0{key}\0{version}".encode("utf-8")).hexdigest()[:16]
+
+
+def run_query(_client, query, params=None):
+    """
+    Execute SQL with bound query parameters and return a pandas DataFrame.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        query (str): SQL text referencing parameters as @name
+        params (dict): Query parameters (name -> value), see query_parameters
+
+    Returns:
+        pandas DataFrame with query results
+    """
+    return submit_query(_client, query, params).result()
+
+
+def run_query_arrow(_client, query, params=None):
+    """
+    Execute SQL with bound query parameters and return a pyarrow.Table.
+
+    Meant for bulk results: rows are read through the Storage Read API when
+    available and never materialized as Python objects.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        query (str): SQL text referencing parameters as @name
+        params (dict): Query parameters (name -> value), see query_parameters
+
+    Returns:
+        pyarrow.Table with query results
+    """
+    return submit_query(_client, query, params).arrow()
+
+
+def arrow_to_dataframe(arrow_table, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Convert an Arrow result to pandas with the dtypes of QueryJob.to_dataframe().
+
+    String columns listed in dictionary_columns are dictionary-encoded first
+    and come out as pandas categoricals.
+
+    Args:
+        arrow_table (pyarrow.Table): Query result
+        dictionary_columns (tuple): Names of string columns to dictionary-encode
+
+    Returns:
+        pandas DataFrame
+    """
+    columns = []
+    for field, column in zip(arrow_table.schema, arrow_table.columns):
+        if field.name in dictionary_columns and pa.types.is_string(field.type):
+            column = column.dictionary_encode()
+        columns.append(column)
+    arrow_table = pa.Table.from_arrays(columns, names=arrow_table.column_names)
+
+    types = {
+        pa.int64(): pd.Int64Dtype(),
+        pa.bool_(): pd.BooleanDtype(),
+    }
+    try:
+        import db_dtypes
+        types[pa.date32()] = db_dtypes.DateDtype()
+    except ImportError:
+        pass
+    return arrow_table.to_pandas(types_mapper=types.get)
+
+
+def get_query_stats():
+    """
+    Snapshot of the execution counters.
+
+    Returns:
+        dict: {
+            'executions': int,            # queries sent to the client
+            'distinct_queries': int,      # unique SQL + parameter combinations
+            'repeated_executions': int,   # executions of an already-seen query
+            'bigquery_cache_hits': int,   # jobs answered from BigQuery's result cache
+            'bigquery_cache_hit_rate': float,
+            'cache_ineligible_executions': int,  # jobs using non-deterministic functions
+            'bytes_processed': int,
+            'disk_cache_hits': int        # queries answered from the on-disk result cache
+        }
+    """
+    with _stats_lock:
+        executions = _query_stats["executions"]
+        distinct = len(_query_stats["queries"])
+        cache_hits = _query_stats["bigquery_cache_hits"]
+        return {
+            "executions": executions,
+            "distinct_queries": distinct,
+            "repeated_executions": executions - distinct,
+            "bigquery_cache_hits": cache_hits,
+            "bigquery_cache_hit_rate": cache_hits / executions if executions else 0.0,
+            "cache_ineligible_executions": _query_stats["cache_ineligible_executions"],
+            "bytes_processed": _query_stats["bytes_processed"],
+            "disk_cache_hits": _query_stats["disk_cache_hits"],
+        }
+
+
+def get_recent_jobs():
+    """
+    Most recent executions (up to 200), oldest first.
+
+    Returns:
+        list: dicts with query_key, cache_hit, cache_eligible and bytes_processed
+    """
+    with _stats_lock:
+        return list(_recent_jobs)
+
+
+def reset_query_stats():
+    """Reset all execution counters."""
+    with _stats_lock:
+        _query_stats["executions"] = 0
+        _query_stats["bigquery_cache_hits"] = 0
+        _query_stats["cache_ineligible_executions"] = 0
+        _query_stats["bytes_processed"] = 0
+        _query_stats["disk_cache_hits"] = 0
+        _query_stats["queries"].clear()
+        _recent_jobs.clear()
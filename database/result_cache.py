@@ -0,0 +1,179 @@
+"""
+Persistent on-disk cache of query results.
+
+st.cache_data lives in the memory of one server process, so every restart,
+redeploy or additional worker process starts cold and re-runs every section
+query. This cache sits below it, in query_runner.submit_query: results are
+stored as zstd-compressed Parquet files named after query_key() (SQL text plus
+bound parameters, combined with the client the results came from, a BigQuery
+project or a local replica, and with the versions of the tables the query
+reads when the freshness watcher knows them), so any process on the host
+answers a repeated query from disk instead of BigQuery.
+
+    - TTL: entries older than config.RESULT_CACHE_TTL seconds are misses
+    - Size cap: after each write, least recently used entries are deleted
+      until the directory is below config.RESULT_CACHE_MAX_BYTES
+      (a hit refreshes the file's modification time, which orders the LRU)
+    - Concurrency: files are written to a temporary name and renamed into
+      place, so readers in other processes see either no entry or a complete
+      one; eviction runs under an exclusive lock file (fcntl, where available)
+      and readers treat an entry deleted under them as a miss
+"""
+import contextlib
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs unlocked, writes stay atomic
+    fcntl = None
+
+
+_SUFFIX = ".parquet"
+_LOCK_FILE = ".evict.lock"
+# Parquet schema metadata key holding the write time (mtime tracks last use)
+_CREATED_KEY = b"result_cache_created"
+
+
+def _path(key):
+    return os.path.join(config.RESULT_CACHE_DIR, key + _SUFFIX)
+
+
+def get(key):
+    """
+    Read a cached result.
+
+    Args:
+        key (str): Disk key of the query (see query_runner.submit_query)
+
+    Returns:
+        pyarrow.Table, or None on a miss (absent, expired or unreadable)
+    """
+    path = _path(key)
+    try:
+        table = pq.read_table(path)
+    except (FileNotFoundError, OSError, pa.ArrowException):
+        return None
+
+    metadata = table.schema.metadata or {}
+    created = float(metadata.get(_CREATED_KEY, 0))
+    if time.time() - created > config.RESULT_CACHE_TTL:
+        return None
+
+    # Mark as recently used for LRU eviction
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return table
+
+
+def put(key, table):
+    """
+    Store a result and evict least recently used entries beyond the size cap.
+
+    Args:
+        key (str): Disk key of the query (see query_runner.submit_query)
+        table (pyarrow.Table): Result to store
+    """
+    if table.num_columns == 0:
+        return
+
+    os.makedirs(config.RESULT_CACHE_DIR, exist_ok=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_CREATED_KEY] = str(time.time()).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write under a unique temporary name, then atomically rename into place
+    fd, temp_path = tempfile.mkstemp(dir=config.RESULT_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pq.write_table(table, f, compression="zstd")
+        os.replace(temp_path, _path(key))
+    except Exception:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+    _evict()
+
+
+def _entries():
+    entries = []
+    with os.scandir(config.RESULT_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    return entries
+
+
+@contextlib.contextmanager
+def _eviction_lock():
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(config.RESULT_CACHE_DIR, _LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _remove_stale_temp_files(max_age=3600):
+    # Left behind by writers that crashed between write and rename
+    with os.scandir(config.RESULT_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".tmp"):
+                with contextlib.suppress(OSError):
+                    if time.time() - entry.stat().st_mtime > max_age:
+                        os.remove(entry.path)
+
+
+def _evict():
+    """Delete least recently used entries until the cache fits RESULT_CACHE_MAX_BYTES."""
+    with _eviction_lock():
+        _remove_stale_temp_files()
+        entries = _entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= config.RESULT_CACHE_MAX_BYTES:
+            return
+
+        for _, size, path in sorted(entries):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+            if total <= config.RESULT_CACHE_MAX_BYTES:
+                break
+
+
+def clear():
+    """Delete every cached result."""
+    if not os.path.isdir(config.RESULT_CACHE_DIR):
+        return
+    with _eviction_lock():
+        for _, _, path in _entries():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+
+def get_cache_size():
+    """
+    Size of the cache directory.
+
+    Returns:
+        dict: {'entries': int, 'bytes': int}
+    """
+    if not os.path.isdir(config.RESULT_CACHE_DIR):
+        return {"entries": 0, "bytes": 0}
+    entries = _entries()
+    return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
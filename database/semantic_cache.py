@@ -0,0 +1,798 @@
+"""
+Semantic cache: narrower Region/Sector selections answered from a broader result.
+
+On the Price tab users usually look at all regions first and then narrow down
+with the local Region/Sector checkboxes. Each narrowing used to be a new
+BigQuery job although it only selects a subset of rows the broader query had
+already scanned. For the functions in SPECS, the query is instead run once per
+period/country selection grouped additionally by region and sector:
+
+    GROUP BY GROUPING SETS (
+        (region, sector, <group_by>),   -- cells
+        (<group_by>)                    -- the unfiltered answer itself
+    )
+
+Any Region/Sector selection is a subset of the cells, so it is answered
+locally by re-aggregating the selected cells (picked with a bitmap index of
+the cells, see utils/bitmap_index.py), per measure kind:
+
+    sum       COUNT(1), COUNT(col), SUM(col)        -> summed
+    distinct  COUNT(DISTINCT form_case__case_id)    -> summed, because a survey
+              case has a single region and sector (verified on every build
+              against the unfiltered grouping set, as in the availability cube)
+    min, max                                        -> min / max of the cells
+    any       ANY_VALUE(col)                        -> first value
+    median    APPROX_QUANTILES medians              -> not decomposable: taken
+              as is when the selection is exactly one cell per group, else
+              recomputed from per-cell quantile sketches (below)
+
+Quantile sketches (config.PRICE_SKETCH_ENABLED) are built by one more query
+per function and period/country selection, which splits the non-NULL prices
+of every region x sector x <group_by> cell into at most
+config.PRICE_SKETCH_BUCKETS rank buckets (NTILE) and keeps each bucket's
+size, minimum and maximum. Merging the buckets of the selected cells gives
+the sorted prices of the selection, on which the functions' median rule
+(including the odd/even rule) is evaluated in memory. Cells with no more
+values than buckets keep every value, so their medians are exact; otherwise
+a value is only known to lie within its bucket's bounds.
+
+Whenever a result cannot be derived the function runs its own query.
+
+With summary tables enabled (config.SUMMARY_TABLES_ENABLED), the functions
+without medians (SUMMARY_FUNCTIONS, the free/subsidised insulin sections)
+read their cells from a pre-aggregated summary table keyed by period,
+country, region, sector and level of care instead of the raw rows; see
+database/summary_tables.py. Medians cannot be summed, so the price functions
+keep scanning the raw table.
+"""
+import pandas as pd
+
+import config
+from database.freshness import cached_query
+from database.query_builder import add_in_filter, canonical_values
+from database.query_runner import run_query
+from database.staging import staged_table
+from database.summary_tables import SUMMARY_KEY_DIMENSIONS, summary_table
+from utils.bitmap_index import BitmapIndex
+from utils.sketches import exact_median, odd_even_median, quantile_sketch_vectors
+
+
+CELL_DIMENSIONS = ["region", "sector"]
+GRAIN_COLUMN = "grain"
+
+_OUT_OF_POCKET = "(insulin_out_of_pocket = 'Yes' OR insulin_out_of_pocket = 'Some people pay out of pocket')"
+
+
+def _median(column, buckets, offset):
+    """The median CASE expression of the price functions."""
+    return f"""CASE
+        WHEN MOD(COUNT({column}), 2) = 1 THEN APPROX_QUANTILES({column}, {buckets})[OFFSET({offset})]
+        WHEN MOD(COUNT({column}), 2) = 0 AND COUNT({column}) >= 100 THEN APPROX_QUANTILES({column}, {buckets})[OFFSET({offset})]
+        ELSE (APPROX_QUANTILES({column}, 100)[OFFSET(49)] + APPROX_QUANTILES({column}, 100)[OFFSET(51)]) / 2
+      END"""
+
+
+# Function layouts (each mirrors the SQL of its bigquery_client function)
+#   where:    predicates besides the period/country/region/sector filters
+#   group_by: grouping columns (empty for single-row results)
+#   measures: output column -> (SQL aggregate, kind), in SELECT order
+#   order_by: (column, ascending) pairs, as in the function's ORDER BY
+#   medians:  median measure -> (price column, buckets, offset, odd/even rule),
+#             i.e. APPROX_QUANTILES(column, buckets)[OFFSET(offset)]
+#   filters:  which of the region/sector filters the function applies (default: both)
+SPECS = {
+    "get_facilities_providing_free": {
+        "where": ["insulin_out_of_pocket IN ('No', 'Both')"],
+        "group_by": [],
+        "measures": {
+            "facility_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+        },
+        "order_by": [],
+    },
+    "get_reasons_insulin_free": {
+        "where": ["insulin_out_of_pocket IN ('No', 'Both')", "insulin_free_reason IS NOT NULL"],
+        "group_by": ["insulin_free_reason"],
+        "measures": {
+            "product_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+        },
+        "order_by": [("product_count", False)],
+    },
+    "get_facilities_not_full_price": {
+        "where": [
+            "insulin_subsidised_reason IS NOT NULL",
+        ],
+        "group_by": [],
+        "measures": {
+            "facility_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+        },
+        "order_by": [],
+    },
+    "get_reasons_not_full_price": {
+        "where": [
+            "insulin_subsidised_reason IS NOT NULL",
+        ],
+        "group_by": ["insulin_subsidised_reason"],
+        "measures": {
+            "product_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+        },
+        "order_by": [("product_count", False)],
+    },
+    "get_price_by_inn": {
+        "where": ["insulin_inn IS NOT NULL", _OUT_OF_POCKET],
+        "group_by": ["insulin_inn"],
+        "measures": {
+            "min_price_local": ("MIN(insulin_standard_price_local)", "min"),
+            "median_price_local": ("APPROX_QUANTILES(insulin_standard_price_local, 100)[OFFSET(50)]", "median"),
+            "max_price_local": ("MAX(insulin_standard_price_local)", "max"),
+            "min_price_usd": ("MIN(insulin_standard_price_usd)", "min"),
+            "median_price_usd": ("APPROX_QUANTILES(insulin_standard_price_usd, 100)[OFFSET(50)]", "median"),
+            "max_price_usd": ("MAX(insulin_standard_price_usd)", "max"),
+            "product_count": ("COUNT(1)", "sum"),
+        },
+        "order_by": [("insulin_inn", True)],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 100, 50, False),
+            "median_price_usd": ("insulin_standard_price_usd", 100, 50, False),
+        },
+    },
+    "get_median_price_by_type": {
+        "where": [
+            "insulin_type IS NOT NULL",
+            "insulin_standard_price_local IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_type"],
+        "measures": {
+            "insulin_type_order": ("ANY_VALUE(insulin_type_order)", "any"),
+            "median_price_local": (_median("insulin_standard_price_local", 100, 50), "median"),
+            "median_price_usd": (_median("insulin_standard_price_usd", 100, 50), "median"),
+            "product_count": ("COUNT(insulin_standard_price_local)", "sum"),
+        },
+        "order_by": [("insulin_type_order", True)],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 100, 50, True),
+            "median_price_usd": ("insulin_standard_price_usd", 100, 50, True),
+        },
+    },
+    "get_median_price_by_type_levelcare": {
+        "where": [
+            "insulin_type IS NOT NULL",
+            "LOWER(sector) LIKE '%public%'",
+            "level_of_care IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_type", "insulin_type_order", "level_of_care"],
+        "measures": {
+            "median_price_local": (_median("insulin_standard_price_local", 100, 50), "median"),
+            "median_price_usd": (_median("insulin_standard_price_usd", 100, 50), "median"),
+            "product_count": ("COUNT(insulin_standard_price_local)", "sum"),
+        },
+        "order_by": [("insulin_type_order", True), ("level_of_care", True)],
+        "filters": ["region"],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 100, 50, True),
+            "median_price_usd": ("insulin_standard_price_usd", 100, 50, True),
+        },
+    },
+    "get_price_by_brand_human": {
+        "where": [
+            "insulin_type LIKE '%Human%'",
+            "insulin_standard_price_local IS NOT NULL",
+            "insulin_brand IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_brand"],
+        "measures": {
+            "facility_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+            "min_price_local": ("MIN(insulin_standard_price_local)", "min"),
+            "median_price_local": (_median("insulin_price_local", 2, 1), "median"),
+            "max_price_local": ("MAX(insulin_standard_price_local)", "max"),
+        },
+        "order_by": [("facility_count", False)],
+        "medians": {
+            "median_price_local": ("insulin_price_local", 2, 1, True),
+        },
+    },
+    "get_price_by_brand_analogue": {
+        "where": [
+            "insulin_type LIKE '%Analogue%'",
+            "insulin_standard_price_local IS NOT NULL",
+            "insulin_brand IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_brand"],
+        "measures": {
+            "facility_count": ("COUNT(DISTINCT form_case__case_id)", "distinct"),
+            "min_price_local": ("MIN(insulin_standard_price_local)", "min"),
+            "median_price_local": (_median("insulin_price_local", 2, 1), "median"),
+            "max_price_local": ("MAX(insulin_standard_price_local)", "max"),
+        },
+        "order_by": [("facility_count", False)],
+        "medians": {
+            "median_price_local": ("insulin_price_local", 2, 1, True),
+        },
+    },
+    "get_median_price_by_presentation": {
+        "where": ["insulin_presentation IS NOT NULL", _OUT_OF_POCKET],
+        "group_by": ["insulin_presentation"],
+        "measures": {
+            "median_price_local": (_median("insulin_standard_price_local", 2, 1), "median"),
+            "product_count": ("COUNT(1)", "sum"),
+        },
+        "order_by": [("insulin_presentation", False)],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 2, 1, True),
+        },
+    },
+    "get_median_price_by_originator_human": {
+        "where": [
+            "insulin_type LIKE '%Human%'",
+            "insulin_originator_biosimilar IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_originator_biosimilar"],
+        "measures": {
+            "median_price_local": (_median("insulin_standard_price_local", 2, 1), "median"),
+            "product_count": ("COUNT(1)", "sum"),
+        },
+        "order_by": [("insulin_originator_biosimilar", False)],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 2, 1, True),
+        },
+    },
+    "get_median_price_by_originator_analogue": {
+        "where": [
+            "insulin_type LIKE '%Analogue%'",
+            "insulin_originator_biosimilar IS NOT NULL",
+            _OUT_OF_POCKET,
+        ],
+        "group_by": ["insulin_originator_biosimilar"],
+        "measures": {
+            "median_price_local": (_median("insulin_standard_price_local", 2, 1), "median"),
+            "product_count": ("COUNT(1)", "sum"),
+        },
+        "order_by": [("insulin_originator_biosimilar", False)],
+        "medians": {
+            "median_price_local": ("insulin_standard_price_local", 2, 1, True),
+        },
+    },
+}
+
+_AGGREGATIONS = {"sum": "sum", "distinct": "sum", "min": "min", "max": "max", "any": "first"}
+
+# Functions whose measures are all counts, i.e. can be summed from a summary table
+SUMMARY_FUNCTIONS = [
+    name for name, spec in SPECS.items()
+    if all(kind in ("sum", "distinct") for _, kind in spec['measures'].values())
+]
+
+
+def _where_clause(spec, periods, countries=None):
+    """The function's WHERE clause without its Region/Sector filters."""
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", countries)
+
+    where_clauses += spec['where']
+    return " AND ".join(where_clauses), params
+
+
+def build_cells_query(table_name, spec, periods, countries=None):
+    """
+    Build the per-cell query for one function.
+
+    Args:
+        table_name: Table name
+        spec (dict): Function layout from SPECS
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+
+    Returns:
+        tuple: (SQL query returning cells and unfiltered rows labelled by GRAIN_COLUMN, query parameters)
+    """
+    where_clause, params = _where_clause(spec, periods, countries)
+
+    columns = CELL_DIMENSIONS + spec['group_by']
+    measure_columns = [f"{expression} as {name}" for name, (expression, _) in spec['measures'].items()]
+    cell_set = ", ".join(columns)
+    total_set = ", ".join(spec['group_by'])
+
+    query = f"""
+    SELECT
+        CASE WHEN GROUPING(region) = 0 THEN 'cell' ELSE 'total' END as {GRAIN_COLUMN},
+        {', '.join(columns)},
+        {', '.join(measure_columns)}
+    FROM {staged_table(table_name)}
+    WHERE {where_clause}
+    GROUP BY GROUPING SETS (
+        ({cell_set}),
+        ({total_set})
+    )
+    """
+    return query, params
+
+
+def _summary_columns():
+    """Grouping and measure columns shared by every function's rows in the summary table."""
+    group_by = []
+    measures = []
+    for name in SUMMARY_FUNCTIONS:
+        group_by += [column for column in SPECS[name]['group_by'] if column not in group_by]
+        measures += [measure for measure in SPECS[name]['measures'] if measure not in measures]
+    return group_by, measures
+
+
+def build_summary_query(table_name):
+    """
+    Build the query materializing the free insulin summary table.
+
+    One row per function in SUMMARY_FUNCTIONS and cell of SUMMARY_KEY_DIMENSIONS
+    x <group_by>, labelled by GRAIN_COLUMN. Columns another function groups by
+    or measures are NULL in a function's rows.
+
+    Args:
+        table_name: Table name
+
+    Returns:
+        str: SQL query
+    """
+    group_by, measures = _summary_columns()
+    selects = []
+    for name in SUMMARY_FUNCTIONS:
+        spec = SPECS[name]
+        columns = [
+            column if column in spec['group_by'] else f"CAST(NULL AS STRING) as {column}"
+            for column in group_by
+        ]
+        measure_columns = [
+            f"{spec['measures'][measure][0]} as {measure}" if measure in spec['measures']
+            else f"CAST(NULL AS INT64) as {measure}"
+            for measure in measures
+        ]
+        where_clause = " AND ".join(["1=1"] + spec['where'])
+        selects.append(f"""
+    SELECT
+        '{name}' as {GRAIN_COLUMN},
+        {', '.join(SUMMARY_KEY_DIMENSIONS + columns + measure_columns)}
+    FROM {staged_table(table_name)}
+    WHERE {where_clause}
+    GROUP BY {', '.join(SUMMARY_KEY_DIMENSIONS + spec['group_by'])}""")
+    return "\n    UNION ALL".join(selects) + "\n    "
+
+
+def build_cells_summary_query(summary_name, function_name, periods, countries=None):
+    """
+    Build the per-cell query for one function from the free insulin summary table.
+
+    Args:
+        summary_name: Summary table name (see database/summary_tables.py)
+        function_name (str): Key of SUMMARY_FUNCTIONS
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+
+    Returns:
+        tuple: (SQL query shaped like build_cells_query's, query parameters)
+    """
+    spec = SPECS[function_name]
+    where_clauses = ["1=1"]
+    params = {}
+
+    # Add data collection period filter (required)
+    add_in_filter(where_clauses, params, "data_collection_period", periods)
+
+    # Add country filter (optional)
+    add_in_filter(where_clauses, params, "country", countries)
+
+    where_clauses.append(f"{GRAIN_COLUMN} = @function_name")
+    params["function_name"] = function_name
+    where_clause = " AND ".join(where_clauses)
+
+    columns = CELL_DIMENSIONS + spec['group_by']
+    # Counts over no rows are 0, not NULL
+    measure_columns = [f"COALESCE(SUM({name}), 0) as {name}" for name in spec['measures']]
+
+    query = f"""
+    SELECT
+        CASE WHEN GROUPING(region) = 0 THEN 'cell' ELSE 'total' END as {GRAIN_COLUMN},
+        {', '.join(columns)},
+        {', '.join(measure_columns)}
+    FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{summary_name}`
+    WHERE {where_clause}
+    GROUP BY GROUPING SETS (
+        ({', '.join(columns)}),
+        ({', '.join(spec['group_by'])})
+    )
+    """
+    return query, params
+
+
+def _is_additive(cells, totals, spec):
+    """Check that distinct counts summed over the cells match the unfiltered counts."""
+    distinct = [name for name, (_, kind) in spec['measures'].items() if kind == "distinct"]
+    if not distinct:
+        return True
+
+    group_by = spec['group_by']
+    if group_by:
+        summed = cells.groupby(group_by, dropna=False)[distinct].sum().reset_index()
+        merged = totals.merge(summed, on=group_by, how='outer', suffixes=('', '_summed'))
+    else:
+        merged = totals[distinct].copy()
+        for name in distinct:
+            merged[f"{name}_summed"] = cells[name].sum()
+
+    for name in distinct:
+        expected = merged[name].fillna(0).astype('int64')
+        actual = merged[f"{name}_summed"].fillna(0).astype('int64')
+        if not (expected == actual).all():
+            return False
+    return True
+
+
+@cached_query(show_spinner=False)
+def get_result_cells(_client, table_name, function_name, periods, countries=None):
+    """
+    Run a function's query once per period/country selection, grouped by region and sector.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        function_name (str): Key of SPECS
+        periods (list): Selected data collection periods (canonical_values)
+        countries (list): Selected countries (canonical_values, optional)
+
+    Returns:
+        dict: {
+            'cells': DataFrame per region x sector x group_by,
+            'index': BitmapIndex of the cells,
+            'totals': DataFrame of the unfiltered result,
+            'additive': bool (distinct counts may be summed across cells)
+        }
+        or None if the query failed
+    """
+    spec = SPECS[function_name]
+    summary = summary_table("free_insulin", table_name) if function_name in SUMMARY_FUNCTIONS else None
+    if summary:
+        query, params = build_cells_summary_query(summary, function_name, periods, countries)
+    else:
+        query, params = build_cells_query(table_name, spec, periods, countries)
+
+    try:
+        df = run_query(_client, query, params)
+    except Exception as e:
+        # The function falls back to its own query, which reports errors itself
+        print(f"⚠ Semantic cache for {function_name} failed: {str(e)}", flush=True)
+        return None
+
+    is_cell = df[GRAIN_COLUMN] == 'cell'
+    cells = df[is_cell].drop(columns=[GRAIN_COLUMN]).reset_index(drop=True)
+    totals = df[~is_cell].drop(columns=[GRAIN_COLUMN] + CELL_DIMENSIONS).reset_index(drop=True)
+
+    additive = _is_additive(cells, totals, spec)
+    if not additive:
+        print(f"⚠ Semantic cache for {function_name}: distinct counts are not additive", flush=True)
+
+    return {'cells': cells, 'index': BitmapIndex(cells), 'totals': totals, 'additive': additive}
+
+
+def build_sketch_query(table_name, spec, periods, countries=None, buckets=None, exact=False):
+    """
+    Build the per-cell quantile sketch query for one function's median prices.
+
+    Args:
+        table_name: Table name
+        spec (dict): Function layout from SPECS (with medians)
+        periods (list): Selected data collection periods
+        countries (list): Selected countries (optional)
+        buckets (int): Maximum buckets per cell (default: config.PRICE_SKETCH_BUCKETS)
+        exact (bool): One bucket per distinct price instead (the full price vectors)
+
+    Returns:
+        tuple: (SQL query returning one row per price column, cell and bucket, query parameters)
+    """
+    buckets = buckets or config.PRICE_SKETCH_BUCKETS
+    where_clause, params = _where_clause(spec, periods, countries)
+
+    columns = CELL_DIMENSIONS + spec['group_by']
+    price_columns = sorted({column for column, _, _, _ in spec['medians'].values()})
+
+    # One row per non-NULL price, labelled by its column
+    unpivoted = "\n        UNION ALL\n        ".join(
+        f"SELECT {', '.join(columns)}, '{column}' as price_column, {column} as price "
+        f"FROM base_data WHERE {column} IS NOT NULL"
+        for column in price_columns
+    )
+    partition = ", ".join(["price_column"] + columns)
+    if exact:
+        bucket = "DENSE_RANK() OVER (PARTITION BY {partition} ORDER BY price) as bucket"
+    else:
+        bucket = f"NTILE({buckets}) OVER (PARTITION BY {partition} ORDER BY price) as bucket"
+    bucket = bucket.format(partition=partition)
+
+    query = f"""
+    WITH base_data AS (
+        SELECT {', '.join(columns + price_columns)}
+        FROM {staged_table(table_name)}
+        WHERE {where_clause}
+    ),
+    prices AS (
+        {unpivoted}
+    ),
+    ranked AS (
+        SELECT
+            *,
+            {bucket}
+        FROM prices
+    )
+    SELECT
+        {partition},
+        bucket,
+        COUNT(1) as weight,
+        MIN(price) as low,
+        MAX(price) as high
+    FROM ranked
+    GROUP BY {partition}, bucket
+    """
+    return query, params
+
+
+@cached_query(show_spinner=False)
+def get_quantile_sketches(_client, table_name, function_name, periods, countries=None, exact=False):
+    """
+    Build a function's per-cell price quantile sketches once per period/country selection.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        function_name (str): Key of SPECS (with medians)
+        periods (list): Selected data collection periods (canonical_values)
+        countries (list): Selected countries (canonical_values, optional)
+        exact (bool): Fetch the full price vectors (one bucket per distinct price)
+
+    Returns:
+        dict: {
+            'cells': DataFrame with price_column, region, sector, the group_by
+                columns, bucket, weight, low and high,
+            'index': BitmapIndex of the cells
+        }
+        or None if the query failed
+    """
+    query, params = build_sketch_query(table_name, SPECS[function_name], periods, countries, exact=exact)
+
+    try:
+        df = run_query(_client, query, params)
+    except Exception as e:
+        # The function falls back to its own query, which reports errors itself
+        kind = "Price vectors" if exact else "Quantile sketches"
+        print(f"⚠ {kind} for {function_name} failed: {str(e)}", flush=True)
+        return None
+
+    return {'cells': df, 'index': BitmapIndex(df)}
+
+
+def _select(result, regions, sectors):
+    """
+    Select the cells of a per-cell result for a Region/Sector selection.
+
+    Same semantics as "region IN (...)": NULL regions/sectors drop out once a
+    filter is set. The selection is evaluated on the result's bitmap index.
+    """
+    if not regions and not sectors:
+        return result['cells']
+    return result['cells'][result['index'].mask({'region': regions, 'sector': sectors})]
+
+
+def _sketch_medians(sketches, spec, exact=False):
+    """
+    Evaluate the median measures on merged quantile sketches.
+
+    Args:
+        sketches (DataFrame): Sketch rows of the selected cells
+        spec (dict): Function layout from SPECS
+        exact (bool): The rows are full price vectors; apply the exact median
+            rule of plans/queries.md instead of the APPROX_QUANTILES positions
+
+    Returns:
+        tuple: (pandas DataFrame with the group_by columns and one column per
+        median measure, largest distance of a median from its bounds)
+    """
+    group_by = spec['group_by']
+    merged = {}
+    for key, group in sketches.groupby(["price_column"] + group_by, dropna=False, sort=False):
+        key = key if isinstance(key, tuple) else (key,)
+        merged.setdefault(key[1:], {})[key[0]] = quantile_sketch_vectors(group['weight'], group['low'], group['high'])
+
+    records = []
+    error = 0.0
+    for groups, prices in merged.items():
+        record = dict(zip(group_by, groups))
+        for name, (column, buckets, offset, odd_even) in spec['medians'].items():
+            if column not in prices:
+                record[name] = None
+                continue
+            medians = [
+                exact_median(values, odd_even) if exact else odd_even_median(values, buckets, offset, odd_even)
+                for values in prices[column]
+            ]
+            record[name] = medians[0]
+            # The true median lies between the medians of the lower and upper vectors
+            error = max(error, medians[0] - medians[1], medians[2] - medians[0])
+        records.append(record)
+
+    medians = pd.DataFrame(records, columns=group_by + list(spec['medians']))
+    for name in spec['medians']:
+        medians[name] = medians[name].astype('float64')
+    return medians, error
+
+
+def _aggregate(cells, spec):
+    """Re-aggregate the non-median measures of selected cells per group."""
+    kinds = {name: kind for name, (_, kind) in spec['measures'].items() if kind != "median"}
+    aggregations = {name: _AGGREGATIONS[kind] for name, kind in kinds.items()}
+    group_by = spec['group_by']
+    if group_by:
+        return cells.groupby(group_by, dropna=False, sort=False).agg(aggregations).reset_index()
+
+    # Single-row result: aggregates over no rows still return one row (counts 0)
+    if cells.empty:
+        return pd.DataFrame([{name: 0 if kinds[name] in ("sum", "distinct") else None for name in kinds}])
+    return cells.assign(_all=0).groupby('_all').agg(aggregations).reset_index(drop=True)
+
+
+def _with_medians(derived, medians, spec):
+    """Join the median columns computed from sketches onto the other measures."""
+    group_by = spec['group_by']
+    for column in group_by:
+        medians[column] = medians[column].astype(derived[column].dtype)
+    return derived.merge(medians, on=group_by, how='left')
+
+
+def _derive(cells, spec, sketches=None):
+    """
+    Re-aggregate selected cells, or None if a measure cannot be derived.
+
+    Args:
+        cells (DataFrame): Selected cells
+        spec (dict): Function layout from SPECS
+        sketches (callable): Returns the selected cells' quantile sketch rows
+            (or None); required to merge medians across cells
+
+    Returns:
+        pandas DataFrame (attrs['median_error'] set when medians were merged
+        from sketches), or None to fall back to the function's own query
+    """
+    kinds = {name: kind for name, (_, kind) in spec['measures'].items()}
+    group_by = spec['group_by']
+
+    if "median" not in kinds.values():
+        return _aggregate(cells, spec)
+
+    # A median is known as is for exactly the rows of one cell
+    if group_by and not cells.duplicated(group_by).any():
+        return cells.drop(columns=CELL_DIMENSIONS)
+    if not group_by and len(cells) <= 1:
+        return cells.drop(columns=CELL_DIMENSIONS)
+
+    # Otherwise it is recomputed from the merged quantile sketches
+    selected = sketches() if sketches is not None and group_by else None
+    if selected is None:
+        return None
+
+    medians, error = _sketch_medians(selected, spec)
+    derived = _with_medians(_aggregate(cells, spec), medians, spec)
+    derived.attrs['median_error'] = error
+    return derived
+
+
+def _sorted(df, spec):
+    """Apply the function's ORDER BY (BigQuery: NULL first ascending, last descending)."""
+    if spec['order_by']:
+        # Stable sort on the grouping columns first, so ties come out in a fixed order
+        df = df.sort_values(spec['group_by'], kind='mergesort')
+        for column, ascending in reversed(spec['order_by']):
+            df = df.sort_values(column, ascending=ascending, kind='mergesort', na_position='first' if ascending else 'last')
+    return df.reset_index(drop=True)
+
+
+def _local_filters(spec, filters):
+    """The canonical Region/Sector selections the function applies."""
+    applied = spec.get('filters', CELL_DIMENSIONS)
+    regions = canonical_values(filters.get('region')) if 'region' in applied else []
+    sectors = canonical_values(filters.get('sector')) if 'sector' in applied else []
+    return regions, sectors
+
+
+def derive_result(_client, table_name, function_name, filters):
+    """
+    Answer a function call from its per-cell result.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        function_name (str): Key of SPECS
+        filters (dict): Filters (data_collection_period, country, region, sector)
+
+    Returns:
+        pandas DataFrame in the shape the function's own query returns, or
+        None to fall back to that query
+    """
+    spec = SPECS[function_name]
+    periods = canonical_values(filters['data_collection_period'])
+    countries = canonical_values(filters.get('country')) or None
+    result = get_result_cells(_client, table_name, function_name, periods, countries)
+    if result is None:
+        return None
+
+    columns = spec['group_by'] + list(spec['measures'])
+    regions, sectors = _local_filters(spec, filters)
+
+    # No Region/Sector selection: the unfiltered grouping set is the exact answer
+    if not regions and not sectors:
+        return _sorted(result['totals'][columns], spec)
+
+    if not result['additive']:
+        return None
+
+    cells = _select(result, regions, sectors)
+
+    def sketches():
+        if not config.PRICE_SKETCH_ENABLED or 'medians' not in spec:
+            return None
+        rows = get_quantile_sketches(_client, table_name, function_name, periods, countries)
+        return _select(rows, regions, sectors) if rows is not None else None
+
+    derived = _derive(cells, spec, sketches)
+    if derived is None:
+        return None
+    return _sorted(derived[columns], spec)
+
+
+def exact_result(_client, table_name, function_name, filters):
+    """
+    Answer a function call with exact medians computed from per-cell price vectors.
+
+    The other measures come from the per-cell result as in derive_result; the
+    medians follow the definition in plans/queries.md (MEDIAN and
+    PERCENTILE(x, 49/51), interpolated like PERCENTILE_CONT) over the sorted
+    prices of the selected cells.
+
+    Args:
+        _client: BigQuery client
+        table_name: Table name
+        function_name (str): Key of SPECS (with medians)
+        filters (dict): Filters (data_collection_period, country, region, sector)
+
+    Returns:
+        pandas DataFrame in the shape the function's own query returns
+        (attrs['statistics_mode'] = 'exact'), or None if it cannot be computed
+    """
+    spec = SPECS[function_name]
+    if 'medians' not in spec or not spec['group_by']:
+        return None
+
+    periods = canonical_values(filters['data_collection_period'])
+    countries = canonical_values(filters.get('country')) or None
+    result = get_result_cells(_client, table_name, function_name, periods, countries)
+    vectors = get_quantile_sketches(_client, table_name, function_name, periods, countries, exact=True)
+    if result is None or vectors is None:
+        return None
+
+    columns = spec['group_by'] + list(spec['measures'])
+    regions, sectors = _local_filters(spec, filters)
+
+    if not regions and not sectors:
+        derived = result['totals'].drop(columns=list(spec['medians']))
+    elif not result['additive']:
+        return None
+    else:
+        derived = _aggregate(_select(result, regions, sectors), spec)
+
+    medians, _ = _sketch_medians(_select(vectors, regions, sectors), spec, exact=True)
+    df = _sorted(_with_medians(derived, medians, spec)[columns], spec)
+    df.attrs['statistics_mode'] = 'exact'
+    return df
@@ -0,0 +1,313 @@
+"""
+Staging layer: the survey tables with cleaning applied once instead of per query.
+
+The query functions used to repeat the same cleaning on every scan:
+"TRIM(region) != ''", "region != 'NULL'", "insulin_type != '---'",
+SAFE_CAST(sector_order AS INT64) and a chain of
+"COALESCE(sector, '') LIKE '%Public%'" / "NOT LIKE" expressions. Every query
+function now reads its table through the staging layer instead, which
+
+    - turns placeholder strings into real NULLs: blank values, 'NULL' and
+      '---' in every dimension column of STAGING_SPECS (plus per-column
+      placeholders such as insulin_brand '0'), so predicates reduce to
+      "col IS NOT NULL"
+    - keeps level_of_care values as they are otherwise: the queries match
+      'Primary', 'Secondary' and 'Tertiary' exactly, as they always did
+    - types sector_order and insulin_type_order as INT64
+    - adds sector_category, an INT64 of SECTOR_CATEGORIES bit flags
+      classifying the sector as the facility statistics do
+    - adds level_of_care_canonical: one of LEVELS_OF_CARE (case and
+      surrounding whitespace ignored), NULL for any other value
+
+The layer is read from staging tables materialized once per data refresh:
+
+    python -m database.staging build   # (Re)create the staging tables
+
+find_staging_tables looks up which of them exist when the client is created
+(get_table(), no query). A table not built yet, or every table with
+config.STAGING_TABLES_ENABLED off, is read through an inline view instead:
+"(SELECT * REPLACE (...) FROM `table`)", which BigQuery prunes to the columns
+the query uses but which repeats the cleaning on every scan.
+
+Build the staging tables before the summary tables (database/summary_tables.py),
+which are aggregated from the staging layer. The raw data browsers (Data View,
+row counts, debug queries) keep reading the raw tables.
+"""
+import argparse
+import sys
+
+import config
+
+
+# Placeholders standing for a missing value in every cleaned column (besides blanks)
+PLACEHOLDERS = ("NULL", "---")
+
+# level_of_care_canonical values
+LEVELS_OF_CARE = ("Primary", "Secondary", "Tertiary")
+
+# sector_category bit flags: flag -> (bit, LIKE patterns the sector matches, patterns it must not match)
+SECTOR_CATEGORIES = {
+    "public": (1, ["%Public%"], []),
+    "private_pharmacy": (2, ["%Private Pharmacy%"], []),
+    "ngo": (4, ["%NGO%"], []),
+    "private_hospital": (8, ["%Private Hospital or Clinic%"], []),
+    "other": (16, ["%Other%"], ["%Public%", "%Private Pharmacy%", "%NGO%", "%Private Hospital or Clinic%"]),
+}
+
+# Cleaning per table (keys match config.TABLES)
+#   columns:  string columns whose placeholders become NULL -> extra placeholders
+#   integers: columns typed as INT64
+STAGING_SPECS = {
+    "surveys": {
+        "columns": {
+            "data_collection_period": ("Click here to select...",),
+            "country": (),
+            "region": (),
+            "sector": (),
+            "level_of_care": (),
+        },
+        "integers": ["sector_order"],
+    },
+    "repeat_repivot": {
+        "columns": {
+            "data_collection_period": (),
+            "country": (),
+            "region": (),
+            "sector": (),
+            "level_of_care": (),
+            "insulin_type": (),
+            "insulin_inn": (),
+            "insulin_presentation": (),
+            "insulin_originator_biosimilar": (),
+        },
+        "integers": ["insulin_type_order"],
+    },
+    "surveys_repeat": {
+        "columns": {
+            "data_collection_period": (),
+            "country": (),
+            "region": (),
+            "sector": (),
+            "level_of_care": (),
+            "insulin_type": (),
+            "insulin_inn": (),
+            "insulin_brand": ("0",),
+            "insulin_presentation": (),
+            "insulin_originator_biosimilar": (),
+            "insulin_free_reason": (),
+            "insulin_subsidised_reason": (),
+        },
+        "integers": ["insulin_type_order"],
+    },
+    "comparators": {
+        "columns": {
+            "data_collection_period": (),
+            "country": (),
+            "region": (),
+            "sector": (),
+            "level_of_care": (),
+            "name": (),
+        },
+        "integers": [],
+    },
+}
+
+# Staging tables found by find_staging_tables
+_found_tables = [frozenset()]
+
+
+def get_staging_spec(table_name):
+    """
+    Look up the cleaning of a physical table name.
+
+    Args:
+        table_name: Table name (e.g. adl_surveys)
+
+    Returns:
+        dict: Entry of STAGING_SPECS, or None if the table is read raw
+    """
+    for key, spec in STAGING_SPECS.items():
+        if config.TABLES.get(key) == table_name:
+            return spec
+    return None
+
+
+def staging_table_name(table_name):
+    """Name of the materialized staging table of a raw table."""
+    return f"{config.STAGING_TABLE_PREFIX}{table_name}"
+
+
+def staging_table_names():
+    """Names of every staging table."""
+    return [staging_table_name(config.TABLES[key]) for key in STAGING_SPECS]
+
+
+def sector_category_flag(category):
+    """
+    Predicate testing one sector_category flag.
+
+    Args:
+        category (str): Key of SECTOR_CATEGORIES
+
+    Returns:
+        str: SQL predicate (false for NULL sectors)
+    """
+    bit = SECTOR_CATEGORIES[category][0]
+    return f"(sector_category & {bit}) != 0"
+
+
+def _cleaned(column, placeholders):
+    """NULL for blank values and placeholders, the value itself otherwise."""
+    values = ", ".join(f"'{value}'" for value in PLACEHOLDERS + tuple(placeholders))
+    return f"CASE WHEN TRIM({column}) = '' OR {column} IN ({values}) THEN NULL ELSE {column} END"
+
+
+def _level_of_care_canonical():
+    cases = " ".join(
+        f"WHEN UPPER(TRIM(level_of_care)) = '{level.upper()}' THEN '{level}'" for level in LEVELS_OF_CARE
+    )
+    return f"CASE {cases} ELSE NULL END"
+
+
+def _sector_category():
+    # COALESCE: a NULL sector matches no category (0) rather than making the sum NULL
+    terms = []
+    for bit, patterns, excluded in SECTOR_CATEGORIES.values():
+        conditions = [f"COALESCE(sector, '') LIKE '{pattern}'" for pattern in patterns]
+        conditions += [f"COALESCE(sector, '') NOT LIKE '{pattern}'" for pattern in excluded]
+        terms.append(f"CASE WHEN {' AND '.join(conditions)} THEN {bit} ELSE 0 END")
+    return " + ".join(terms)
+
+
+def build_staging_query(table_name, spec):
+    """
+    Build the cleaning query of one table.
+
+    Args:
+        table_name: Raw table name
+        spec (dict): Cleaning from STAGING_SPECS
+
+    Returns:
+        str: SQL query returning every raw column (cleaned) plus sector_category
+        and level_of_care_canonical
+    """
+    replacements = []
+    for column, placeholders in spec['columns'].items():
+        replacements.append(f"{_cleaned(column, placeholders)} AS {column}")
+    for column in spec['integers']:
+        replacements.append(f"SAFE_CAST({column} AS INT64) AS {column}")
+
+    # Both are classified from the raw values, as the facility statistics did
+    return (
+        f"SELECT * REPLACE ({', '.join(replacements)}), {_sector_category()} AS sector_category, "
+        f"{_level_of_care_canonical()} AS level_of_care_canonical "
+        f"FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`"
+    )
+
+
+def staged_table(table_name):
+    """
+    FROM clause target reading a table through the staging layer.
+
+    Args:
+        table_name: Raw table name
+
+    Returns:
+        str: The staging table reference when find_staging_tables found it, the
+        inline cleaning view otherwise; the raw table reference for tables
+        without cleaning
+    """
+    spec = get_staging_spec(table_name)
+    if spec is None:
+        return f"`{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{table_name}`"
+    if staging_table_name(table_name) in staging_tables_in_use():
+        return f"`{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{staging_table_name(table_name)}`"
+    return f"({build_staging_query(table_name, spec)})"
+
+
+def find_staging_tables(_client):
+    """
+    Look up which staging tables exist (get_table(), a free metadata call).
+
+    Called once per client (bigquery_client.get_bigquery_client). Until then,
+    and for the tables not found, staged_table falls back to the inline view.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+
+    Returns:
+        list: Names of the staging tables found
+    """
+    found = []
+    if config.STAGING_TABLES_ENABLED:
+        for staging_name in staging_table_names():
+            try:
+                _client.get_table(f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{staging_name}")
+            except Exception:
+                print(f"⚠ Staging table {staging_name} not found: reading the inline view "
+                      "(build it with python -m database.staging build)", flush=True)
+                continue
+            found.append(staging_name)
+    _found_tables[0] = frozenset(found)
+    return found
+
+
+def staging_tables_in_use():
+    """Names of the staging tables staged_table reads (the others use the inline view)."""
+    return sorted(_found_tables[0])
+
+
+def build_staging_tables(_client):
+    """
+    (Re)create every staging table from the raw tables.
+
+    On BigQuery each table is replaced with CREATE OR REPLACE TABLE ... AS;
+    a LocalReplicaClient writes it as a Parquet file into its replica directory.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+
+    Returns:
+        dict: staging table name -> number of rows
+    """
+    from database.local_replica import LocalReplicaClient
+
+    rows = {}
+    for key, spec in STAGING_SPECS.items():
+        table_name = config.TABLES[key]
+        staging_name = staging_table_name(table_name)
+        table_ref = f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{staging_name}"
+        query = build_staging_query(table_name, spec)
+        print(f"Building {staging_name} from {table_name}...", flush=True)
+        if isinstance(_client, LocalReplicaClient):
+            _client.materialize(staging_name, query)
+        else:
+            _client.query(f"CREATE OR REPLACE TABLE `{table_ref}` AS {query}").result()
+
+        rows[staging_name] = _client.get_table(table_ref).num_rows
+        print(f"✓ {staging_name}: {rows[staging_name]:,} rows", flush=True)
+
+    find_staging_tables(_client)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the cleaned staging tables.")
+    parser.add_argument("command", choices=["build"])
+    parser.parse_args(argv)
+
+    if config.LOCAL_REPLICA_ENABLED:
+        from database.local_replica import LocalReplicaClient
+        client = LocalReplicaClient(config.LOCAL_REPLICA_DIR)
+    else:
+        from database.bigquery_client import create_bigquery_client
+        client = create_bigquery_client()
+        if client is None:
+            return 1
+
+    build_staging_tables(client)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
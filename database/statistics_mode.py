@@ -0,0 +1,64 @@
+"""
+Statistics mode of the Price tab medians: fast (approximate) or exact.
+
+    fast   the functions' own APPROX_QUANTILES medians with the odd/even rule
+           (or the same rule on merged quantile sketches, see
+           database/semantic_cache.py)
+    exact  true medians as defined in plans/queries.md, computed in memory
+           from the per-cell price vectors (semantic_cache.exact_result)
+
+The deployment default is config.STATISTICS_MODE; a request overrides it with
+filters['statistics_mode'] (the Price tab's "Median statistics" selector), so
+both modes are cached separately.
+"""
+import config
+
+
+MODES = {
+    "fast": "Fast (approximate quantiles)",
+    "exact": "Exact (true medians)",
+}
+
+
+def statistics_mode(filters):
+    """
+    Resolve the statistics mode of a request.
+
+    Args:
+        filters (dict): Filters, optionally with 'statistics_mode'
+
+    Returns:
+        str: 'fast' or 'exact'
+    """
+    mode = (filters or {}).get('statistics_mode') or config.STATISTICS_MODE
+    return mode if mode in MODES else "fast"
+
+
+def statistics_caption(df):
+    """
+    Chart caption stating how a result's medians were computed and their error bound.
+
+    Args:
+        df (DataFrame): Result of a price median function
+
+    Returns:
+        str
+    """
+    attrs = df.attrs if df is not None else {}
+    if attrs.get('statistics_mode') == "exact":
+        return (
+            "Statistics: exact. True medians (MEDIAN, or the mean of the 49th and 51st "
+            "percentiles for fewer than 100 even-numbered products); no approximation error."
+        )
+
+    error = attrs.get('median_error')
+    if error:
+        return (
+            f"Statistics: fast. Medians merged from per-region/sector quantile sketches; "
+            f"each is within ±{error:,.2f} of the approximate-quantile median."
+        )
+    return (
+        "Statistics: fast. Medians from approximate quantiles (APPROX_QUANTILES): a nearby "
+        "price rather than an interpolated one, with a rank error of about 1% of the products "
+        "per group. Switch to exact for true medians."
+    )
@@ -0,0 +1,321 @@
+"""
+Materialized summary tables: small pre-aggregated tables per section family.
+
+Every derivation layer scans the raw survey tables again for each period and
+country selection and re-applies the same cleaning predicates. The summary
+tables pre-aggregate those scans once, over every row of a table, keyed by
+
+    data_collection_period -> country -> region -> sector -> level_of_care
+
+(plus the product dimensions a family needs), one table per section family
+and source table, aggregated from the staging layer (database/staging.py):
+
+    availability   Availability Analysis cube grains (database/availability_cube.py)
+    dimensions     Region/Sector dropdown facility counts (database/dimension_index.py)
+    free_insulin   Free/subsidised insulin counts on the Price tab (database/semantic_cache.py)
+
+With config.SUMMARY_TABLES_ENABLED those modules read the summary tables and
+sum the selected cells instead of scanning raw rows. The price medians are not
+summable and keep reading the raw table.
+
+Summed distinct facility counts are only correct while every survey case has a
+single period, country, region, sector and level of care. The summary queries
+therefore skip the raw queries' per-build check sets; instead the check
+command re-runs the raw queries, check sets included, for every data
+collection period (and all periods together) and compares them with the
+results summed from the summary tables.
+
+Command line usage:
+    python -m database.summary_tables build   # (Re)create the summary tables
+    python -m database.summary_tables check   # Compare them with the raw-table queries
+
+Re-run build whenever the raw tables are refreshed. In local replica mode
+(config.LOCAL_REPLICA_ENABLED) the summary tables are written as Parquet files
+next to the replica's snapshots.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+import config
+from database.staging import find_staging_tables
+
+
+# Key columns of every summary table
+SUMMARY_KEY_DIMENSIONS = ["data_collection_period", "country", "region", "sector", "level_of_care"]
+
+# Source tables per section family (keys of config.TABLES)
+FAMILIES = {
+    "availability": ["surveys", "repeat_repivot", "surveys_repeat", "comparators"],
+    "dimensions": ["surveys", "repeat_repivot", "surveys_repeat"],
+    "free_insulin": ["surveys_repeat"],
+}
+
+
+def summary_table_name(family, table_name):
+    """
+    Name of a family's summary table for one source table.
+
+    Args:
+        family (str): Key of FAMILIES
+        table_name: Source table name (e.g. adl_surveys)
+
+    Returns:
+        str: e.g. summary_availability_adl_surveys
+    """
+    return f"{config.SUMMARY_TABLE_PREFIX}{family}_{table_name}"
+
+
+def summary_table_names():
+    """Names of every summary table."""
+    return [
+        summary_table_name(family, config.TABLES[key])
+        for family, keys in FAMILIES.items()
+        for key in keys
+    ]
+
+
+def summary_table(family, table_name):
+    """
+    The summary table a family should read for a source table.
+
+    Args:
+        family (str): Key of FAMILIES
+        table_name: Source table name
+
+    Returns:
+        str: Summary table name, or None to scan the raw table (summary
+        tables disabled, or the table has no summary in this family)
+    """
+    if not config.SUMMARY_TABLES_ENABLED:
+        return None
+    if table_name not in (config.TABLES[key] for key in FAMILIES[family]):
+        return None
+    return summary_table_name(family, table_name)
+
+
+def summary_layouts():
+    """
+    Every summary table with the query that materializes it.
+
+    Returns:
+        list: (family, source table name, summary table name, SQL query) tuples
+    """
+    from database import availability_cube, dimension_index, semantic_cache
+
+    layouts = []
+    for family, keys in FAMILIES.items():
+        for key in keys:
+            table_name = config.TABLES[key]
+            if family == "availability":
+                query = availability_cube.build_summary_query(table_name, availability_cube.CUBE_SPECS[key])
+            elif family == "dimensions":
+                query = dimension_index.build_summary_query(table_name)
+            else:
+                query = semantic_cache.build_summary_query(table_name)
+            layouts.append((family, table_name, summary_table_name(family, table_name), query))
+    return layouts
+
+
+def build_summary_tables(_client):
+    """
+    (Re)create every summary table from the raw tables.
+
+    On BigQuery each table is replaced with CREATE OR REPLACE TABLE ... AS;
+    a LocalReplicaClient writes it as a Parquet file into its replica directory.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+
+    Returns:
+        dict: summary table name -> number of rows
+    """
+    from database.local_replica import LocalReplicaClient
+
+    rows = {}
+    for family, table_name, summary_name, query in summary_layouts():
+        table_ref = f"{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{summary_name}"
+        print(f"Building {summary_name} from {table_name}...", flush=True)
+        if isinstance(_client, LocalReplicaClient):
+            _client.materialize(summary_name, query)
+        else:
+            _client.query(f"CREATE OR REPLACE TABLE `{table_ref}` AS {query}").result()
+
+        rows[summary_name] = _client.get_table(table_ref).num_rows
+        print(f"✓ {summary_name}: {rows[summary_name]:,} rows", flush=True)
+    return rows
+
+
+def _with_check_sets(spec):
+    """
+    Append the cube's check sets to summary cells, summed over the facility dimensions.
+
+    The raw cube query counts each check set directly, so equal check rows
+    prove the summed distinct counts are additive.
+    """
+    from database.availability_cube import CHECK_SUFFIX
+
+    distinct = [name for name, (_, is_distinct) in spec['measures'].items() if is_distinct]
+
+    def add(df):
+        if not distinct:
+            return df
+        frames = [df]
+        for grain, product_dimensions in spec['grains'].items():
+            cells = df[df['grain'] == grain]
+            summed = (
+                cells.groupby(product_dimensions, dropna=False)[list(spec['measures'])]
+                .sum(min_count=1)
+                .reset_index()
+            )
+            summed['grain'] = grain + CHECK_SUFFIX
+            frames.append(summed)
+        return pd.concat(frames, ignore_index=True)
+    return add
+
+
+def _with_total(df):
+    """Append the dimension index's grand total row, summed over the summary cells."""
+    total = pd.DataFrame({'facility_count': [df['facility_count'].sum()]})
+    df = df.assign(is_total=False)
+    return pd.concat([df, total.assign(is_total=True)], ignore_index=True)
+
+
+def _check_queries(family, table_key, periods):
+    """
+    Raw and summary query pairs whose results must be identical.
+
+    Args:
+        family (str): Key of FAMILIES
+        table_key (str): Key of config.TABLES
+        periods (list): Selected data collection periods
+
+    Returns:
+        list: (label, raw (query, params), summary (query, params), measure
+        columns, function adding the raw query's verification rows to the
+        summary result) tuples
+    """
+    from database import availability_cube, dimension_index, semantic_cache
+
+    table_name = config.TABLES[table_key]
+    summary_name = summary_table_name(family, table_name)
+
+    if family == "availability":
+        spec = availability_cube.CUBE_SPECS[table_key]
+        global_filters = {'data_collection_period': periods, 'country': None, 'region': None}
+        return [(
+            table_name,
+            availability_cube.build_cube_query(table_name, global_filters, spec),
+            availability_cube.build_cube_summary_query(summary_name, global_filters, spec),
+            list(spec['measures']),
+            _with_check_sets(spec),
+        )]
+
+    if family == "dimensions":
+        return [(
+            table_name,
+            dimension_index.build_index_query(table_name, periods),
+            dimension_index.build_index_summary_query(summary_name, periods),
+            ['facility_count'],
+            _with_total,
+        )]
+
+    # The summary query sums its own totals, which the raw query counts directly
+    return [
+        (
+            f"{table_name} {function_name}",
+            semantic_cache.build_cells_query(table_name, semantic_cache.SPECS[function_name], periods),
+            semantic_cache.build_cells_summary_query(summary_name, function_name, periods),
+            list(semantic_cache.SPECS[function_name]['measures']),
+            None,
+        )
+        for function_name in semantic_cache.SUMMARY_FUNCTIONS
+    ]
+
+
+def _comparable(df, measures):
+    """Sort by every non-measure column and unify missing values, so two results compare row by row."""
+    keys = sorted(column for column in df.columns if column not in measures)
+    df = df[keys + measures].astype(object)
+    df = df.where(df.notna(), None)
+    # NULL keys first, as in BigQuery's ascending order
+    df = df.sort_values(keys, kind='mergesort', na_position='first', key=lambda column: column.astype(str))
+    return df.reset_index(drop=True)
+
+
+def check_summary_tables(_client):
+    """
+    Compare every summary table with the raw-table queries it replaces.
+
+    Runs each family's raw and summary queries for every data collection
+    period on its own and for all periods together.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+
+    Returns:
+        list: (family, label, periods, message) tuples for every mismatch
+    """
+    from database.query_runner import run_query
+
+    periods_query = (
+        f"SELECT DISTINCT data_collection_period "
+        f"FROM `{config.GCP_PROJECT_ID}.{config.BQ_DATASET}.{config.TABLES['surveys']}` "
+        f"WHERE data_collection_period IS NOT NULL"
+    )
+    periods = sorted(run_query(_client, periods_query)['data_collection_period'].tolist())
+    period_sets = [[period] for period in periods] + [periods]
+
+    mismatches = []
+    for family, keys in FAMILIES.items():
+        for table_key in keys:
+            for period_set in period_sets:
+                period_label = "all periods" if len(period_set) > 1 else period_set[0]
+                for label, raw, summary, measures, add_checks in _check_queries(family, table_key, period_set):
+                    expected = run_query(_client, *raw)
+                    actual = run_query(_client, *summary)
+                    if add_checks is not None:
+                        actual = add_checks(actual)
+                    expected, actual = _comparable(expected, measures), _comparable(actual, measures)
+                    try:
+                        pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+                    except AssertionError as e:
+                        message = str(e).splitlines()[0]
+                        print(f"✗ {family} {label} ({period_label}): {message}", flush=True)
+                        mismatches.append((family, label, period_label, message))
+                        continue
+                    print(f"✓ {family} {label} ({period_label})", flush=True)
+
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the pre-aggregated summary tables.")
+    parser.add_argument("command", choices=["build", "check"])
+    args = parser.parse_args(argv)
+
+    # Always compare against fresh results
+    config.RESULT_CACHE_ENABLED = False
+
+    if config.LOCAL_REPLICA_ENABLED:
+        from database.local_replica import LocalReplicaClient
+        client = LocalReplicaClient(config.LOCAL_REPLICA_DIR)
+    else:
+        from database.bigquery_client import create_bigquery_client
+        client = create_bigquery_client()
+        if client is None:
+            return 1
+    find_staging_tables(client)
+
+    if args.command == "build":
+        build_summary_tables(client)
+        return 0
+
+    mismatches = check_summary_tables(client)
+    print(f"{len(mismatches)} mismatching summary result(s)", flush=True)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Cache pre-warmer for the Data Selectors and the facility tree.
+
+After a restart the first user pays for every cold query. warm_up runs the
+selector queries ahead of time for every data collection period on its own
+and for the "all periods" selection:
+
+    - get_country_counts_by_period
+    - get_region_counts_by_period
+    - get_sector_counts_by_period
+    - fetch_facility_statistics (no country/region filter)
+
+with exactly the arguments app.py passes for such a selection, so the results
+land in st.cache_data (when run inside the server process) and in the on-disk
+result cache (shared with every server process, see database/result_cache.py).
+
+Runs in a background thread at server start (config.WARMUP_ON_STARTUP) and as
+a standalone command, e.g. before switching traffic to a new deployment:
+
+    python -m database.warmup [--max-workers 4]
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from database import freshness
+from database.bigquery_client import (
+    fetch_facility_statistics,
+    get_country_counts_by_period,
+    get_data_collection_periods,
+    get_region_counts_by_period,
+    get_sector_counts_by_period,
+)
+from database.query_builder import canonical_values
+from database.query_runner import get_query_stats
+from database.staging import find_staging_tables
+
+
+_startup_lock = threading.Lock()
+_startup_started = [False]
+
+
+def warmup_calls(_client, periods):
+    """
+    List the cached calls the Data Selectors make for each period selection.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        periods (list): All data collection periods
+
+    Returns:
+        list: (label, function, args) tuples
+    """
+    table_name = config.TABLES["surveys"]
+    periods = canonical_values(periods)
+    # Each period on its own, then everything selected
+    selections = [[period] for period in periods]
+    if len(periods) > 1:
+        selections.append(periods)
+
+    calls = []
+    for selection in selections:
+        label = "all periods" if len(selection) > 1 else selection[0]
+        filters = {
+            'data_collection_period': selection,
+            'country': None,
+            'region': None
+        }
+        calls += [
+            (f"countries ({label})", get_country_counts_by_period, (_client, table_name, selection)),
+            (f"regions ({label})", get_region_counts_by_period, (_client, table_name, selection)),
+            (f"sectors ({label})", get_sector_counts_by_period, (_client, table_name, selection)),
+            (f"facility statistics ({label})", fetch_facility_statistics, (_client, table_name, filters)),
+        ]
+    return calls
+
+
+def warm_up(_client, max_workers=None, progress=True):
+    """
+    Pre-populate the caches for every data collection period selection.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+        max_workers (int): Concurrent queries (default: config.WARMUP_MAX_WORKERS)
+        progress (bool): Print one line per finished call
+
+    Returns:
+        dict: {
+            'calls': int,            # cached function calls made
+            'failed': int,
+            'bytes_processed': int,  # bytes scanned by BigQuery while warming
+            'seconds': float
+        }
+    """
+    started = time.perf_counter()
+    bytes_before = get_query_stats()["bytes_processed"]
+
+    # Table versions first, so on-disk entries get the keys the server will look up
+    freshness.check_tables(_client, force=True)
+
+    period_df = get_data_collection_periods(_client, config.TABLES["surveys"])
+    if period_df is None or period_df.empty:
+        print("⚠ Warm-up skipped: no data collection periods found", flush=True)
+        return {"calls": 0, "failed": 0, "bytes_processed": 0, "seconds": 0.0}
+
+    calls = warmup_calls(_client, period_df['data_collection_period'].tolist())
+    failed = 0
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers or config.WARMUP_MAX_WORKERS),
+        thread_name_prefix="warmup"
+    ) as executor:
+        futures = {executor.submit(function, *args): label for label, function, args in calls}
+        for done, future in enumerate(as_completed(futures), start=1):
+            label = futures[future]
+            try:
+                result = future.result()
+                ok = result is not None
+            except Exception as e:
+                print(f"✗ Warm-up of {label} failed: {str(e)}", flush=True)
+                ok = False
+            failed += 0 if ok else 1
+            if progress:
+                print(f"{'✓' if ok else '✗'} [{done}/{len(calls)}] {label}", flush=True)
+
+    summary = {
+        "calls": len(calls),
+        "failed": failed,
+        "bytes_processed": get_query_stats()["bytes_processed"] - bytes_before,
+        "seconds": time.perf_counter() - started,
+    }
+    print(
+        f"✓ Cache warm-up finished: {summary['calls'] - failed}/{summary['calls']} calls, "
+        f"{summary['bytes_processed'] / 1024 ** 2:,.1f} MB scanned in {summary['seconds']:.1f}s",
+        flush=True
+    )
+    return summary
+
+
+def start_background_warmup(_client):
+    """
+    Run warm_up once per server process in a daemon thread.
+
+    Args:
+        _client: BigQuery client (or LocalReplicaClient)
+
+    Returns:
+        bool: True if this call started the warm-up
+    """
+    if not config.WARMUP_ON_STARTUP:
+        return False
+
+    with _startup_lock:
+        if _startup_started[0]:
+            return False
+        _startup_started[0] = True
+
+    def _run():
+        try:
+            warm_up(_client, progress=False)
+        except Exception as e:
+            print(f"⚠ Cache warm-up failed: {str(e)}", flush=True)
+
+    threading.Thread(target=_run, name="cache-warmup", daemon=True).start()
+    print("Starting cache warm-up in the background...", flush=True)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-populate the query caches for every data collection period.")
+    parser.add_argument("--max-workers", type=int, default=config.WARMUP_MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    if config.LOCAL_REPLICA_ENABLED:
+        from database.local_replica import LocalReplicaClient
+        client = LocalReplicaClient(config.LOCAL_REPLICA_DIR)
+    else:
+        from database.bigquery_client import create_bigquery_client
+        client = create_bigquery_client()
+        if client is None:
+            return 1
+    find_staging_tables(client)
+
+    summary = warm_up(client, max_workers=args.max_workers)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
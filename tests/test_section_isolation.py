@@ -0,0 +1,245 @@
+"""
+Changing one section's local filter must only run that section's code.
+
+Drives app.py with Streamlit's AppTest against a fake client (never
+BigQuery). The fake client answers every query with a small canned result and
+records which query function sent it; each query function runs its own SQL
+here (no cube, dimension index or semantic cache).
+
+Every section's query functions in the registry (components/sections.py) are
+wrapped in spies counting their calls, st.cache_data hits included. After a
+section's Region checkbox is unticked, only that section's functions may be
+called: no other section's code runs at all.
+
+AppTest always reruns the whole script, while the browser reruns only the
+fragment of a widget inside an st.fragment. The app fixture patches AppTest's
+script runner to do the same (as benchmarks/view_reruns.py does), so the test
+fails if the sections stop being fragments.
+
+Run with: python -m pytest tests
+"""
+import dataclasses
+import datetime
+import functools
+import inspect
+import os
+import sys
+from collections import Counter
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+from database import bigquery_client  # noqa: E402
+
+APP_FILE = os.path.join(ROOT, "app.py")
+QUERY_FUNCTIONS_FILE = os.path.abspath(inspect.getsourcefile(bigquery_client))
+
+REGIONS = ["Arequipa", "Lima"]
+SECTORS = ["Private Pharmacy", "Public"]
+
+
+class FakeJob:
+    cache_hit = False
+    total_bytes_processed = 0
+
+    def __init__(self, df):
+        self._df = df
+
+    def done(self):
+        return True
+
+    def to_dataframe(self, **kwargs):
+        return self._df.copy()
+
+
+class FakeClient:
+    """Stands in for bigquery.Client: records the query function of every query."""
+
+    project = "test-project"
+
+    def __init__(self):
+        self.calls = []
+
+    def _query_function(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            if os.path.abspath(frame.f_code.co_filename) == QUERY_FUNCTIONS_FILE:
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return None
+
+    def query(self, query, job_config=None, **kwargs):
+        function_name = self._query_function()
+        self.calls.append(function_name)
+        return FakeJob(_canned_result(function_name))
+
+
+def _canned_result(function_name):
+    if function_name == "get_data_collection_periods":
+        return pd.DataFrame({
+            "data_collection_period": ["Y1/P1 - Start Date: January, 2024"],
+            "survey_count": [10],
+            "first_survey_date": [datetime.date(2024, 1, 15)],
+        })
+    if function_name == "get_country_counts_by_period":
+        return pd.DataFrame({"country": ["Peru"], "survey_count": [10]})
+    if function_name == "get_region_counts_by_period":
+        return pd.DataFrame({"region": REGIONS, "survey_count": [5, 5]})
+    if function_name and function_name.endswith("_regions"):
+        return pd.DataFrame({"region": REGIONS, "facility_count": [5, 5]})
+    if function_name and function_name.endswith("_sectors"):
+        return pd.DataFrame({"sector": SECTORS, "facility_count": [5, 5]})
+    return pd.DataFrame()
+
+
+def _section_functions(name):
+    from components.sections import SECTIONS
+
+    spec = SECTIONS[name]
+    functions = [dimension['options'] for dimension in spec['dimensions']] + list(spec['data'])
+    return {function.__name__ for function in functions}
+
+
+def _spy_on_sections(monkeypatch, calls):
+    """Wrap each section's registry functions to count (section, function) calls."""
+    from components.sections import SECTIONS
+
+    def spy(name, function):
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            calls[(name, function.__name__)] += 1
+            return function(*args, **kwargs)
+        call.clear = function.clear
+        return call
+
+    for name, spec in SECTIONS.items():
+        monkeypatch.setitem(spec, 'data', [spy(name, function) for function in spec['data']])
+        monkeypatch.setitem(spec, 'dimensions', [
+            dict(dimension, options=spy(name, dimension['options'])) for dimension in spec['dimensions']
+        ])
+
+
+def _rerun_fragments_like_the_browser(monkeypatch, widget_fragments, fragment_queue):
+    """
+    Patch AppTest's script runner to record the fragment of every widget, and
+    to run the fragments in fragment_queue instead of the whole script.
+    """
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    run, request_rerun = LocalScriptRunner.run, LocalScriptRunner.request_rerun
+
+    def fragment_request_rerun(self, rerun_data):
+        if fragment_queue:
+            # Drop the full rerun every new runner starts with, which would absorb this one
+            self._requests = ScriptRequests()
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=list(fragment_queue))
+        return request_rerun(self, rerun_data)
+
+    def recording_run(self, *args, **kwargs):
+        tree = run(self, *args, **kwargs)
+        for msg in self.forward_msgs():
+            if not (msg.HasField("delta") and msg.delta.HasField("new_element") and msg.delta.fragment_id):
+                continue
+            element = msg.delta.new_element
+            widget_id = getattr(getattr(element, element.WhichOneof("type")), "id", "")
+            # Widget ids with a user key end in "-<key>"
+            parts = widget_id.split("-", 2)
+            if len(parts) == 3 and parts[2]:
+                widget_fragments[parts[2]] = msg.delta.fragment_id
+        return tree
+
+    monkeypatch.setattr(LocalScriptRunner, "request_rerun", fragment_request_rerun)
+    monkeypatch.setattr(LocalScriptRunner, "run", recording_run)
+
+
+@pytest.fixture
+def start_app(monkeypatch):
+    """Start the app with the first period selected; returns an untick(key) interaction."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # Every query function runs its own SQL, on the script thread
+    for name, value in {
+        "LOCAL_REPLICA_ENABLED": False,
+        "AVAILABILITY_CUBE_ENABLED": False,
+        "DIMENSION_INDEX_ENABLED": False,
+        "SEMANTIC_CACHE_ENABLED": False,
+        "METRIC_BATCH_ENABLED": False,
+        "PRICE_SKETCH_ENABLED": False,
+        "PREFETCH_ENABLED": False,
+        "WARMUP_ON_STARTUP": False,
+        "RESULT_CACHE_ENABLED": False,
+        "FRESHNESS_WATCHER_ENABLED": False,
+        "DIAGNOSTICS_ENABLED": False,
+    }.items():
+        monkeypatch.setattr(config, name, value)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    client = FakeClient()
+    calls = Counter()
+    widget_fragments, fragment_queue = {}, []
+    monkeypatch.setattr(bigquery_client, "get_bigquery_client", mock.Mock(return_value=client))
+    _spy_on_sections(monkeypatch, calls)
+    _rerun_fragments_like_the_browser(monkeypatch, widget_fragments, fragment_queue)
+
+    def start():
+        at = AppTest.from_file(APP_FILE, default_timeout=120)
+        at.run()
+        periods = at.multiselect(key="availability_period_filter")
+        periods.set_value([periods.options[0]])
+        at.run()
+        assert not at.exception
+
+        def untick(key):
+            """Untick a checkbox and rerun as the browser would; returns the calls made."""
+            at.checkbox(key=key).uncheck()
+            calls.clear()
+            client.calls.clear()
+            if key in widget_fragments:
+                fragment_queue.append(widget_fragments[key])
+            try:
+                at.run()
+            finally:
+                fragment_queue.clear()
+            assert not at.exception
+            return Counter(calls), list(client.calls)
+
+        return untick
+
+    return start
+
+
+@pytest.mark.parametrize("section, key_prefix", [
+    ("insulin_overall", "insulin_region_"),
+    ("insulin_by_type", "insulin_by_type_region_"),
+])
+def test_section_filter_only_runs_its_own_queries(start_app, section, key_prefix):
+    untick = start_app()
+
+    calls, queries = untick(f"{key_prefix}{REGIONS[0]}")
+
+    assert any(name == section for name, _ in calls), "the section did not rerun"
+    assert not [call for call in calls if call[0] != section], "other sections' functions were called"
+    assert queries, "the new selection ran no query"
+    assert set(queries) <= _section_functions(section)
+
+
+def test_sections_without_fragments_rerun_every_section(start_app, monkeypatch):
+    # The isolation above comes from the st.fragment: without it, unticking a
+    # section's checkbox reruns every section's code (as cache hits)
+    from components import sections
+
+    monkeypatch.setattr(sections, "_section_fragment", sections.run_section)
+    untick = start_app()
+
+    calls, queries = untick(f"insulin_region_{REGIONS[0]}")
+
+    assert [call for call in calls if call[0] != "insulin_overall"]
+    assert set(queries) <= _section_functions("insulin_overall")
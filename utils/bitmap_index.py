@@ -0,0 +1,113 @@
+"""
+Bitmap index utility functions.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Low-cardinality filter columns indexed by default (those present in the frame)
+BITMAP_COLUMNS = [
+    "data_collection_period",
+    "country",
+    "region",
+    "sector",
+    "level_of_care",
+    "insulin_type",
+    "insulin_inn",
+]
+
+
+class BitmapIndex:
+    """
+    One bitmap per distinct value of low-cardinality columns.
+
+    A bitmap packs one bit per row into 64-bit words, so the checkbox filters
+    "col IN (...)" reduce to ORing the selected values' bitmaps per column and
+    ANDing the columns, a few word-wise operations instead of isin scans over
+    the column values. NULLs get no bitmap: as with IN, they never match.
+    """
+
+    def __init__(self, df, columns=None):
+        """
+        Args:
+            df: pandas DataFrame to index
+            columns (list): Columns to index (default: BITMAP_COLUMNS)
+        """
+        self.num_rows = len(df)
+        self._num_words = -(-self.num_rows // 64)
+        self._bitmaps = {
+            column: self._build(df[column])
+            for column in (columns or BITMAP_COLUMNS)
+            if column in df.columns
+        }
+
+    def _build(self, series):
+        codes, uniques = pd.factorize(series)
+        # Small codes take numpy's radix sort; NULLs (-1) sort first
+        if len(uniques) < np.iinfo(np.int16).max:
+            codes = codes.astype(np.int16)
+        rows = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[rows], np.arange(len(uniques) + 1))
+
+        bitmaps = {}
+        for code, value in enumerate(uniques):
+            # Rows of one value are ascending: OR their bits word by word
+            value_rows = rows[bounds[code]:bounds[code + 1]]
+            word = value_rows >> 6
+            bits = np.left_shift(np.uint64(1), (value_rows & 63).astype(np.uint64))
+            starts = np.flatnonzero(np.diff(word, prepend=-1))
+            bitmap = np.zeros(self._num_words, dtype='<u8')
+            bitmap[word[starts]] = np.bitwise_or.reduceat(bits, starts)
+            bitmaps[value] = bitmap
+        return bitmaps
+
+    @property
+    def columns(self):
+        """Indexed columns."""
+        return list(self._bitmaps)
+
+    def values(self, column):
+        """
+        Distinct non-NULL values of an indexed column.
+
+        Args:
+            column: Indexed column name
+
+        Returns:
+            list of values, in order of first appearance
+        """
+        return list(self._bitmaps[column])
+
+    def mask(self, filters):
+        """
+        Evaluate "col IN (values)" filters, ANDed across columns.
+
+        Args:
+            filters (dict): Indexed column -> selected values; None or an
+                empty selection leaves the column unfiltered (as add_in_filter)
+
+        Returns:
+            numpy bool array, True for the matching rows
+        """
+        words = None
+        for column, values in filters.items():
+            if not values:
+                continue
+            bitmaps = self._bitmaps[column]
+            selected = np.zeros(self._num_words, dtype='<u8')
+            for value in values:
+                bitmap = bitmaps.get(value)
+                if bitmap is not None:
+                    selected |= bitmap
+            if words is None:
+                words = selected
+            else:
+                words &= selected
+
+        if words is None:
+            return np.ones(self.num_rows, dtype=bool)
+        return np.unpackbits(words.view(np.uint8), count=self.num_rows, bitorder='little').view(bool)
+
+    def nbytes(self):
+        """Memory held by the bitmaps, in bytes."""
+        return sum(bitmap.nbytes for bitmaps in self._bitmaps.values() for bitmap in bitmaps.values())
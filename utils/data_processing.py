@@ -1,8 +1,20 @@
 """
 Data transformation and processing utility functions.
 """
+import functools
+
+import numpy as np
 import pandas as pd
 
+import config
+
+
+# String columns with at most this share of distinct values are stored as categoricals
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+# Largest change accepted when storing a price column as float32 (prices are shown with 2 decimals)
+PRICE_FLOAT32_TOLERANCE = 0.005
+
 
 def format_currency(value, currency="USD"):
     """
@@ -158,4 +170,67 @@ def clean_price_data(df, price_columns):
             # Remove negative prices
             df_clean.loc[df_clean[col] < 0, col] = None
 
-    return df_clean
\ No newline at end of file
+    return df_clean
+
+def compact_dataframe(df):
+    """
+    Shrink the in-memory representation of a query result.
+
+    Results come back with one Python string object per row for repeated
+    values such as "Public" or the country and region names. This stores
+
+        - string columns with repeated values (the dimension columns) as
+          categoricals: each distinct string once, int8/int16 codes per row
+        - price columns as float32 when no value changes by more than
+          PRICE_FLOAT32_TOLERANCE
+        - insulin_available_num (0/1 flags) as a nullable boolean
+
+    Values and NULLs are otherwise unchanged; columns that would not get
+    smaller (e.g. all-distinct strings) keep their dtype.
+
+    Args:
+        df: pandas DataFrame
+
+    Returns:
+        Compacted DataFrame (attrs kept)
+    """
+    if df is None or df.empty:
+        return df
+
+    dtypes = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            if (
+                pd.api.types.infer_dtype(series, skipna=True) == "string"
+                and series.nunique(dropna=True) <= CATEGORICAL_MAX_UNIQUE_RATIO * len(series)
+            ):
+                dtypes[column] = "category"
+        elif "price" in column and pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            error = np.abs(values.astype("float32").astype("float64") - values)
+            if not np.any(error > PRICE_FLOAT32_TOLERANCE):
+                dtypes[column] = "float32"
+        elif column == "insulin_available_num" and pd.api.types.is_numeric_dtype(series.dtype):
+            if series.dropna().isin([0, 1]).all():
+                dtypes[column] = "boolean"
+
+    return df.astype(dtypes) if dtypes else df
+
+
+def compact_result(function):
+    """
+    Decorator applying compact_dataframe to the DataFrames a query function returns.
+
+    Place it below @cached_query, so the compacted result is what gets cached.
+    Does nothing with config.COMPACT_RESULTS_ENABLED off.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        result = function(*args, **kwargs)
+        if config.COMPACT_RESULTS_ENABLED and isinstance(result, pd.DataFrame):
+            return compact_dataframe(result)
+        return result
+    return wrapper
@@ -0,0 +1,180 @@
+"""
+Mergeable sketch utility functions.
+"""
+import math
+
+import numpy as np
+
+
+def hll_registers(register_index, rank, precision):
+    """
+    Build a dense HyperLogLog register array from sparse (register, rank) pairs.
+
+    Pairs from several cells can be passed at once: keeping the maximum rank
+    per register is exactly the HyperLogLog merge.
+
+    Args:
+        register_index: Register numbers (0 .. 2**precision - 1), NULLs ignored
+        rank: Rank per pair (position of the first set bit), NULLs ignored
+        precision: Number of index bits p (2**p registers)
+
+    Returns:
+        numpy uint8 array of length 2**precision
+    """
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    register_index = np.asarray(register_index, dtype='float64')
+    rank = np.asarray(rank, dtype='float64')
+    valid = ~(np.isnan(register_index) | np.isnan(rank))
+    np.maximum.at(registers, register_index[valid].astype(np.int64), rank[valid].astype(np.uint8))
+    return registers
+
+
+def hll_estimate(registers):
+    """
+    Estimate the number of distinct values from HyperLogLog registers.
+
+    Uses linear counting while registers are still empty (small cardinalities),
+    where it is far more accurate than the raw estimate. Hashes are 64-bit, so
+    no large-range correction is needed.
+
+    Args:
+        registers: numpy array from hll_registers
+
+    Returns:
+        Estimated distinct count (float)
+    """
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.power(2.0, -registers.astype('float64')))
+
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return float(raw)
+
+
+def hll_relative_error(precision):
+    """
+    Relative standard error of a HyperLogLog estimate, 1.04 / sqrt(2**precision).
+
+    Args:
+        precision: Number of index bits p
+
+    Returns:
+        Relative standard error (e.g. 0.008 for p=14)
+    """
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def quantile_sketch_vectors(weight, low, high):
+    """
+    Expand merged quantile sketch buckets into sorted value vectors.
+
+    A bucket holds `weight` consecutive values of one cell, all between `low`
+    and `high`; buckets of one value (weight 1, low == high) are exact. Each
+    bucket's values are estimated evenly spaced between its bounds. Since
+    every true value lies within its bucket's bounds, the k-th smallest true
+    value lies between the k-th values of the `lower` and `upper` vectors.
+
+    Args:
+        weight: Number of values per bucket
+        low: Smallest value per bucket
+        high: Largest value per bucket
+
+    Returns:
+        tuple: (estimate, lower, upper) sorted numpy arrays of length sum(weight)
+    """
+    weight = np.asarray(weight, dtype=np.int64)
+    low = np.asarray(low, dtype='float64')
+    high = np.asarray(high, dtype='float64')
+
+    bucket = np.repeat(np.arange(len(weight)), weight)
+    position = np.arange(len(bucket)) - np.repeat(np.cumsum(weight) - weight, weight)
+    fraction = position / np.maximum(weight[bucket] - 1, 1)
+    estimate = low[bucket] + (high[bucket] - low[bucket]) * fraction
+
+    return np.sort(estimate), np.sort(low[bucket]), np.sort(high[bucket])
+
+
+def discrete_quantile_index(count, buckets, offset):
+    """
+    Position of APPROX_QUANTILES(x, buckets)[OFFSET(offset)] among `count` sorted values.
+
+    Uses the same positions as the local replica's QUANTILE_DISC translation,
+    i.e. the exact discrete quantile ceil(count * offset / buckets) - 1.
+
+    Args:
+        count: Number of non-NULL values
+        buckets: Number of quantile buckets
+        offset: Quantile boundary (0 .. buckets)
+
+    Returns:
+        int index into the sorted values
+    """
+    return max(0, -(-count * offset // buckets) - 1)
+
+
+def odd_even_median(values, buckets, offset, odd_even=True):
+    """
+    Median rule of the price functions over sorted values.
+
+    Odd counts (and even counts of 100 or more) take the middle quantile
+    APPROX_QUANTILES(x, buckets)[OFFSET(offset)]; smaller even counts average
+    the 49th and 51st percentiles. With odd_even=False only the middle
+    quantile is used (plain APPROX_QUANTILES(x, 100)[OFFSET(50)]).
+
+    Args:
+        values: Sorted numpy array of non-NULL values
+        buckets: Quantile buckets of the middle quantile
+        offset: Offset of the middle quantile
+        odd_even (bool): Apply the odd/even rule
+
+    Returns:
+        float, or None for no values
+    """
+    count = len(values)
+    if count == 0:
+        return None
+    if not odd_even or count % 2 == 1 or count >= 100:
+        return float(values[discrete_quantile_index(count, buckets, offset)])
+    return float((values[discrete_quantile_index(count, 100, 49)] + values[discrete_quantile_index(count, 100, 51)]) / 2)
+
+
+def percentile_cont(values, fraction):
+    """
+    Linearly interpolated percentile of sorted values (PERCENTILE_CONT).
+
+    Args:
+        values: Sorted numpy array of non-NULL values
+        fraction: Percentile between 0 and 1
+
+    Returns:
+        float
+    """
+    position = (len(values) - 1) * fraction
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(values) - 1)
+    return float(values[lower] + (values[upper] - values[lower]) * (position - lower))
+
+
+def exact_median(values, odd_even=True):
+    """
+    Exact median rule of plans/queries.md over sorted values.
+
+    Odd counts (and even counts of 100 or more) take MEDIAN(x); smaller even
+    counts average PERCENTILE(x, 49) and PERCENTILE(x, 51). With
+    odd_even=False the plain MEDIAN(x) is used.
+
+    Args:
+        values: Sorted numpy array of non-NULL values
+        odd_even (bool): Apply the odd/even rule
+
+    Returns:
+        float, or None for no values
+    """
+    count = len(values)
+    if count == 0:
+        return None
+    if not odd_even or count % 2 == 1 or count >= 100:
+        return percentile_cont(values, 0.5)
+    return (percentile_cont(values, 0.49) + percentile_cont(values, 0.51)) / 2